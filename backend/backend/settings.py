@@ -125,6 +125,10 @@ DATABASES = {
     }
 }
 
+# Price history store: "daily" (one row per card per day) or "runs" (one row per
+# price change, expanded back to daily points by the history API)
+HISTORY_STORE = config("HISTORY_STORE", default="daily")
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
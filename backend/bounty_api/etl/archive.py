@@ -0,0 +1,102 @@
+import io
+import re
+from pathlib import Path
+
+try:
+    import py7zr
+    from py7zr.io import Py7zIO, WriterFactory
+except ImportError:  # only needed for import_archive
+    py7zr = None
+    Py7zIO = WriterFactory = object
+
+from bounty_api.etl.parse import parse_price_stream, concat_columns
+
+ONE_PIECE_CATEGORY = 68
+
+# <date>/<category>/<group>/prices inside prices-YYYY-MM-DD.ppmd.7z
+MEMBER_PATTERN = re.compile(r"^(?:.*/)?(\d{4}-\d{2}-\d{2})/(\d+)/(\d+)/prices$")
+
+
+def archive_support():
+    return py7zr is not None
+
+
+def price_members(names, category=ONE_PIECE_CATEGORY):
+    """{member name: date string} for the price files of one category."""
+    members = {}
+    for name in names:
+        match = MEMBER_PATTERN.match(name)
+        if match and int(match.group(2)) == category:
+            members[name] = match.group(1)
+    return members
+
+
+class _PriceMember(Py7zIO):
+    # Holds one decompressed member in memory and parses it as soon as py7zr
+    # reports it complete, so only one member's bytes are alive at a time
+    def __init__(self, sink, filename):
+        self.sink = sink
+        self.filename = filename
+        self._buffer = io.BytesIO()
+
+    def write(self, s):
+        return self._buffer.write(s)
+
+    def read(self, size=None):
+        return self._buffer.read(size)
+
+    def seek(self, offset, whence=0):
+        return self._buffer.seek(offset, whence)
+
+    def flush(self):
+        return self._buffer.flush()
+
+    def size(self):
+        return self._buffer.getbuffer().nbytes
+
+    def close(self):
+        if self._buffer is not None:
+            self._buffer.seek(0)
+            self.sink.parse(self.filename, self._buffer)
+            self._buffer = None
+
+
+class _PriceSink(WriterFactory):
+    def __init__(self, members):
+        self.members = members
+        self.parts = {}
+        self.open = []
+        self.errors = {}
+
+    def create(self, filename):
+        member = _PriceMember(self, filename)
+        self.open.append(member)
+        return member
+
+    def parse(self, filename, f):
+        try:
+            self.parts.setdefault(self.members[filename], []).append(parse_price_stream(f))
+        except Exception as e:
+            self.errors.setdefault(self.members[filename], []).append(f"Failed to parse {filename}: {e}")
+
+    def finish(self):
+        # Older py7zr releases never call close() on members
+        for member in self.open:
+            member.close()
+        self.open = []
+
+
+def read_archive_prices(path: Path, category=ONE_PIECE_CATEGORY):
+    """
+    Stream the category's price members out of a TCGCSV 7z archive without
+    extracting anything to disk. Returns ({date: columns}, {date: errors}).
+    """
+    with py7zr.SevenZipFile(path, mode="r") as archive:
+        members = price_members(archive.getnames(), category)
+        if not members:
+            return {}, {}
+        sink = _PriceSink(members)
+        archive.extract(targets=list(members), factory=sink)
+        sink.finish()
+
+    return {date: concat_columns(parts) for date, parts in sink.parts.items()}, sink.errors
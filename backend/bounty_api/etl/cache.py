@@ -0,0 +1,94 @@
+import hashlib
+import logging
+import os
+from pathlib import Path
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # cache is optional; without pyarrow every run re-parses
+    pa = pq = None
+
+from bounty_api.etl.cards import iter_set_frames
+from bounty_api.etl.parse import CARD_SCHEMA, list_set_csvs, conform_schema
+
+# Bump when parsing/cleaning changes so old cache files stop matching
+CACHE_VERSION = 1
+CACHE_PREFIX = "cleaned_"
+HASH_CHUNK = 1024 * 1024
+
+
+def cache_available():
+    return pq is not None
+
+
+def cache_schema():
+    return pa.schema([
+        (col, pa.string() if spec["dtype"] == "string" else pa.float64())
+        for col, spec in CARD_SCHEMA.items()
+    ])
+
+
+def inputs_hash(files) -> str:
+    """Hash of the cache version plus every input file's name and bytes."""
+    digest = hashlib.sha1(f"v{CACHE_VERSION}".encode())
+    for file in files:
+        digest.update(file.name.encode())
+        with open(file, "rb") as f:
+            while chunk := f.read(HASH_CHUNK):
+                digest.update(chunk)
+    return digest.hexdigest()[:16]
+
+
+def cache_path(csv_dir: Path, files) -> Path:
+    return csv_dir / f"{CACHE_PREFIX}{inputs_hash(files)}.parquet"
+
+
+def read_cached_frames(path: Path):
+    """Yield the cached day one row group (one set file) at a time, memory-mapped."""
+    parquet = pq.ParquetFile(pa.memory_map(str(path), "r"))
+    for i in range(parquet.num_row_groups):
+        yield conform_schema(parquet.read_row_group(i).to_pandas())
+
+
+def _write_through(frames, path: Path):
+    # Each frame becomes one row group; the file only appears once complete
+    tmp_path = path.with_name(f".{path.name}.part")
+    schema = cache_schema()
+    writer = pq.ParquetWriter(tmp_path, schema)
+    try:
+        for df in frames:
+            writer.write_table(pa.Table.from_pandas(df[list(CARD_SCHEMA)], schema=schema, preserve_index=False))
+            yield df
+        writer.close()
+        os.replace(tmp_path, path)
+    finally:
+        if tmp_path.exists():
+            writer.close()
+            tmp_path.unlink()
+
+
+def iter_day_frames(csv_dir: Path, skip_errors=False, workers=1, use_cache=True, files=None):
+    """
+    Like iter_set_frames, but served from prices/<date>/cleaned_<hash>.parquet
+    when the raw CSVs are unchanged, and written through to it when they are not.
+    The cache only covers whole days; a subset of `files` is always parsed.
+    """
+    all_files = list_set_csvs(csv_dir)
+    partial = files is not None and sorted(files) != all_files
+    if partial or not use_cache or not cache_available():
+        yield from iter_set_frames(csv_dir, skip_errors=skip_errors, workers=workers, files=files)
+        return
+
+    path = cache_path(csv_dir, all_files)
+    if path.exists():
+        logging.info(f"Using cleaned cache {path}")
+        yield from read_cached_frames(path)
+        return
+
+    for stale in csv_dir.glob(f"{CACHE_PREFIX}*.parquet"):
+        stale.unlink()
+
+    logging.info(f"Writing cleaned cache {path}")
+    frames = iter_set_frames(csv_dir, skip_errors=skip_errors, workers=workers)
+    yield from _write_through(frames, path)
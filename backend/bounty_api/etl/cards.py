@@ -0,0 +1,235 @@
+import logging
+from dataclasses import dataclass
+from pathlib import Path
+import pandas as pd
+
+from django.conf import settings
+from django.db import connection
+
+from bounty_api.models import OnePieceCard, OnePieceCardHistory
+from bounty_api.etl.loader import upsert_dataframe, update_dataframe
+from bounty_api.etl.metrics import RunMetrics
+from bounty_api.etl.parallel import iter_pool_results
+from bounty_api.etl.partitions import ensure_partitions, month_start, next_month
+from bounty_api.etl.runs import extend_runs
+from bounty_api.etl.parse import (
+    list_set_csvs, read_set_csv, parse_set_columns, frame_from_columns,
+)
+
+DEFAULT_MEMORY_LIMIT_MB = 256
+
+KEY_FIELDS = ["product_id", "foil_type"]
+UPDATE_FIELDS = [
+    "name", "image_url", "tcgplayer_url",
+    "market_price", "rarity", "card_id", "description", "color",
+    "card_type", "life", "power", "subtype", "attribute", "cost",
+    "counter", "last_update"
+]
+INT_FIELDS = ["life", "power", "cost", "counter"]
+# Everything the ETL writes except the date: a change here means a real update
+FINGERPRINT_FIELDS = UPDATE_FIELDS[:-1]
+CARD_TABLE = OnePieceCard._meta.db_table
+
+
+@dataclass
+class CardChanges:
+    new: int = 0
+    changed: int = 0
+    unchanged: int = 0
+
+    def __add__(self, other):
+        return CardChanges(
+            self.new + other.new,
+            self.changed + other.changed,
+            self.unchanged + other.unchanged,
+        )
+
+    def summary(self):
+        return f"{self.new} new, {self.changed} changed, {self.unchanged} unchanged"
+
+
+def iter_set_frames(csv_dir: Path, skip_errors=False, workers=1, files=None):
+    """
+    Yield one cleaned frame per group CSV (or only `files`), in file order.
+    With workers > 1 parsing and cleaning run in a process pool; only the
+    merge stays here.
+    """
+    files = list_set_csvs(csv_dir) if files is None else sorted(files)
+    if workers > 1:
+        results = iter_pool_results(parse_set_columns, files, workers)
+    else:
+        results = ((file, None) for file in files)
+
+    for file, future in results:
+        logging.info(f"ETL for file: {file}")
+        try:
+            yield frame_from_columns(future.result()) if future else read_set_csv(file)
+        except Exception as e:
+            if not skip_errors:
+                raise
+            logging.warning(f"Skipping {file}: {e}")
+
+
+def iter_batches(frames, memory_limit_mb=DEFAULT_MEMORY_LIMIT_MB):
+    """
+    Group frames into batches whose in-memory size stays under memory_limit_mb.
+    A single file larger than the limit is still yielded on its own.
+    """
+    limit = memory_limit_mb * 1024 * 1024
+    batch, size = [], 0
+    for df in frames:
+        df_size = int(df.memory_usage(deep=True).sum())
+        if batch and size + df_size > limit:
+            yield pd.concat(batch, ignore_index=True)
+            batch, size = [], 0
+        batch.append(df)
+        size += df_size
+    if batch:
+        yield pd.concat(batch, ignore_index=True)
+
+
+def existing_card_keys(product_ids=None, table=CARD_TABLE) -> pd.DataFrame:
+    """
+    (id, product_id, foil_type, stored_fingerprint, stored_price) as a frame, for
+    every card or only the product_id range covered by product_ids.
+    """
+    sql = (
+        f"SELECT id, product_id, foil_type, fingerprint, market_price "
+        f"FROM {connection.ops.quote_name(table)}"
+    )
+    params = []
+    if product_ids is not None and len(product_ids):
+        sql += " WHERE product_id BETWEEN %s AND %s"
+        params = [int(min(product_ids)), int(max(product_ids))]
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+    existing = pd.DataFrame.from_records(
+        rows, columns=["id", "product_id", "foil_type", "stored_fingerprint", "stored_price"]
+    )
+    return existing.astype({
+        "id": "int64", "product_id": "int64", "foil_type": "string", "stored_price": "float64",
+    })
+
+
+def split_new_existing(df_all: pd.DataFrame, existing: pd.DataFrame):
+    """
+    Classify incoming rows against the card table with one merge on
+    (product_id, foil_type). Existing rows come back with the card's db columns.
+    """
+    df_all = df_all.astype({"product_id": "int64", "foil_type": "string"})
+    merged = df_all.merge(
+        existing, on=KEY_FIELDS, how="left", indicator=True, validate="many_to_one"
+    )
+    is_new = (merged["_merge"] == "left_only").to_numpy()
+    merged = merged.drop(columns="_merge")
+
+    db_columns = [c for c in existing.columns if c not in KEY_FIELDS]
+    new_rows = merged.loc[is_new].drop(columns=db_columns)
+    existing_rows = merged.loc[~is_new]
+    return new_rows, existing_rows
+
+
+def card_fingerprints(load: pd.DataFrame) -> pd.Series:
+    """Stable 64-bit content hash per row, as 16 hex chars."""
+    hashes = pd.util.hash_pandas_object(load[FINGERPRINT_FIELDS], index=False)
+    return hashes.map("{:016x}".format)
+
+
+def card_load_frame(df: pd.DataFrame, curr_date) -> pd.DataFrame:
+    """Incoming rows shaped as one_piece_card columns, typed for the loader."""
+    load = df[KEY_FIELDS + FINGERPRINT_FIELDS].copy()
+    load["product_id"] = load["product_id"].astype("int64")
+    load["market_price"] = load["market_price"].fillna(0.0).round(2)
+    for col in INT_FIELDS:
+        load[col] = pd.to_numeric(load[col], errors="coerce").round().astype("Int64")
+    load["fingerprint"] = card_fingerprints(load)
+    load["last_update"] = str(curr_date)
+    return load
+
+
+def upsert_cards(df_all: pd.DataFrame, curr_date, table=CARD_TABLE, metrics=None) -> CardChanges:
+    """
+    Write only new cards and cards whose fingerprint changed; last_update
+    becomes the date a card's data last changed. Unchanged rows are not touched.
+    table can point at a shadow copy of one_piece_card. Timings go to the
+    "classify" and "upsert" stages of metrics.
+    """
+    metrics = metrics or RunMetrics()
+    with metrics.stage("classify", rows_in=len(df_all)) as stage:
+        load = card_load_frame(df_all, curr_date).drop_duplicates(subset=KEY_FIELDS, keep="last")
+        new_rows, existing_rows = split_new_existing(load, existing_card_keys(load["product_id"], table))
+
+        is_changed = existing_rows["stored_fingerprint"] != existing_rows["fingerprint"]
+        changed_rows = existing_rows.loc[is_changed, load.columns]
+        stage.rows_out += len(new_rows) + len(changed_rows)
+
+    with metrics.stage("upsert", rows_in=len(new_rows) + len(changed_rows)) as stage:
+        stage.rows_out += upsert_dataframe(
+            pd.concat([new_rows, changed_rows], ignore_index=True),
+            table,
+            conflict_columns=KEY_FIELDS,
+            update_columns=UPDATE_FIELDS + ["fingerprint"],
+            update_where=f"{table}.fingerprint <> EXCLUDED.fingerprint",
+        )
+
+    return CardChanges(
+        new=len(new_rows),
+        changed=len(changed_rows),
+        unchanged=len(existing_rows) - len(changed_rows),
+    )
+
+
+def update_prices(df_prices: pd.DataFrame, curr_date, table=CARD_TABLE, metrics=None):
+    """
+    Prices-only update: set market_price (and last_update) on known cards whose
+    price moved, with one UPDATE; their fingerprint is cleared. Returns (CardChanges, unseen rows); unseen
+    rows are keys not in the table yet and need the full metadata path.
+    """
+    metrics = metrics or RunMetrics()
+    with metrics.stage("classify", rows_in=len(df_prices)) as stage:
+        prices = df_prices.drop_duplicates(subset=KEY_FIELDS, keep="last").copy()
+        prices["market_price"] = prices["market_price"].fillna(0.0).round(2)
+        unseen, existing_rows = split_new_existing(
+            prices, existing_card_keys(prices["product_id"], table)
+        )
+        stored = existing_rows["stored_price"].fillna(0.0)
+        is_changed = (existing_rows["market_price"] - stored).abs() >= 0.005
+        changed = existing_rows.loc[is_changed, ["id", "market_price"]].astype({"id": "int64"})
+        changed["last_update"] = str(curr_date)
+        # The stored fingerprint still covers the old price; blank it so the
+        # next full run rewrites the row instead of matching the old hash
+        changed["fingerprint"] = ""
+        stage.rows_out += len(changed)
+
+    with metrics.stage("upsert", rows_in=len(changed)) as stage:
+        stage.rows_out += update_dataframe(changed, table, key_columns=["id"])
+
+    changes = CardChanges(changed=len(changed), unchanged=len(existing_rows) - len(changed))
+    return changes, unseen
+
+
+def snapshot_history(curr_date, table=CARD_TABLE) -> int:
+    """
+    Copy every card's current price into history for curr_date, inside the
+    database. Returns the number of history rows actually inserted, or with
+    HISTORY_STORE = "runs", the number of price runs started.
+    """
+    if settings.HISTORY_STORE == "runs":
+        return extend_runs(curr_date, table)
+
+    qn = connection.ops.quote_name
+    card_table = qn(table)
+    history_table = qn(OnePieceCardHistory._meta.db_table)
+    # Also next month's partition, so it exists well before the first night that needs it
+    ensure_partitions(curr_date, next_month(month_start(curr_date)))
+
+    # "WHERE true" keeps SQLite from reading ON CONFLICT as a join clause
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {history_table} (card_id, history_date, market_price) "
+            f"SELECT id, %s, COALESCE(market_price, 0) FROM {card_table} WHERE true "
+            f"ON CONFLICT (card_id, history_date) DO NOTHING",
+            [str(curr_date)],
+        )
+        return cursor.rowcount
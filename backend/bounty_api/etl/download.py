@@ -0,0 +1,290 @@
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from pathlib import Path
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+TCGCSV_BASE_URL = "https://tcgcsv.com/tcgplayer/68"
+
+DEFAULT_WORKERS = 8
+DEFAULT_PER_HOST = 4
+DEFAULT_RETRIES = 3
+DEFAULT_BACKOFF = 0.5
+DEFAULT_TIMEOUT = 30
+
+# Status codes worth another attempt; anything else is raised immediately
+RETRY_STATUS = {429, 500, 502, 503, 504}
+CHUNK_SIZE = 64 * 1024
+
+
+class DownloadTimeout(Exception):
+    pass
+
+
+@dataclass
+class DownloadStats:
+    files: int = 0
+    unchanged: int = 0
+    skipped: int = 0
+    failed: int = 0
+    bytes: int = 0
+    wall_time: float = 0.0
+    # Paths whose content may differ from the last run and need loading
+    changed_paths: list = field(default_factory=list)
+
+    @property
+    def bytes_per_sec(self):
+        return self.bytes / self.wall_time if self.wall_time else 0.0
+
+    def summary(self):
+        return (
+            f"{self.files} downloaded, {self.unchanged} unchanged, {self.skipped} skipped, "
+            f"{self.failed} failed - "
+            f"{self.bytes / 1024 / 1024:.2f} MB in {self.wall_time:.2f}s "
+            f"({self.bytes_per_sec / 1024 / 1024:.2f} MB/s)"
+        )
+
+
+def write_atomic(path: Path, content: bytes):
+    # Write to a temp file in the same directory, then rename over the target,
+    # so readers never see a half-written CSV
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".part")
+    try:
+        os.fchmod(fd, 0o644)  # mkstemp creates 0600
+        with os.fdopen(fd, "wb") as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+def link_or_copy(src: Path, dst: Path):
+    # Unchanged files are hard-linked into the new dated dir, so it stays complete for free
+    tmp_path = dst.with_name(f".{dst.name}.part")
+    try:
+        os.link(src, tmp_path)
+    except OSError:
+        shutil.copyfile(src, tmp_path)
+    os.replace(tmp_path, dst)
+
+
+class FetchManifest:
+    """
+    On-disk record of ETag, Last-Modified, content hash and local path per URL,
+    used to make conditional requests and skip files that have not changed.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._lock = threading.Lock()
+        self.entries = json.loads(path.read_text()) if path.exists() else {}
+
+    def get(self, url):
+        with self._lock:
+            return self.entries.get(url)
+
+    def record(self, url, response_headers, sha1, path):
+        with self._lock:
+            self.entries[url] = {
+                "etag": response_headers.get("ETag"),
+                "last_modified": response_headers.get("Last-Modified"),
+                "sha1": sha1,
+                "path": str(path) if path else None,
+            }
+
+    def update_path(self, url, path: Path):
+        with self._lock:
+            self.entries[url]["path"] = str(path)
+
+    def save(self):
+        with self._lock:
+            content = json.dumps(self.entries, indent=1, sort_keys=True).encode()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        write_atomic(self.path, content)
+
+
+class UnexpectedContentType(Exception):
+    pass
+
+
+class Downloader:
+    """
+    Fetches files over one shared keep-alive session.
+    Concurrency is bounded overall (workers) and per host (per_host).
+    With content_type set, responses of any other type (an HTML error page
+    served with 200, say) fail instead of being saved. The manifest is saved
+    on close unless save_manifest is False, for callers that must first
+    finish processing what was fetched.
+    """
+
+    def __init__(self, workers=DEFAULT_WORKERS, per_host=DEFAULT_PER_HOST,
+                 retries=DEFAULT_RETRIES, backoff=DEFAULT_BACKOFF, timeout=DEFAULT_TIMEOUT,
+                 manifest: FetchManifest = None, content_type=None, save_manifest=True):
+        self.workers = max(1, workers)
+        self.manifest = manifest
+        self.save_manifest = save_manifest
+        self.content_type = content_type
+        self.per_host = max(1, per_host)
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=self.workers, pool_maxsize=self.workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self._host_slots = {}
+        self._lock = threading.Lock()
+
+    def close(self):
+        if self.manifest is not None and self.save_manifest:
+            self.manifest.save()
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _host_slot(self, url):
+        host = urlsplit(url).netloc
+        with self._lock:
+            if host not in self._host_slots:
+                self._host_slots[host] = threading.BoundedSemaphore(self.per_host)
+            return self._host_slots[host]
+
+    def _conditional_headers(self, url):
+        entry = self.manifest.get(url) if self.manifest is not None else None
+        if not entry:
+            return {}
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def _get_once(self, url, headers):
+        # `timeout` bounds each socket operation, the deadline bounds the whole file
+        deadline = time.monotonic() + self.timeout
+        with self._host_slot(url):
+            with self.session.get(url, headers=headers, stream=True, timeout=self.timeout) as response:
+                if response.status_code == 304:
+                    return None, response.headers
+                response.raise_for_status()
+                received = response.headers.get("Content-Type", "")
+                if self.content_type and not received.startswith(self.content_type):
+                    raise UnexpectedContentType(f"{url} returned {received or 'no content type'}")
+                chunks = []
+                for chunk in response.iter_content(CHUNK_SIZE):
+                    chunks.append(chunk)
+                    if time.monotonic() > deadline:
+                        raise DownloadTimeout(f"{url} exceeded {self.timeout}s")
+                return b"".join(chunks), response.headers
+
+    def _fetch(self, url, conditional):
+        headers = self._conditional_headers(url) if conditional else {}
+        for attempt in range(self.retries + 1):
+            try:
+                return self._get_once(url, headers)
+            except requests.HTTPError as e:
+                status = e.response.status_code if e.response is not None else None
+                if status not in RETRY_STATUS or attempt == self.retries:
+                    raise
+                error = e
+            except (requests.ConnectionError, requests.Timeout, DownloadTimeout) as e:
+                if attempt == self.retries:
+                    raise
+                error = e
+
+            delay = self.backoff * (2 ** attempt)
+            logging.warning(f"Retrying {url} in {delay:.1f}s ({attempt + 1}/{self.retries}): {error}")
+            time.sleep(delay)
+
+    def fetch(self, url, conditional=False, path: Path = None):
+        """
+        GET url and return its bytes. With conditional=True and a manifest entry,
+        returns None when the server answers 304 or the content hash is unchanged.
+        """
+        entry = self.manifest.get(url) if self.manifest is not None else None
+        content, headers = self._fetch(url, conditional and entry is not None)
+        if content is None:
+            return None
+
+        sha1 = hashlib.sha1(content).hexdigest()
+        if self.manifest is not None:
+            self.manifest.record(url, headers, sha1, path or (entry or {}).get("path"))
+        if conditional and entry and entry.get("sha1") == sha1:
+            return None
+        return content
+
+    def download(self, url, path: Path):
+        """
+        Download url to path. Returns (bytes written, changed). Unchanged files
+        are linked from the previous copy recorded in the manifest.
+        """
+        entry = self.manifest.get(url) if self.manifest is not None else None
+        previous = Path(entry["path"]) if entry and entry.get("path") else None
+        conditional = previous is not None and previous.exists()
+
+        content = self.fetch(url, conditional=conditional, path=path)
+        if content is None:
+            if previous.resolve() != path.resolve():
+                link_or_copy(previous, path)
+            self.manifest.update_path(url, path)
+            return 0, False
+
+        write_atomic(path, content)
+        return len(content), True
+
+    def download_all(self, jobs, skip_existing=True) -> DownloadStats:
+        """
+        jobs: iterable of (url, path) pairs.
+        Failures are logged and counted, they do not stop the other downloads.
+        """
+        stats = DownloadStats()
+        start = time.perf_counter()
+
+        pending = []
+        for url, path in jobs:
+            if skip_existing and path.exists():
+                logging.info(f"CSV already exists: {path}")
+                stats.skipped += 1
+                stats.changed_paths.append(path)
+            else:
+                pending.append((url, path))
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            futures = {pool.submit(self.download, url, path): (url, path) for url, path in pending}
+            for future in as_completed(futures):
+                url, path = futures[future]
+                try:
+                    nbytes, changed = future.result()
+                    if changed:
+                        stats.bytes += nbytes
+                        stats.files += 1
+                        stats.changed_paths.append(path)
+                        logging.info(f"Downloaded {path}")
+                    else:
+                        stats.unchanged += 1
+                        logging.info(f"Unchanged since last fetch: {path}")
+                except Exception as e:
+                    stats.failed += 1
+                    logging.error(f"Error downloading {url}: {e}")
+
+        stats.wall_time = time.perf_counter() - start
+        return stats
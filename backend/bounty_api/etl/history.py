@@ -0,0 +1,128 @@
+import numpy as np
+import pandas as pd
+
+from django.db import connection, transaction
+
+from bounty_api.models import OnePieceCard, OnePieceCardHistory, EtlRun
+from bounty_api.etl.loader import upsert_dataframe
+from bounty_api.etl.partitions import ensure_partitions
+
+HISTORY_TABLE = OnePieceCardHistory._meta.db_table
+CARD_TABLE = OnePieceCard._meta.db_table
+HISTORY_KEY = ["card_id", "history_date"]
+
+
+def card_reference_frame() -> pd.DataFrame:
+    """(id, product_id, foil_type) for every card, used to map archive rows to ids."""
+    cards = OnePieceCard.objects.all().values("id", "product_id", "foil_type")
+    df_cards = pd.DataFrame.from_records(cards, columns=["id", "product_id", "foil_type"])
+    return df_cards.astype({"product_id": "int64", "foil_type": "string"})
+
+
+def imported_dates(command) -> set:
+    return set(EtlRun.objects.filter(command=command).values_list("run_date", flat=True))
+
+
+def history_rows(columns: dict, df_cards: pd.DataFrame, history_date) -> pd.DataFrame:
+    """
+    Columnar prices -> one_piece_card_history rows for history_date, joined to
+    card ids on (product_id, foil_type). Unknown cards are dropped.
+    """
+    prices = pd.DataFrame({
+        "product_id": columns["product_id"],
+        "foil_type": pd.Series(columns["foil_type"], dtype="string").fillna("Normal"),
+        "market_price": np.nan_to_num(columns["market_price"], nan=0.0),
+    })
+    prices = prices[~np.isnan(columns["product_id"])].astype({"product_id": "int64"})
+
+    merged = prices.merge(df_cards, on=["product_id", "foil_type"], how="inner")
+    merged = merged.drop_duplicates(subset="id", keep="first")
+
+    return pd.DataFrame({
+        "card_id": merged["id"].to_numpy(),
+        "history_date": str(history_date),
+        "market_price": merged["market_price"].round(2).to_numpy(),
+    })
+
+
+def load_history_date(columns: dict, df_cards: pd.DataFrame, history_date, command, errors=()) -> int:
+    """
+    Load the priced rows for one date with one merge. Unless some of the
+    date's files failed to parse (errors), the date is recorded as done in
+    etl_run in the same transaction; otherwise the next run retries it.
+    Priced rows replace any row already stored for the date, such as a price
+    fill_history_gaps carried forward while a file was unreadable.
+    Returns the number of rows inserted or corrected.
+    """
+    with transaction.atomic():
+        rows = history_rows(columns, df_cards, history_date)
+        ensure_partitions(history_date)
+        priced = upsert_dataframe(
+            rows, HISTORY_TABLE, conflict_columns=HISTORY_KEY, update_columns=["market_price"],
+            update_where=f"{HISTORY_TABLE}.market_price <> EXCLUDED.market_price",
+        )
+        if not errors:
+            EtlRun.objects.create(
+                command=command,
+                run_date=history_date,
+                rows_new=priced,
+                history_rows=priced,
+            )
+    return priced
+
+
+def fill_history_gaps(start_date, end_date) -> int:
+    """
+    For every date in [start_date, end_date] that has history, give each card
+    without a row that day its last known price from an earlier date.
+    Runs as one INSERT ... SELECT; cards with no earlier price are left alone.
+    Returns the number of rows inserted.
+    """
+    qn = connection.ops.quote_name
+    history = qn(HISTORY_TABLE)
+
+    # Each card's row just before the range seeds the carry-forward. Within a
+    # card, COUNT(price) only grows on priced rows, so every gap shares a group
+    # with the last priced row before it and FIRST_VALUE picks that price.
+    sql = f"""
+        INSERT INTO {history} (card_id, history_date, market_price)
+        WITH dates AS (
+            SELECT DISTINCT history_date FROM {history}
+            WHERE history_date BETWEEN %s AND %s
+        ),
+        seed AS (
+            SELECT h.card_id, h.history_date, h.market_price
+            FROM {history} h
+            JOIN (
+                SELECT card_id, MAX(history_date) AS history_date FROM {history}
+                WHERE history_date < %s GROUP BY card_id
+            ) last_seen ON last_seen.card_id = h.card_id AND last_seen.history_date = h.history_date
+        ),
+        grid AS (
+            SELECT c.id AS card_id, d.history_date, h.market_price
+            FROM {qn(CARD_TABLE)} c
+            CROSS JOIN dates d
+            LEFT JOIN {history} h ON h.card_id = c.id AND h.history_date = d.history_date
+            UNION ALL
+            SELECT card_id, history_date, market_price FROM seed
+        ),
+        grouped AS (
+            SELECT card_id, history_date, market_price,
+                   COUNT(market_price) OVER (PARTITION BY card_id ORDER BY history_date) AS grp
+            FROM grid
+        ),
+        carried AS (
+            SELECT card_id, history_date, market_price,
+                   FIRST_VALUE(market_price) OVER (
+                       PARTITION BY card_id, grp ORDER BY history_date
+                   ) AS carried_price
+            FROM grouped
+        )
+        SELECT card_id, history_date, carried_price FROM carried
+        WHERE market_price IS NULL AND carried_price IS NOT NULL
+        ON CONFLICT (card_id, history_date) DO NOTHING
+    """
+    start, end = str(start_date), str(end_date)
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(sql, [start, end, start])
+        return cursor.rowcount
@@ -0,0 +1,180 @@
+import hashlib
+import io
+import json
+from pathlib import Path
+
+try:
+    from PIL import Image, features
+except ImportError:  # only needed for make_thumbnails
+    Image = features = None
+
+from bounty_api.etl.download import write_atomic
+
+# Derivative directory -> (max width, quality). small_60 is what the card grid
+# loads. Sources are never enlarged: a size wider than its source would just
+# re-encode the original at the same pixels, so it is skipped and the original
+# serves instead. Only the smallest requested size is always written.
+SIZES = {
+    "small_60": (200, 60),
+    "medium_75": (400, 75),
+    "large_80": (800, 80),
+}
+# Format -> (extension, Pillow save options)
+FORMATS = {
+    "jpeg": (".jpg", {"optimize": True, "progressive": True}),
+    "webp": (".webp", {"method": 6}),
+    "avif": (".avif", {"speed": 6}),
+}
+SOURCE_SUFFIXES = {".jpg", ".jpeg", ".png", ".webp"}
+
+
+def image_support():
+    return Image is not None
+
+
+def available_formats(formats):
+    """The requested formats this Pillow build can encode, in order."""
+    return [fmt for fmt in formats if fmt == "jpeg" or features.check(fmt)]
+
+
+def list_sources(cards_dir: Path):
+    # Only the mirrored originals, not the derivative directories or manifests
+    return sorted(
+        path for path in cards_dir.iterdir()
+        if path.is_file() and path.suffix.lower() in SOURCE_SUFFIXES
+    )
+
+
+def content_hash(path: Path) -> str:
+    return hashlib.sha1(path.read_bytes()).hexdigest()
+
+
+def derivative_name(size, fmt, source: Path) -> str:
+    # JPEGs keep the source filename, which is the URL the frontend already uses
+    extension = FORMATS[fmt][0]
+    name = source.name if fmt == "jpeg" and source.suffix.lower() in (".jpg", ".jpeg") else source.stem + extension
+    return f"{size}/{name}"
+
+
+def expected_derivatives(source: Path, sizes, formats):
+    return [derivative_name(size, fmt, source) for size in sizes for fmt in formats]
+
+
+def skipped_sizes(width, sizes) -> list:
+    """The sizes wider than a source `width` pixels wide, except the smallest one."""
+    smallest = min(sizes, key=lambda size: SIZES[size][0])
+    return [size for size in sizes if size != smallest and SIZES[size][0] > width]
+
+
+def render_derivatives(job) -> dict:
+    """
+    Decode one source image once and write every size x format derivative of it.
+    Runs in a worker process; returns the source's manifest entry.
+    job is (source path, cards dir, sha1, sizes, formats).
+    """
+    source, cards_dir, sha1, sizes, formats = job
+    source, cards_dir = Path(source), Path(cards_dir)
+    with Image.open(source) as im:
+        im.load()
+        original = im.convert("RGB")
+    skipped = skipped_sizes(original.width, sizes)
+    entry = {
+        "sha1": sha1,
+        "width": original.width,
+        "height": original.height,
+        "bytes": source.stat().st_size,
+        "derivatives": {},
+        "skipped": skipped,
+    }
+
+    for size in sizes:
+        if size in skipped:
+            # Left over from before sizes were skipped, or from a smaller replacement source
+            for fmt in formats:
+                (cards_dir / derivative_name(size, fmt, source)).unlink(missing_ok=True)
+            continue
+        max_width, quality = SIZES[size]
+        if max_width and original.width > max_width:
+            height = round(original.height * max_width / original.width)
+            resized = original.resize((max_width, height), Image.LANCZOS)
+        else:
+            resized = original
+
+        for fmt in formats:
+            buffer = io.BytesIO()
+            resized.save(buffer, format=fmt.upper(), quality=quality, **FORMATS[fmt][1])
+            name = derivative_name(size, fmt, source)
+            path = cards_dir / name
+            path.parent.mkdir(parents=True, exist_ok=True)
+            write_atomic(path, buffer.getvalue())
+            entry["derivatives"][name] = {
+                "width": resized.width,
+                "height": resized.height,
+                "bytes": buffer.tell(),
+            }
+    return entry
+
+
+class DerivativeManifest:
+    """
+    {source filename: sha1, dimensions, bytes, derivatives and skipped sizes}
+    for the mirrored images. A source is only re-rendered when its hash changes
+    or one of its derivatives is missing; one that failed to decode is retried
+    once it changes.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.entries = json.loads(path.read_text()) if path.exists() else {}
+
+    def is_current(self, source: Path, sha1, sizes, formats) -> bool:
+        entry = self.entries.get(source.name)
+        if entry is None or entry["sha1"] != sha1:
+            return False
+        if "error" in entry:
+            return True
+        if "skipped" not in entry:
+            # Rendered before oversized derivatives were skipped
+            return False
+        skipped = set(entry["skipped"])
+        return all(
+            name in entry["derivatives"] and (source.parent / name).exists()
+            for name in expected_derivatives(source, sizes, formats)
+            if name.split("/")[0] not in skipped
+        )
+
+    def record(self, source: Path, entry):
+        # Keep derivatives of sizes or formats not rendered this run, if the source is unchanged
+        previous = self.entries.get(source.name)
+        if previous and previous["sha1"] == entry["sha1"] and "error" not in previous:
+            skipped = set(entry["skipped"])
+            kept = {
+                name: derivative for name, derivative in previous["derivatives"].items()
+                if name.split("/")[0] not in skipped
+            }
+            entry["derivatives"] = {**kept, **entry["derivatives"]}
+        self.entries[source.name] = entry
+
+    def record_failure(self, source: Path, sha1, error):
+        self.entries[source.name] = {"sha1": sha1, "error": str(error)}
+
+    def prune(self, sources):
+        names = {source.name for source in sources}
+        for name in set(self.entries) - names:
+            del self.entries[name]
+
+    def totals(self) -> dict:
+        """{format: bytes} over every derivative, plus the originals."""
+        totals = {"original": 0}
+        for entry in self.entries.values():
+            if "error" in entry:
+                continue
+            totals["original"] += entry["bytes"]
+            for name, derivative in entry["derivatives"].items():
+                fmt = Path(name).suffix.lstrip(".")
+                totals[fmt] = totals.get(fmt, 0) + derivative["bytes"]
+        return totals
+
+    def save(self):
+        content = json.dumps(self.entries, indent=1, sort_keys=True).encode()
+        write_atomic(self.path, content)
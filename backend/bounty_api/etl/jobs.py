@@ -0,0 +1,203 @@
+import logging
+import os
+import socket
+import threading
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+from pathlib import Path
+
+from django.db import connection, transaction
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+from bounty_api.models import EtlJob
+from bounty_api.etl.cards import CardChanges, upsert_cards
+from bounty_api.etl.parse import read_set_csv
+
+MAX_ATTEMPTS = 3
+# Workers touch their running job this often; one silent for STALE_AFTER has
+# lost its worker, however long the job itself takes
+HEARTBEAT_EVERY = timedelta(seconds=30)
+STALE_AFTER = timedelta(minutes=2)
+# A failed job waits this long before its second attempt, doubling after that
+RETRY_BACKOFF = timedelta(seconds=30)
+
+
+class JobLost(Exception):
+    """The job was requeued as stale and claimed again while this worker ran it."""
+
+
+def worker_name():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def new_batch(run_date) -> str:
+    return f"{run_date}T{timezone.now():%H%M%S}"
+
+
+def enqueue_sets(batch, run_date, base_url, set_ids) -> int:
+    """Queue one job per set; re-enqueueing a set already in the batch is a no-op."""
+    jobs = [
+        EtlJob(
+            batch=batch, run_date=run_date, set_id=set_id,
+            url=f"{base_url}/{set_id}/ProductsAndPrices.csv",
+        )
+        for set_id in set_ids
+    ]
+    EtlJob.objects.bulk_create(jobs, ignore_conflicts=True)
+    return len(jobs)
+
+
+def requeue_stale(stale_after=STALE_AFTER) -> int:
+    """
+    Hand running jobs whose worker stopped heartbeating back to the queue, or
+    fail them after MAX_ATTEMPTS. Jobs that are slow but alive are left alone.
+    """
+    cutoff = timezone.now() - stale_after
+    stale = EtlJob.objects.filter(status=EtlJob.RUNNING, heartbeat_at__lt=cutoff)
+    failed = stale.filter(attempts__gte=MAX_ATTEMPTS).update(
+        status=EtlJob.FAILED, error="Worker lost", finished_at=timezone.now()
+    )
+    return failed + stale.update(status=EtlJob.PENDING, error="Worker lost", available_at=None)
+
+
+def retry_delay(attempts) -> timedelta:
+    return RETRY_BACKOFF * 2 ** max(attempts - 1, 0)
+
+
+def claim_job(worker, batch=None):
+    """
+    Take the oldest pending job that is not waiting out a retry delay. SKIP
+    LOCKED lets any number of workers poll the same table without waiting on,
+    or double-claiming, each other's rows.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        pending = EtlJob.objects.select_for_update(skip_locked=True).filter(
+            Q(available_at__isnull=True) | Q(available_at__lte=now),
+            status=EtlJob.PENDING,
+        )
+        if batch:
+            pending = pending.filter(batch=batch)
+        job = pending.order_by("id").first()
+        if job is None:
+            return None
+        job.status = EtlJob.RUNNING
+        job.worker = worker
+        job.attempts += 1
+        job.claimed_at = job.heartbeat_at = now
+        job.save(update_fields=["status", "worker", "attempts", "claimed_at", "heartbeat_at"])
+    return job
+
+
+def has_pending(batch=None) -> bool:
+    """Whether any job is still queued, including ones waiting out a retry delay."""
+    pending = EtlJob.objects.filter(status=EtlJob.PENDING)
+    if batch:
+        pending = pending.filter(batch=batch)
+    return pending.exists()
+
+
+def _owned(job):
+    # The job row as this worker claimed it; no match once it was requeued
+    return EtlJob.objects.filter(id=job.id, status=EtlJob.RUNNING, attempts=job.attempts)
+
+
+@contextmanager
+def heartbeat(job, every=HEARTBEAT_EVERY):
+    """Keep the job's heartbeat_at fresh from a background thread while the block runs."""
+    stop = threading.Event()
+
+    def beat():
+        try:
+            while not stop.wait(every.total_seconds()):
+                _owned(job).update(heartbeat_at=timezone.now())
+        finally:
+            # Django gives each thread its own connection
+            connection.close()
+
+    thread = threading.Thread(target=beat, name=f"heartbeat-{job.id}", daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        thread.join()
+
+
+def fail_job(job, error):
+    """Queue the job for another attempt after its retry delay, or fail it for good after MAX_ATTEMPTS."""
+    now = timezone.now()
+    if job.attempts >= MAX_ATTEMPTS:
+        job.status, job.available_at = EtlJob.FAILED, None
+    else:
+        job.status, job.available_at = EtlJob.PENDING, now + retry_delay(job.attempts)
+    job.error = str(error)
+    job.finished_at = now
+    _owned(job).update(
+        status=job.status, available_at=job.available_at, error=job.error, finished_at=now,
+    )
+
+
+def run_job(job, downloader) -> CardChanges:
+    """
+    Download, parse and merge one set. The card upsert and the job's completion
+    commit together, so a job is never marked done without its rows, and
+    only while this worker still owns the job; otherwise JobLost is raised.
+    """
+    path = Path("prices") / str(job.run_date) / f"group_{job.set_id}.csv"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        with heartbeat(job):
+            downloader.download(job.url, path)
+            df = read_set_csv(path)
+            with transaction.atomic():
+                if not _owned(job).select_for_update().exists():
+                    raise JobLost(f"Job {job.id} (set {job.set_id}) was requeued while running")
+                changes = upsert_cards(df, job.run_date)
+                job.status = EtlJob.DONE
+                job.rows_new = changes.new
+                job.rows_changed = changes.changed
+                job.rows_unchanged = changes.unchanged
+                job.error = ""
+                job.finished_at = timezone.now()
+                job.save()
+        return changes
+    except JobLost as e:
+        logging.warning(str(e))
+        raise
+    except Exception as e:
+        logging.error(f"Job {job} failed: {e}")
+        fail_job(job, e)
+        raise
+
+
+def batch_status(batch) -> dict:
+    """{status: job count} for a batch, every status present."""
+    counts = dict.fromkeys([s for s, _ in EtlJob.STATUS_CHOICES], 0)
+    for row in EtlJob.objects.filter(batch=batch).values("status").annotate(n=Count("id")):
+        counts[row["status"]] = row["n"]
+    return counts
+
+
+def batch_changes(batch) -> CardChanges:
+    totals = EtlJob.objects.filter(batch=batch, status=EtlJob.DONE).aggregate(
+        new=Sum("rows_new"), changed=Sum("rows_changed"), unchanged=Sum("rows_unchanged"),
+    )
+    return CardChanges(**{k: v or 0 for k, v in totals.items()})
+
+
+def wait_for_batch(batch, poll=2.0, timeout=None, progress=None) -> dict:
+    """Block until no job in the batch is pending or running; returns the final counts."""
+    deadline = time.monotonic() + timeout if timeout else None
+    while True:
+        requeue_stale()
+        counts = batch_status(batch)
+        if progress:
+            progress(counts)
+        if not counts[EtlJob.PENDING] and not counts[EtlJob.RUNNING]:
+            return counts
+        if deadline and time.monotonic() > deadline:
+            raise TimeoutError(f"Batch {batch} still has unfinished jobs: {counts}")
+        time.sleep(poll)
@@ -0,0 +1,150 @@
+import io
+import pandas as pd
+
+from django.db import connections, transaction
+
+COPY_CHUNK_ROWS = 100_000
+INSERT_CHUNK_ROWS = 5_000
+NULL = "\\N"
+
+
+def _python_rows(df: pd.DataFrame):
+    # numpy scalars / NA -> plain Python values for the DB driver
+    return df.astype(object).where(df.notna(), None).itertuples(index=False, name=None)
+
+
+def _merge_clause(qn, conflict_columns, update_columns, update_where):
+    conflict = ", ".join(qn(c) for c in conflict_columns)
+    if not update_columns:
+        return f"ON CONFLICT ({conflict}) DO NOTHING"
+
+    assignments = ", ".join(f"{qn(c)} = EXCLUDED.{qn(c)}" for c in update_columns)
+    clause = f"ON CONFLICT ({conflict}) DO UPDATE SET {assignments}"
+    if update_where:
+        clause += f" WHERE {update_where}"
+    return clause
+
+
+def _copy_chunks(raw_cursor, sql, df):
+    """Stream df to COPY FROM STDIN as CSV, one chunk at a time."""
+    for start in range(0, len(df), COPY_CHUNK_ROWS):
+        buffer = io.StringIO()
+        df.iloc[start:start + COPY_CHUNK_ROWS].to_csv(buffer, index=False, header=False, na_rep=NULL)
+        buffer.seek(0)
+
+        if hasattr(raw_cursor, "copy_expert"):  # psycopg2
+            raw_cursor.copy_expert(sql, buffer)
+        else:  # psycopg 3
+            with raw_cursor.copy(sql) as copy:
+                copy.write(buffer.getvalue())
+
+
+def _stage_postgres(connection, cursor, df, table):
+    """COPY df into a temp table shaped like table's df columns; returns its quoted name."""
+    qn = connection.ops.quote_name
+    stage = qn(f"_stage_{table}")
+    cols = ", ".join(qn(c) for c in df.columns)
+    cursor.execute(f"DROP TABLE IF EXISTS {stage}")
+    cursor.execute(
+        f"CREATE TEMP TABLE {stage} ON COMMIT DROP AS "
+        f"SELECT {cols} FROM {qn(table)} WITH NO DATA"
+    )
+    _copy_chunks(
+        cursor.cursor,
+        f"COPY {stage} ({cols}) FROM STDIN WITH (FORMAT csv, NULL '{NULL}')",
+        df,
+    )
+    return stage
+
+
+def _upsert_postgres(connection, df, table, conflict_columns, update_columns, update_where):
+    qn = connection.ops.quote_name
+    cols = ", ".join(qn(c) for c in df.columns)
+
+    with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+        stage = _stage_postgres(connection, cursor, df, table)
+        cursor.execute(
+            f"INSERT INTO {qn(table)} ({cols}) SELECT {cols} FROM {stage} "
+            + _merge_clause(qn, conflict_columns, update_columns, update_where)
+        )
+        affected = cursor.rowcount
+        cursor.execute(f"DROP TABLE {stage}")
+    return affected
+
+
+def _upsert_fallback(connection, df, table, conflict_columns, update_columns, update_where):
+    # SQLite (tests/dev): same ON CONFLICT merge, fed by chunked executemany
+    qn = connection.ops.quote_name
+    cols = ", ".join(qn(c) for c in df.columns)
+    placeholders = ", ".join(["%s"] * len(df.columns))
+    sql = (
+        f"INSERT INTO {qn(table)} ({cols}) VALUES ({placeholders}) "
+        + _merge_clause(qn, conflict_columns, update_columns, update_where)
+    )
+
+    affected = 0
+    with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+        for start in range(0, len(df), INSERT_CHUNK_ROWS):
+            cursor.executemany(sql, list(_python_rows(df.iloc[start:start + INSERT_CHUNK_ROWS])))
+            affected += max(cursor.rowcount, 0)
+    return affected
+
+
+def upsert_dataframe(df: pd.DataFrame, table: str, conflict_columns, update_columns=None,
+                     update_where=None, using="default") -> int:
+    """
+    Merge df into table with one INSERT ... ON CONFLICT.
+    df columns must be table column names. On PostgreSQL the rows are COPY'd
+    into a temp staging table first; other backends insert in chunks.
+    update_columns=None means DO NOTHING on conflict. update_where can reference
+    the target table and EXCLUDED to skip no-op updates.
+    Returns the number of rows inserted or updated.
+    """
+    if df.empty:
+        return 0
+
+    # ON CONFLICT DO UPDATE cannot touch the same row twice in one statement
+    df = df.drop_duplicates(subset=list(conflict_columns), keep="last")
+
+    connection = connections[using]
+    if connection.vendor == "postgresql":
+        return _upsert_postgres(connection, df, table, conflict_columns, update_columns, update_where)
+    return _upsert_fallback(connection, df, table, conflict_columns, update_columns, update_where)
+
+
+def update_dataframe(df: pd.DataFrame, table: str, key_columns, using="default") -> int:
+    """
+    UPDATE the rows of table matching df's key_columns, setting every other df
+    column. Rows with no match are ignored. On PostgreSQL this is one
+    UPDATE ... FROM over a COPY'd staging table. Returns the rows updated.
+    """
+    if df.empty:
+        return 0
+
+    connection = connections[using]
+    qn = connection.ops.quote_name
+    key_columns = list(key_columns)
+    set_columns = [c for c in df.columns if c not in key_columns]
+    df = df.drop_duplicates(subset=key_columns, keep="last")
+
+    if connection.vendor == "postgresql":
+        with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+            stage = _stage_postgres(connection, cursor, df, table)
+            assignments = ", ".join(f"{qn(c)} = s.{qn(c)}" for c in set_columns)
+            match = " AND ".join(f"t.{qn(c)} = s.{qn(c)}" for c in key_columns)
+            cursor.execute(f"UPDATE {qn(table)} t SET {assignments} FROM {stage} s WHERE {match}")
+            affected = cursor.rowcount
+            cursor.execute(f"DROP TABLE {stage}")
+        return affected
+
+    assignments = ", ".join(f"{qn(c)} = %s" for c in set_columns)
+    match = " AND ".join(f"{qn(c)} = %s" for c in key_columns)
+    sql = f"UPDATE {qn(table)} SET {assignments} WHERE {match}"
+    ordered = df[set_columns + key_columns]
+
+    affected = 0
+    with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+        for start in range(0, len(ordered), INSERT_CHUNK_ROWS):
+            cursor.executemany(sql, list(_python_rows(ordered.iloc[start:start + INSERT_CHUNK_ROWS])))
+            affected += max(cursor.rowcount, 0)
+    return affected
@@ -0,0 +1,152 @@
+import json
+import os
+import resource
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import dataclass, asdict
+from datetime import datetime
+from pathlib import Path
+
+RUNS_DIR = Path("logs") / "etl_runs"
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process so far, in MB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KB, macOS reports bytes
+    return peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024
+
+
+def rss_mb() -> float:
+    """Current resident set size of this process in MB, or None where /proc isn't available."""
+    try:
+        with open("/proc/self/statm") as f:
+            resident_pages = int(f.read().split()[1])
+    except (OSError, IndexError, ValueError):
+        return None
+    return resident_pages * os.sysconf("SC_PAGE_SIZE") / 1024 / 1024
+
+
+@dataclass
+class StageStats:
+    name: str
+    wall_time: float = 0.0
+    cpu_time: float = 0.0
+    rows_in: int = 0
+    rows_out: int = 0
+    bytes: int = 0
+    # Peak Python allocations inside the stage (tracemalloc, only when tracing)
+    peak_traced_mb: float = None
+    # Process RSS when the stage last ended, and how much the stage added to it
+    # summed over its entries. The process-wide peak is on the run, not here.
+    rss_mb: float = None
+    rss_delta_mb: float = None
+
+    def summary(self):
+        line = (
+            f"{self.name:<10} {self.wall_time:>8.2f}s wall {self.cpu_time:>8.2f}s cpu "
+            f"{self.rows_in:>10,} in {self.rows_out:>10,} out "
+            f"{self.bytes / 1024 / 1024:>8.2f} MB read"
+        )
+        if self.rss_mb is not None:
+            line += f"  RSS {self.rss_mb:.1f} MB ({self.rss_delta_mb:+.1f})"
+        if self.peak_traced_mb is not None:
+            line += f", traced {self.peak_traced_mb:.1f} MB"
+        return line
+
+
+class RunMetrics:
+    """
+    Per-stage timings for one ETL run. A stage entered more than once (one per
+    batch, say) accumulates into the same entry.
+    """
+
+    def __init__(self, trace_memory=False):
+        self.trace_memory = trace_memory
+        self.stages = {}
+        self._start = time.perf_counter()
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def _stats(self, name) -> StageStats:
+        if name not in self.stages:
+            self.stages[name] = StageStats(name)
+        return self.stages[name]
+
+    def _record(self, stats, wall, cpu, rss_start):
+        stats.wall_time += wall
+        stats.cpu_time += cpu
+        rss_end = rss_mb()
+        if rss_start is not None and rss_end is not None:
+            stats.rss_mb = rss_end
+            stats.rss_delta_mb = (stats.rss_delta_mb or 0.0) + rss_end - rss_start
+        if self.trace_memory:
+            peak = tracemalloc.get_traced_memory()[1] / 1024 / 1024
+            stats.peak_traced_mb = max(stats.peak_traced_mb or 0.0, peak)
+
+    @contextmanager
+    def stage(self, name, rows_in=0, bytes=0):
+        """
+        Time the block as stage `name`. The yielded StageStats can be updated
+        inside the block, e.g. to set rows_out once it is known.
+        """
+        stats = self._stats(name)
+        stats.rows_in += rows_in
+        stats.bytes += bytes
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+        rss = rss_mb()
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield stats
+        finally:
+            self._record(stats, time.perf_counter() - wall, time.process_time() - cpu, rss)
+
+    def timed_iter(self, name, frames, bytes=0):
+        """
+        Pass frames through, charging the time spent producing each one to stage
+        `name`. For lazy pipelines where the producer can't be wrapped in stage().
+        """
+        stats = self._stats(name)
+        stats.bytes += bytes
+        frames = iter(frames)
+        while True:
+            if self.trace_memory:
+                tracemalloc.reset_peak()
+            rss = rss_mb()
+            wall, cpu = time.perf_counter(), time.process_time()
+            try:
+                df = next(frames)
+            except StopIteration:
+                return
+            finally:
+                self._record(stats, time.perf_counter() - wall, time.process_time() - cpu, rss)
+            stats.rows_out += len(df)
+            yield df
+
+    @property
+    def wall_time(self):
+        return time.perf_counter() - self._start
+
+    def as_list(self):
+        return [asdict(stats) for stats in self.stages.values()]
+
+    def summary(self):
+        return "\n".join(stats.summary() for stats in self.stages.values())
+
+    def write_json(self, path: Path, **run):
+        """Write run fields plus the stages to path."""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        payload = {**run, "wall_time": self.wall_time, "stages": self.as_list()}
+        path.write_text(json.dumps(payload, indent=1, default=str))
+
+
+def run_json_path(command, run_date) -> Path:
+    stamp = datetime.now().strftime("%Y%m%dT%H%M%S")
+    return RUNS_DIR / f"{command}_{run_date}_{stamp}.json"
+
+
+def files_size(files) -> int:
+    return sum(Path(f).stat().st_size for f in files)
@@ -0,0 +1,15 @@
+from concurrent.futures import ProcessPoolExecutor
+
+
+def iter_pool_results(fn, items, workers):
+    """
+    Run fn over items in a process pool and yield (item, future) in input order.
+    At most 2 * workers items are in flight, so results stay bounded in memory.
+    """
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = []
+        for item in items:
+            pending.append((item, pool.submit(fn, item)))
+            if len(pending) >= workers * 2:
+                yield pending.pop(0)
+        yield from pending
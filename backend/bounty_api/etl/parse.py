@@ -0,0 +1,214 @@
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+import numpy as np
+import pandas as pd
+
+try:
+    import ijson
+except ImportError:  # optional: without it each prices file is json.load'ed whole
+    ijson = None
+
+# Pure parsing/cleaning for group CSVs and TCGCSV price archives. Kept free
+# of Django imports so it can run in worker processes.
+
+CARD_SCHEMA = {
+    "product_id":   {"dtype": "int64",   "default": 0},
+    "foil_type":    {"dtype": "string",  "default": "Normal"},
+    "name":         {"dtype": "string",  "default": ""},
+    "image_url":    {"dtype": "string",  "default": None},
+    "tcgplayer_url":{"dtype": "string",  "default": None},
+    "market_price": {"dtype": "float64", "default": 0.0},
+    "rarity":       {"dtype": "string",  "default": None},
+    "card_id":      {"dtype": "string",  "default": None},
+    "description":  {"dtype": "string",  "default": None},
+    "color":        {"dtype": "string",  "default": None},
+    "card_type":    {"dtype": "string",  "default": None},
+    "life":         {"dtype": "int64",   "default": 0},
+    "power":        {"dtype": "int64",   "default": 0},
+    "subtype":      {"dtype": "string",  "default": None},
+    "attribute":    {"dtype": "string",  "default": None},
+    "cost":         {"dtype": "int64",   "default": 0},
+    "counter":      {"dtype": "int64",   "default": 0},
+}
+
+# TCGCSV column -> OnePieceCard field
+INPUT_COLUMNS = {
+    "productId": "product_id",
+    "name": "name",
+    "imageUrl": "image_url",
+    "url": "tcgplayer_url",
+    "marketPrice": "market_price",
+    "subTypeName": "foil_type",
+    "extRarity": "rarity",
+    "extNumber": "card_id",
+    "extDescription": "description",
+    "extColor": "color",
+    "extCardType": "card_type",
+    "extLife": "life",
+    "extPower": "power",
+    "extSubtypes": "subtype",
+    "extAttribute": "attribute",
+    "extCost": "cost",
+    "extCounterplus": "counter",
+}
+EXPECTED_INPUT = list(INPUT_COLUMNS.keys())
+
+PRICE_COLUMNS = {
+    "productId": "product_id",
+    "subTypeName": "foil_type",
+    "marketPrice": "market_price",
+}
+
+# Read-time dtypes: numeric ext fields stay text until clean_df coerces them,
+# since TCGCSV sometimes puts "-" or blanks there
+INPUT_DTYPES = {col: "string" for col in EXPECTED_INPUT}
+INPUT_DTYPES["productId"] = "Int64"
+INPUT_DTYPES["marketPrice"] = "float64"
+
+def clean_df(df: pd.DataFrame) -> pd.DataFrame:
+    # Ensure all expected columns exist
+    df = df.reindex(columns=CARD_SCHEMA.keys())
+
+    # Replace common string-nulls
+    df = df.replace(to_replace=["nan", "NaN", "NaT", "NULL", "None"], value=np.nan)
+
+    for col, spec in CARD_SCHEMA.items():
+        dtype = spec["dtype"]
+        default = spec["default"]
+
+        if dtype == "int64":
+            df[col] = pd.to_numeric(df[col], errors="coerce").dropna().astype("int64")
+            if default is not None:
+                df[col] = df[col].fillna(default)
+
+        elif dtype == "float64":
+            df[col] = pd.to_numeric(df[col], errors="coerce").astype("float64")
+            if default is not None:
+                df[col] = df[col].fillna(default)
+
+        else:  # string-like
+            df[col] = df[col].astype("string")
+            if default is not None:
+                df[col] = df[col].fillna(default)
+
+    return df
+
+
+def prepare_set_df(df: pd.DataFrame) -> pd.DataFrame:
+    """Rename a raw group CSV frame to model fields and clean it."""
+    for col in EXPECTED_INPUT:
+        if col not in df.columns:
+            df[col] = pd.Series(pd.NA, index=df.index, dtype="string")
+
+    df["extSubtypes"] = df["extSubtypes"].str.replace(";", "/", regex=False)
+    df["extColor"] = df["extColor"].str.replace(";", "/", regex=False)
+
+    return clean_df(df.rename(columns=INPUT_COLUMNS))
+
+
+def read_set_csv(file: Path) -> pd.DataFrame:
+    # Only the columns we load, with fixed dtypes (no inference, no extra columns)
+    df = pd.read_csv(file, usecols=lambda col: col in INPUT_DTYPES, dtype=INPUT_DTYPES)
+    return prepare_set_df(df)
+
+
+def read_price_csv(file: Path) -> pd.DataFrame:
+    """Just the key and market price of a group CSV, for the prices-only update."""
+    df = pd.read_csv(file, usecols=lambda col: col in PRICE_COLUMNS, dtype=INPUT_DTYPES)
+    df = df.reindex(columns=list(PRICE_COLUMNS)).rename(columns=PRICE_COLUMNS)
+    df = df[df["product_id"].notna()]
+    return pd.DataFrame({
+        "product_id": df["product_id"].astype("int64"),
+        "foil_type": df["foil_type"].astype("string").fillna(CARD_SCHEMA["foil_type"]["default"]),
+        "market_price": df["market_price"].astype("float64"),
+    })
+
+
+def list_set_csvs(csv_dir: Path):
+    # Only finished downloads; in-flight temp files are dot-prefixed
+    return sorted(csv_dir.glob("group_*.csv"))
+
+
+def parse_set_columns(file: Path) -> dict:
+    """
+    Process-pool entry point: parse and clean one group CSV and return its
+    columns as plain NumPy arrays, which pickle compactly back to the parent.
+    """
+    df = read_set_csv(file)
+    columns = {}
+    for col, spec in CARD_SCHEMA.items():
+        if spec["dtype"] == "string":
+            columns[col] = df[col].to_numpy(dtype=object, na_value=None)
+        else:
+            columns[col] = df[col].to_numpy(dtype="float64", na_value=np.nan)
+    return columns
+
+
+def conform_schema(df: pd.DataFrame) -> pd.DataFrame:
+    """Cast a frame read back from arrays or a cache file to clean_df dtypes."""
+    return df.astype({col: spec["dtype"] if spec["dtype"] == "string" else "float64"
+                      for col, spec in CARD_SCHEMA.items()})
+
+
+def frame_from_columns(columns: dict) -> pd.DataFrame:
+    """Rebuild a clean_df-shaped frame from parse_set_columns output."""
+    return conform_schema(pd.DataFrame(columns))
+
+
+def parse_price_stream(f) -> dict:
+    """
+    Read one TCGCSV `prices` JSON document into columnar arrays
+    (product_id, foil_type, market_price) without building per-row dicts.
+    """
+    product_id, foil_type, market_price = [], [], []
+
+    if ijson is not None:
+        # use_float: plain floats instead of Decimal for prices
+        results = ijson.items(f, "results.item", use_float=True)
+    else:
+        results = json.load(f).get("results", [])
+
+    for item in results:
+        product_id.append(item.get("productId"))
+        foil_type.append(item.get("subTypeName"))
+        market_price.append(item.get("marketPrice"))
+
+    return {
+        "product_id": pd.to_numeric(pd.Series(product_id, dtype=object), errors="coerce").to_numpy("float64"),
+        "foil_type": np.array(foil_type, dtype=object),
+        "market_price": pd.to_numeric(pd.Series(market_price, dtype=object), errors="coerce").to_numpy("float64"),
+    }
+
+
+def concat_columns(parts) -> dict:
+    parts = list(parts)
+    if not parts:
+        return {"product_id": np.empty(0), "foil_type": np.empty(0, dtype=object), "market_price": np.empty(0)}
+    return {key: np.concatenate([p[key] for p in parts]) for key in parts[0]}
+
+
+def parse_date_dir(folder: Path):
+    """
+    Process-pool entry point: parse every <group>/prices file of one dated
+    folder. Returns (folder name, columns, files read, errors).
+    """
+    parts, errors = [], []
+    for group in sorted(os.listdir(folder)):
+        fpath = Path(folder) / group / "prices"
+        if not fpath.is_file():
+            continue
+        try:
+            with open(fpath, "rb") as f:
+                parts.append(parse_price_stream(f))
+        except Exception as e:
+            errors.append(f"Failed to load {fpath}: {e}")
+    return Path(folder).name, concat_columns(parts), len(parts), errors
+
+
+def parse_history_date(name: str):
+    try:
+        return datetime.strptime(name, "%Y-%m-%d").date()
+    except ValueError:
+        return None
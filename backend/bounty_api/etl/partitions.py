@@ -0,0 +1,138 @@
+import gzip
+import re
+from dataclasses import dataclass
+from datetime import date, datetime
+from pathlib import Path
+
+from django.db import connection
+
+from bounty_api.models import OnePieceCardHistory
+
+HISTORY_TABLE = OnePieceCardHistory._meta.db_table
+BOUND_PATTERN = re.compile(r"FROM \('(\d{4}-\d{2}-\d{2})'\) TO \('(\d{4}-\d{2}-\d{2})'\)")
+
+
+@dataclass
+class Partition:
+    name: str
+    start: date
+    end: date  # exclusive
+    rows: int  # planner estimate, -1 until first ANALYZE
+    bytes: int
+
+
+def as_date(value) -> date:
+    # ETL dates arrive as date objects or "YYYY-MM-DD" strings
+    return value if isinstance(value, date) else date.fromisoformat(str(value)[:10])
+
+
+def month_start(value) -> date:
+    return as_date(value).replace(day=1)
+
+
+def next_month(month: date) -> date:
+    return date(month.year + month.month // 12, month.month % 12 + 1, 1)
+
+
+def months(start_date, end_date):
+    """First day of every month touching [start_date, end_date]."""
+    month, last = month_start(start_date), month_start(end_date)
+    while month <= last:
+        yield month
+        month = next_month(month)
+
+
+def partition_name(month: date, table=HISTORY_TABLE) -> str:
+    return f"{table}_{month:%Y_%m}"
+
+
+def is_partitioned(table=HISTORY_TABLE) -> bool:
+    if connection.vendor != "postgresql":
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid "
+            "WHERE c.relname = %s AND pg_table_is_visible(c.oid)",
+            [table],
+        )
+        return cursor.fetchone() is not None
+
+
+def list_partitions(table=HISTORY_TABLE) -> list:
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT c.relname, pg_get_expr(c.relpartbound, c.oid), c.reltuples::bigint, "
+            "pg_total_relation_size(c.oid) "
+            "FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "JOIN pg_class p ON p.oid = i.inhparent "
+            "WHERE p.relname = %s AND pg_table_is_visible(p.oid) ORDER BY c.relname",
+            [table],
+        )
+        partitions = []
+        for name, bound, rows, size in cursor.fetchall():
+            match = BOUND_PATTERN.search(bound)
+            if match:
+                partitions.append(Partition(
+                    name, date.fromisoformat(match.group(1)), date.fromisoformat(match.group(2)), rows, size,
+                ))
+        return partitions
+
+
+def ensure_partitions(start_date, end_date=None, table=HISTORY_TABLE) -> list:
+    """
+    Create the monthly partitions covering [start_date, end_date] that don't
+    exist yet. A no-op unless the table is partitioned, i.e. on PostgreSQL.
+    A plain table already holding a partition's name is an error, never
+    mistaken for the partition. Returns the names of the partitions created.
+    """
+    if not is_partitioned(table):
+        return []
+    existing = {partition.start for partition in list_partitions(table)}
+    qn = connection.ops.quote_name
+    created = []
+    with connection.cursor() as cursor:
+        for month in months(start_date, end_date or start_date):
+            if month in existing:
+                continue
+            name = partition_name(month, table)
+            cursor.execute(
+                f"CREATE TABLE {qn(name)} PARTITION OF {qn(table)} "
+                f"FOR VALUES FROM (%s) TO (%s)",
+                [str(month), str(next_month(month))],
+            )
+            created.append(name)
+    return created
+
+
+def detach_partition(name, table=HISTORY_TABLE) -> str:
+    """
+    Detach a partition; it stays in the database as a plain table until
+    dropped, renamed so ensure_partitions can create the month afresh.
+    Returns its new name.
+    """
+    qn = connection.ops.quote_name
+    detached = f"{name}_detached_{datetime.now():%Y%m%d%H%M%S}"
+    with connection.cursor() as cursor:
+        cursor.execute(f"ALTER TABLE {qn(table)} DETACH PARTITION {qn(name)}")
+        cursor.execute(f"ALTER TABLE {qn(name)} RENAME TO {qn(detached)}")
+    return detached
+
+
+def archive_table(name, path: Path) -> int:
+    """COPY a table out to gzipped CSV at path; returns the bytes written."""
+    sql = f"COPY {connection.ops.quote_name(name)} TO STDOUT WITH (FORMAT csv, HEADER)"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with connection.cursor() as cursor, gzip.open(path, "wb") as out:
+        raw_cursor = cursor.cursor
+        if hasattr(raw_cursor, "copy_expert"):  # psycopg2
+            raw_cursor.copy_expert(sql, out)
+        else:  # psycopg 3
+            with raw_cursor.copy(sql) as copy:
+                for block in copy:
+                    out.write(block)
+    return path.stat().st_size
+
+
+def drop_table(name):
+    with connection.cursor() as cursor:
+        cursor.execute(f"DROP TABLE {connection.ops.quote_name(name)}")
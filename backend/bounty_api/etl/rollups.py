@@ -0,0 +1,122 @@
+from datetime import timedelta
+
+import pandas as pd
+
+from django.conf import settings
+from django.db import connection, transaction
+
+from bounty_api.models import (
+    OnePieceCardHistory, OnePieceCardPriceRun,
+    OnePieceCardWeeklyPrice, OnePieceCardMonthlyPrice,
+)
+from bounty_api.etl.loader import upsert_dataframe
+from bounty_api.etl.partitions import as_date
+from bounty_api.etl.runs import RUN_TABLE, HISTORY_TABLE, CARD_TABLE, DEFAULT_CHUNK_CARDS, expand_runs
+
+# granularity -> (model, pandas period); weeks run Monday to Sunday
+ROLLUPS = {
+    "week": (OnePieceCardWeeklyPrice, "W-SUN"),
+    "month": (OnePieceCardMonthlyPrice, "M"),
+}
+ROLLUP_KEY = ["card_id", "period_start"]
+ROLLUP_FIELDS = ["open", "high", "low", "close", "avg", "days"]
+
+
+def period_floor(day, granularity):
+    """Start of the week (Monday) or month containing day."""
+    day = as_date(day)
+    if granularity == "week":
+        return day - timedelta(days=day.weekday())
+    return day.replace(day=1)
+
+
+def period_bounds(start_date, end_date, granularity):
+    """[start_date, end_date] widened to whole weeks or months, so every period touched is rebuilt whole."""
+    end = as_date(end_date)
+    if granularity == "week":
+        period_end = end + timedelta(days=6 - end.weekday())
+    else:
+        period_end = (end.replace(day=28) + timedelta(days=4)).replace(day=1) - timedelta(days=1)
+    return period_floor(start_date, granularity), period_end
+
+
+def daily_frame(start_date, end_date, low, high) -> pd.DataFrame:
+    """(card_id, history_date, market_price) for cards low..high over the range, from either history store."""
+    qn = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        if settings.HISTORY_STORE == "runs":
+            cursor.execute(
+                f"SELECT card_id, valid_from, valid_to, market_price FROM {qn(RUN_TABLE)} "
+                f"WHERE card_id BETWEEN %s AND %s AND valid_to >= %s AND valid_from <= %s",
+                [low, high, str(start_date), str(end_date)],
+            )
+            runs = pd.DataFrame.from_records(
+                cursor.fetchall(), columns=["card_id", "valid_from", "valid_to", "market_price"]
+            )
+            df = expand_runs(runs.astype({"market_price": "float64"}))
+            return df[df["history_date"].between(pd.Timestamp(start_date), pd.Timestamp(end_date))]
+
+        cursor.execute(
+            f"SELECT card_id, history_date, market_price FROM {qn(HISTORY_TABLE)} "
+            f"WHERE card_id BETWEEN %s AND %s AND history_date BETWEEN %s AND %s",
+            [low, high, str(start_date), str(end_date)],
+        )
+        df = pd.DataFrame.from_records(cursor.fetchall(), columns=["card_id", "history_date", "market_price"])
+        return df.astype({"market_price": "float64", "history_date": "datetime64[ns]"})
+
+
+def rollup_frame(daily: pd.DataFrame, period) -> pd.DataFrame:
+    """OHLC, average and day count per card per period, from daily rows."""
+    daily = daily.sort_values(["card_id", "history_date"])
+    period_start = daily["history_date"].dt.to_period(period).dt.start_time
+    grouped = daily.groupby([daily["card_id"], period_start.rename("period_start")], sort=False)["market_price"]
+    rollup = grouped.agg(open="first", high="max", low="min", close="last", avg="mean", days="size").reset_index()
+    rollup["avg"] = rollup["avg"].round(2)
+    rollup["period_start"] = rollup["period_start"].dt.strftime("%Y-%m-%d")
+    return rollup
+
+
+def refresh_rollups(start_date, end_date, table=CARD_TABLE, chunk_cards=DEFAULT_CHUNK_CARDS) -> dict:
+    """
+    Recompute the weekly and monthly rollups of every period touching
+    [start_date, end_date] for the cards in table, a chunk of cards at a time.
+    Nightly that is just the current week and month. Returns {granularity: rows written}.
+    """
+    bounds = {granularity: period_bounds(start_date, end_date, granularity) for granularity in ROLLUPS}
+    start = min(first for first, last in bounds.values())
+    end = max(last for first, last in bounds.values())
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT id FROM {connection.ops.quote_name(table)} ORDER BY id")
+        card_ids = [row[0] for row in cursor.fetchall()]
+    written = dict.fromkeys(ROLLUPS, 0)
+    for i in range(0, len(card_ids), chunk_cards):
+        low, high = card_ids[i], card_ids[min(i + chunk_cards, len(card_ids)) - 1]
+        daily = daily_frame(start, end, low, high)
+        if daily.empty:
+            continue
+        with transaction.atomic():
+            for granularity, (model, period) in ROLLUPS.items():
+                # Only this granularity's own periods: the other's wider window would
+                # otherwise rebuild a week or month from just the days it overlaps
+                first, last = bounds[granularity]
+                own = daily[daily["history_date"].between(pd.Timestamp(first), pd.Timestamp(last))]
+                if own.empty:
+                    continue
+                rollup = rollup_frame(own, period)
+                written[granularity] += upsert_dataframe(
+                    rollup, model._meta.db_table,
+                    conflict_columns=ROLLUP_KEY, update_columns=ROLLUP_FIELDS,
+                )
+    return written
+
+
+def history_bounds():
+    """(first, last) date with history in the configured store, or (None, None)."""
+    if settings.HISTORY_STORE == "runs":
+        runs = OnePieceCardPriceRun.objects.all()
+        return (
+            runs.order_by("valid_from").values_list("valid_from", flat=True).first(),
+            runs.order_by("-valid_to").values_list("valid_to", flat=True).first(),
+        )
+    history = OnePieceCardHistory.objects.order_by("history_date").values_list("history_date", flat=True)
+    return history.first(), history.reverse().first()
@@ -0,0 +1,143 @@
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+
+from django.db import connection, transaction
+
+from bounty_api.models import OnePieceCard, OnePieceCardHistory, OnePieceCardPriceRun
+from bounty_api.etl.loader import upsert_dataframe
+from bounty_api.etl.partitions import as_date, is_partitioned, list_partitions
+
+RUN_TABLE = OnePieceCardPriceRun._meta.db_table
+HISTORY_TABLE = OnePieceCardHistory._meta.db_table
+CARD_TABLE = OnePieceCard._meta.db_table
+RUN_KEY = ["card_id", "valid_from"]
+DEFAULT_CHUNK_CARDS = 500
+DAY = np.timedelta64(1, "D")
+
+
+def encode_runs(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Daily (card_id, history_date, market_price) rows -> (card_id, valid_from,
+    valid_to, market_price) runs. A run ends where the card, the price or an
+    unbroken sequence of days ends, so expand_runs gives back exactly the input.
+    """
+    df = df.sort_values(["card_id", "history_date"])
+    card = df["card_id"].to_numpy("int64")
+    day = pd.to_datetime(df["history_date"]).to_numpy("datetime64[D]")
+    # Compare whole cents, not floats
+    cents = np.rint(df["market_price"].to_numpy("float64") * 100).astype("int64")
+
+    starts = np.ones(len(df), dtype=bool)
+    starts[1:] = (card[1:] != card[:-1]) | (cents[1:] != cents[:-1]) | (day[1:] - day[:-1] != DAY)
+    # A run ends where the next one starts, and at the last row
+    ends = np.ones(len(df), dtype=bool)
+    ends[:-1] = starts[1:]
+    first, last = np.flatnonzero(starts), np.flatnonzero(ends)
+
+    return pd.DataFrame({
+        "card_id": card[first],
+        "valid_from": np.datetime_as_string(day[first]),
+        "valid_to": np.datetime_as_string(day[last]),
+        "market_price": cents[first] / 100,
+    })
+
+
+def expand_runs(runs: pd.DataFrame) -> pd.DataFrame:
+    """Runs -> one (card_id, history_date, market_price) row per day they cover."""
+    valid_from = pd.to_datetime(runs["valid_from"]).to_numpy("datetime64[D]")
+    valid_to = pd.to_datetime(runs["valid_to"]).to_numpy("datetime64[D]")
+    lengths = ((valid_to - valid_from) // DAY + 1).astype("int64")
+
+    # Day offset of each output row within its run
+    offsets = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    return pd.DataFrame({
+        "card_id": np.repeat(runs["card_id"].to_numpy(), lengths),
+        "history_date": np.repeat(valid_from, lengths) + offsets.astype("timedelta64[D]"),
+        "market_price": np.repeat(runs["market_price"].to_numpy(), lengths),
+    })
+
+
+def _history_frame(cursor, low, high) -> pd.DataFrame:
+    cursor.execute(
+        f"SELECT card_id, history_date, market_price FROM {connection.ops.quote_name(HISTORY_TABLE)} "
+        f"WHERE card_id BETWEEN %s AND %s",
+        [low, high],
+    )
+    df = pd.DataFrame.from_records(cursor.fetchall(), columns=["card_id", "history_date", "market_price"])
+    return df.astype({"market_price": "float64"})
+
+
+def convert_history(chunk_cards=DEFAULT_CHUNK_CARDS, progress=None):
+    """
+    Rebuild the run table from daily history, a chunk of cards at a time, each
+    chunk replacing that card range's runs in one transaction.
+    Returns (daily rows read, runs written).
+    """
+    card_ids = sorted(OnePieceCardHistory.objects.values_list("card_id", flat=True).distinct())
+    qn = connection.ops.quote_name
+    daily = written = 0
+    for i in range(0, len(card_ids), chunk_cards):
+        low, high = card_ids[i], card_ids[min(i + chunk_cards, len(card_ids)) - 1]
+        with transaction.atomic(), connection.cursor() as cursor:
+            df = _history_frame(cursor, low, high)
+            runs = encode_runs(df)
+            cursor.execute(f"DELETE FROM {qn(RUN_TABLE)} WHERE card_id BETWEEN %s AND %s", [low, high])
+            upsert_dataframe(runs, RUN_TABLE, conflict_columns=RUN_KEY)
+        daily += len(df)
+        written += len(runs)
+        if progress:
+            progress(min(i + chunk_cards, len(card_ids)), len(card_ids), daily, written)
+    return daily, written
+
+
+def extend_runs(curr_date, table=CARD_TABLE) -> int:
+    """
+    Record every card's current price for curr_date: runs that ended yesterday
+    at the same price are extended, everyone else without a run covering
+    curr_date starts a new one. Returns the number of runs started.
+    """
+    qn = connection.ops.quote_name
+    runs, cards = qn(RUN_TABLE), qn(table)
+    curr = as_date(curr_date)
+    today, yesterday = str(curr), str(curr - timedelta(days=1))
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            f"UPDATE {runs} SET valid_to = %s WHERE valid_to = %s AND EXISTS ("
+            f"SELECT 1 FROM {cards} c WHERE c.id = {runs}.card_id "
+            f"AND COALESCE(c.market_price, 0) = {runs}.market_price)",
+            [today, yesterday],
+        )
+        cursor.execute(
+            f"INSERT INTO {runs} (card_id, valid_from, valid_to, market_price) "
+            f"SELECT c.id, %s, %s, COALESCE(c.market_price, 0) FROM {cards} c "
+            f"WHERE NOT EXISTS (SELECT 1 FROM {runs} r WHERE r.card_id = c.id "
+            f"AND r.valid_from <= %s AND r.valid_to >= %s) "
+            f"ON CONFLICT (card_id, valid_from) DO NOTHING",
+            [today, today, today, today],
+        )
+        return cursor.rowcount
+
+
+def table_bytes(table):
+    """On-disk size of a table with its indexes, or None where it can't be measured."""
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            if is_partitioned(table):
+                return sum(partition.bytes for partition in list_partitions(table))
+            cursor.execute("SELECT pg_total_relation_size(%s::regclass)", [table])
+            return cursor.fetchone()[0]
+        if connection.vendor == "sqlite":
+            try:
+                # dbstat is an optional SQLite build feature
+                cursor.execute(
+                    "SELECT SUM(pgsize) FROM dbstat WHERE name = %s OR name IN "
+                    "(SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = %s)",
+                    [table, table],
+                )
+                return cursor.fetchone()[0]
+            except Exception:
+                return None
+    return None
@@ -0,0 +1,97 @@
+import numpy as np
+import pandas as pd
+
+from django.conf import settings
+
+from bounty_api.models import OnePieceCardHistory, OnePieceCardPriceRun
+from bounty_api.etl.downsample import lttb
+from bounty_api.etl.rollups import ROLLUPS, period_floor
+from bounty_api.etl.runs import expand_runs
+
+GRANULARITIES = ["day", *ROLLUPS]
+EMPTY_SERIES = (np.array([], dtype="datetime64[D]"), np.array([], dtype="float64"))
+
+
+def _points(card_ids, granularity, start, end) -> pd.DataFrame:
+    # (card_id, date, price) rows for the cards, from wherever the granularity is stored
+    columns = ["card_id", "date", "price"]
+    if granularity in ROLLUPS:
+        rows = ROLLUPS[granularity][0].objects.filter(card_id__in=card_ids)
+        if start:
+            rows = rows.filter(period_start__gte=period_floor(start, granularity))
+        if end:
+            rows = rows.filter(period_start__lte=end)
+        return pd.DataFrame.from_records(rows.values_list("card_id", "period_start", "close"), columns=columns)
+
+    if settings.HISTORY_STORE == "runs":
+        runs = OnePieceCardPriceRun.objects.filter(card_id__in=card_ids)
+        if start:
+            runs = runs.filter(valid_to__gte=start)
+        if end:
+            runs = runs.filter(valid_from__lte=end)
+        df = expand_runs(pd.DataFrame.from_records(
+            runs.values_list("card_id", "valid_from", "valid_to", "market_price"),
+            columns=["card_id", "valid_from", "valid_to", "market_price"],
+        ))
+        df.columns = columns
+        if start:
+            df = df[df["date"] >= pd.Timestamp(start)]
+        if end:
+            df = df[df["date"] <= pd.Timestamp(end)]
+        return df
+
+    rows = OnePieceCardHistory.objects.filter(card_id__in=card_ids)
+    if start:
+        rows = rows.filter(history_date__gte=start)
+    if end:
+        rows = rows.filter(history_date__lte=end)
+    return pd.DataFrame.from_records(rows.values_list("card_id", "history_date", "market_price"), columns=columns)
+
+
+def history_series(card_ids, granularity="day", start=None, end=None) -> dict:
+    """
+    {card_id: (dates, prices)} as datetime64[D] and float64 arrays in date
+    order, fetched for all the cards with one query. Cards with no history in
+    [start, end] are left out.
+    """
+    df = _points(list(card_ids), granularity, start, end)
+    if df.empty:
+        return {}
+    df = df.sort_values(["card_id", "date"], kind="stable")
+    card = df["card_id"].to_numpy("int64")
+    dates = pd.to_datetime(df["date"]).to_numpy("datetime64[D]")
+    prices = df["price"].to_numpy("float64")
+
+    # One slice per card
+    breaks = np.flatnonzero(np.diff(card)) + 1
+    starts = np.concatenate(([0], breaks))
+    return {
+        int(card[first]): (d, p)
+        for first, d, p in zip(starts, np.split(dates, breaks), np.split(prices, breaks))
+    }
+
+
+def downsample(dates, prices, max_points):
+    """At most max_points of the series, picked by LTTB so the chart keeps its shape."""
+    if not max_points or len(dates) <= max_points:
+        return dates, prices
+    keep = lttb(dates.astype("int64"), prices, max_points)
+    return dates[keep], prices[keep]
+
+
+def columnar(dates, prices) -> dict:
+    return {
+        "dates": np.datetime_as_string(dates, unit="D").tolist(),
+        "prices": np.round(prices, 2).tolist(),
+    }
+
+
+def daily_rows(card_id, dates, prices) -> list:
+    """
+    The series as the one-object-per-day rows the history API has always
+    returned. Runs have no row per day to take an id from, so id is null.
+    """
+    return [
+        {"id": None, "card_id": card_id, "history_date": day, "market_price": f"{price:.2f}"}
+        for day, price in zip(np.datetime_as_string(dates, unit="D").tolist(), prices.tolist())
+    ]
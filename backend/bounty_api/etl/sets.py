@@ -0,0 +1,69 @@
+import io
+from dataclasses import dataclass, field
+import pandas as pd
+
+from bounty_api.models import OnePieceSet
+
+SET_FIELDS = ["name", "description"]
+
+
+@dataclass
+class SetChanges:
+    new: list = field(default_factory=list)
+    changed: list = field(default_factory=list)
+    # In the table but no longer in Groups.csv; reported, never deleted
+    missing: list = field(default_factory=list)
+
+    def summary(self):
+        return f"{len(self.new)} new, {len(self.changed)} changed, {len(self.missing)} missing from feed"
+
+
+def groups_frame(content: bytes) -> pd.DataFrame:
+    """Groups.csv -> (id, name, description) shaped like one_piece_set."""
+    groups = pd.read_csv(io.BytesIO(content), usecols=["groupId", "abbreviation", "name"])
+    return pd.DataFrame({
+        "id": groups["groupId"].astype("int64"),
+        "name": groups["abbreviation"].fillna("").astype(str).str.replace(" ", "_", regex=False),
+        "description": groups["name"].astype(object).where(groups["name"].notna(), None),
+    }).drop_duplicates(subset="id", keep="last")
+
+
+def sync_sets(groups: pd.DataFrame) -> SetChanges:
+    """
+    Diff Groups.csv against one_piece_set by id and content, then apply all
+    inserts with one bulk_create and all changes with one bulk_update.
+    """
+    existing = pd.DataFrame.from_records(
+        list(OnePieceSet.objects.values_list("id", *SET_FIELDS)),
+        columns=["id"] + SET_FIELDS,
+    ).astype({"id": "int64"})
+
+    merged = groups.merge(existing, on="id", how="outer", suffixes=("", "_db"), indicator=True)
+    feed_only = merged["_merge"] == "left_only"
+    both = merged["_merge"] == "both"
+
+    differs = pd.Series(False, index=merged.index)
+    for col in SET_FIELDS:
+        # None/NaN on both sides counts as equal
+        new_val, old_val = merged[col], merged[f"{col}_db"]
+        differs |= ~((new_val == old_val) | (new_val.isna() & old_val.isna()))
+
+    new_sets = merged.loc[feed_only, ["id"] + SET_FIELDS]
+    changed_sets = merged.loc[both & differs, ["id"] + SET_FIELDS]
+
+    def to_objects(df):
+        return [
+            OnePieceSet(id=int(set_id), name=name, description=description)
+            for set_id, name, description in df.itertuples(index=False, name=None)
+        ]
+
+    if len(new_sets):
+        OnePieceSet.objects.bulk_create(to_objects(new_sets))
+    if len(changed_sets):
+        OnePieceSet.objects.bulk_update(to_objects(changed_sets), fields=SET_FIELDS)
+
+    return SetChanges(
+        new=new_sets["id"].tolist(),
+        changed=changed_sets["id"].tolist(),
+        missing=merged.loc[merged["_merge"] == "right_only", "id"].astype("int64").tolist(),
+    )
@@ -0,0 +1,144 @@
+import logging
+import re
+import time
+from contextlib import contextmanager
+
+from django.db import connection, transaction, OperationalError
+
+from bounty_api.etl.cards import CARD_TABLE
+
+# pg_try_advisory_lock key shared by every card ETL ("BOUNTY" in ASCII)
+ETL_LOCK_KEY = 0x424F554E5459
+# Readers queue behind the swap's exclusive lock for at most this long
+SWAP_LOCK_TIMEOUT = "500ms"
+SWAP_ATTEMPTS = 20
+SWAP_RETRY_DELAY = 1.0
+
+
+class EtlLocked(Exception):
+    pass
+
+
+def shadow_supported() -> bool:
+    return connection.vendor == "postgresql"
+
+
+@contextmanager
+def etl_lock(key=ETL_LOCK_KEY):
+    """
+    Session-level advisory lock so two ETL runs never overlap. Raises EtlLocked
+    straight away if another run holds it. A no-op outside PostgreSQL.
+    """
+    if connection.vendor != "postgresql":
+        yield
+        return
+
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT pg_try_advisory_lock(%s)", [key])
+        if not cursor.fetchone()[0]:
+            raise EtlLocked("Another ETL run holds the lock")
+    try:
+        yield
+    finally:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_advisory_unlock(%s)", [key])
+
+
+def shadow_name(table=CARD_TABLE):
+    return f"{table}_shadow"
+
+
+def create_shadow(table=CARD_TABLE) -> str:
+    """
+    Copy table into a fresh shadow table with the same columns, defaults,
+    constraints and indexes. Readers of table are not blocked. Returns its name.
+    """
+    qn = connection.ops.quote_name
+    shadow = shadow_name(table)
+    with transaction.atomic(), connection.cursor() as cursor:
+        # Left over from a run that died before swapping
+        cursor.execute(f"DROP TABLE IF EXISTS {qn(shadow)}")
+        cursor.execute(f"CREATE TABLE {qn(shadow)} (LIKE {qn(table)} INCLUDING ALL)")
+        cursor.execute(f"INSERT INTO {qn(shadow)} SELECT * FROM {qn(table)}")
+        # The copied identity column gets its own sequence, starting over at 1
+        cursor.execute(
+            f"SELECT setval(pg_get_serial_sequence(%s, 'id'), COALESCE(MAX(id), 0) + 1, false) "
+            f"FROM {qn(shadow)}",
+            [shadow],
+        )
+    return shadow
+
+
+def drop_shadow(table=CARD_TABLE):
+    with connection.cursor() as cursor:
+        cursor.execute(f"DROP TABLE IF EXISTS {connection.ops.quote_name(shadow_name(table))}")
+
+
+def _index_definitions(cursor, table):
+    # {definition with names blanked out: index name}, to pair up copied indexes
+    cursor.execute("SELECT indexname, indexdef FROM pg_indexes WHERE tablename = %s", [table])
+    return {
+        re.sub(rf"\b({re.escape(name)}|{re.escape(table)})\b", "", definition): name
+        for name, definition in cursor.fetchall()
+    }
+
+
+def _swap_once(table, shadow):
+    qn = connection.ops.quote_name
+    retired = f"{table}_retired"
+    with transaction.atomic(), connection.cursor() as cursor:
+        # Fail fast rather than queue readers behind our exclusive lock
+        cursor.execute(f"SET LOCAL lock_timeout = '{SWAP_LOCK_TIMEOUT}'")
+        live_indexes = _index_definitions(cursor, table)
+
+        cursor.execute(f"ALTER TABLE {qn(table)} RENAME TO {qn(retired)}")
+        cursor.execute(f"ALTER TABLE {qn(shadow)} RENAME TO {qn(table)}")
+        cursor.execute(f"DROP TABLE {qn(retired)}")
+
+        # Give the new table's indexes and constraints the names migrations expect
+        for definition, name in _index_definitions(cursor, table).items():
+            original = live_indexes.get(definition)
+            if original and original != name:
+                cursor.execute(f"ALTER INDEX {qn(name)} RENAME TO {qn(original)}")
+
+
+def swap_shadow(table=CARD_TABLE):
+    """
+    Replace table with its shadow in one short, metadata-only transaction.
+    Retries if readers hold the table past the lock timeout.
+    """
+    shadow = shadow_name(table)
+    with connection.cursor() as cursor:
+        cursor.execute(f"ANALYZE {connection.ops.quote_name(shadow)}")
+
+    for attempt in range(1, SWAP_ATTEMPTS + 1):
+        try:
+            start = time.perf_counter()
+            _swap_once(table, shadow)
+            logging.info(f"Swapped {shadow} into {table} in {time.perf_counter() - start:.3f}s")
+            return
+        except OperationalError as e:
+            if attempt == SWAP_ATTEMPTS:
+                raise
+            logging.warning(f"Swap of {table} timed out ({attempt}/{SWAP_ATTEMPTS}): {e}")
+            time.sleep(SWAP_RETRY_DELAY)
+
+
+@contextmanager
+def card_load_table(shadow=False):
+    """
+    Yield the table the card ETL should write to. With shadow=True that is a
+    fresh shadow copy, swapped in when the block exits cleanly and dropped if
+    it raises.
+    """
+    if not shadow:
+        yield CARD_TABLE
+        return
+
+    table = create_shadow()
+    try:
+        yield table
+    except BaseException:
+        drop_shadow()
+        raise
+    swap_shadow()
@@ -0,0 +1,244 @@
+import hashlib
+import json
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+import numpy as np
+import pandas as pd
+
+from bounty_api.etl.parse import clean_df, INPUT_COLUMNS
+
+FOIL_TYPES = ["Normal", "Foil"]
+RARITIES = ["C", "UC", "R", "SR", "SEC", "L", "P"]
+COLORS = ["Red", "Green", "Blue", "Purple", "Black", "Yellow", "Red/Green"]
+CARD_TYPES = ["Leader", "Character", "Event", "Stage"]
+
+
+def synthetic_cards(n_rows: int, seed: int = 0, foil_types=FOIL_TYPES) -> pd.DataFrame:
+    """A cleaned card frame of n_rows, shaped like clean_df output."""
+    rng = np.random.default_rng(seed)
+    n_variants = len(foil_types)
+    n_products = -(-n_rows // n_variants)
+    product_id = np.repeat(np.arange(100000, 100000 + n_products), n_variants)[:n_rows]
+    foil = np.tile(foil_types, n_products)[:n_rows]
+
+    df = pd.DataFrame({
+        "product_id": product_id,
+        "foil_type": foil,
+        "name": pd.Series(product_id).map("Card {}".format),
+        "image_url": pd.Series(product_id).map("https://tcgplayer-cdn.tcgplayer.com/product/{}_200w.jpg".format),
+        "tcgplayer_url": pd.Series(product_id).map("https://www.tcgplayer.com/product/{}".format),
+        "market_price": rng.gamma(1.2, 3.0, n_rows).round(2),
+        "rarity": rng.choice(RARITIES, n_rows),
+        "card_id": pd.Series(product_id % 1000).map("OP01-{:03d}".format),
+        "description": "Synthetic card text",
+        "color": rng.choice(COLORS, n_rows),
+        "card_type": rng.choice(CARD_TYPES, n_rows),
+        "life": rng.integers(0, 6, n_rows),
+        "power": rng.integers(0, 13, n_rows) * 1000,
+        "subtype": "Straw Hat Crew",
+        "attribute": "Strike",
+        "cost": rng.integers(0, 11, n_rows),
+        "counter": rng.integers(0, 3, n_rows) * 1000,
+    })
+    return clean_df(df)
+
+
+def synthetic_existing(df_all: pd.DataFrame, existing_ratio=0.9) -> pd.DataFrame:
+    """A card-table key frame covering the first existing_ratio of df_all."""
+    n = int(len(df_all) * existing_ratio)
+    existing = df_all.loc[: n - 1, ["product_id", "foil_type"]].copy()
+    existing.insert(0, "id", np.arange(1, n + 1))
+    existing["stored_fingerprint"] = ""
+    return existing.astype({"id": "int64", "product_id": "int64", "foil_type": "string"})
+
+
+def to_tcgcsv_layout(df: pd.DataFrame) -> pd.DataFrame:
+    """Card frame -> raw ProductsAndPrices.csv columns, as TCGCSV serves them."""
+    raw = df.rename(columns={field: col for col, field in INPUT_COLUMNS.items()})
+    raw["extColor"] = raw["extColor"].str.replace("/", ";", regex=False)
+    for col in ["extLife", "extPower", "extCost", "extCounterplus"]:
+        raw[col] = raw[col].astype("Int64").astype("string").replace("0", pd.NA)
+    return raw[list(INPUT_COLUMNS.keys())]
+
+
+def write_synthetic_day(csv_dir: Path, n_sets: int, cards_per_set: int, seed: int = 0):
+    """Write group_<id>.csv files for one day; returns the set ids written."""
+    csv_dir.mkdir(parents=True, exist_ok=True)
+    raw = to_tcgcsv_layout(synthetic_cards(n_sets * cards_per_set, seed))
+
+    set_ids = list(range(1, n_sets + 1))
+    for i, set_id in enumerate(set_ids):
+        chunk = raw.iloc[i * cards_per_set:(i + 1) * cards_per_set]
+        chunk.to_csv(csv_dir / f"group_{set_id}.csv", index=False)
+    return set_ids
+
+
+@dataclass
+class SyntheticCatalog:
+    """
+    A made-up TCGCSV category: n_sets sets of cards_per_set products, one row
+    per foil variant. Prices move a little from day to day so repeated loads
+    see realistic churn. Writes every layout the ETL commands read.
+    """
+    n_sets: int
+    cards_per_set: int
+    foil_types: list = field(default_factory=lambda: list(FOIL_TYPES))
+    seed: int = 0
+    # Share of cards whose price differs from the base price on any given day
+    churn: float = 0.2
+
+    def __post_init__(self):
+        self.set_ids = list(range(1, self.n_sets + 1))
+        self.rows_per_set = self.cards_per_set * len(self.foil_types)
+        self.cards = synthetic_cards(self.n_rows, self.seed, self.foil_types)
+        self.raw = to_tcgcsv_layout(self.cards)
+
+    @property
+    def n_rows(self):
+        return self.n_sets * self.rows_per_set
+
+    def prices(self, day: int) -> np.ndarray:
+        rng = np.random.default_rng(self.seed + 1 + day)
+        base = self.cards["market_price"].to_numpy(dtype="float64")
+        moved = rng.random(self.n_rows) < self.churn
+        factor = np.where(moved, rng.lognormal(0.0, 0.1, self.n_rows), 1.0)
+        return (base * factor).round(2)
+
+    def _set_frames(self, day: int):
+        raw = self.raw.copy()
+        raw["marketPrice"] = self.prices(day)
+        # Columns TCGCSV serves that the ETL doesn't read
+        raw["lowPrice"] = (raw["marketPrice"] * 0.8).round(2)
+        raw["highPrice"] = (raw["marketPrice"] * 1.5).round(2)
+        for i, set_id in enumerate(self.set_ids):
+            chunk = raw.iloc[i * self.rows_per_set:(i + 1) * self.rows_per_set].copy()
+            chunk.insert(1, "groupId", set_id)
+            yield set_id, chunk
+
+    def groups(self) -> pd.DataFrame:
+        """Groups.csv rows for the catalog's sets."""
+        return pd.DataFrame({
+            "groupId": self.set_ids,
+            "name": [f"Synthetic Set {set_id}" for set_id in self.set_ids],
+            "abbreviation": [f"SY {set_id:02d}" for set_id in self.set_ids],
+            "isSupplemental": False,
+            "publishedOn": "2024-01-01T00:00:00",
+            "modifiedOn": "2024-01-01T00:00:00",
+            "categoryId": 68,
+        })
+
+    def write_site(self, site_dir: Path, day: int = 0):
+        """The tcgcsv.com/tcgplayer/68 layout: Groups.csv and <set>/ProductsAndPrices.csv."""
+        site_dir.mkdir(parents=True, exist_ok=True)
+        self.groups().to_csv(site_dir / "Groups.csv", index=False)
+        for set_id, chunk in self._set_frames(day):
+            (site_dir / str(set_id)).mkdir(exist_ok=True)
+            chunk.to_csv(site_dir / str(set_id) / "ProductsAndPrices.csv", index=False)
+
+    def write_day(self, csv_dir: Path, day: int):
+        """prices/<date>/group_<set>.csv, as get_tcgcsv saves them."""
+        csv_dir.mkdir(parents=True, exist_ok=True)
+        for set_id, chunk in self._set_frames(day):
+            chunk.to_csv(csv_dir / f"group_{set_id}.csv", index=False)
+
+    def write_history_day(self, day_dir: Path, day: int):
+        """prices/prev/<date>/<set>/prices JSON, as found in TCGCSV price archives."""
+        for set_id, chunk in self._set_frames(day):
+            results = pd.DataFrame({
+                "productId": chunk["productId"].astype("int64"),
+                "lowPrice": chunk["lowPrice"],
+                "marketPrice": chunk["marketPrice"],
+                "highPrice": chunk["highPrice"],
+                "subTypeName": chunk["subTypeName"],
+            }).to_dict("records")
+            (day_dir / str(set_id)).mkdir(parents=True, exist_ok=True)
+            payload = {"success": True, "errors": [], "results": results}
+            (day_dir / str(set_id) / "prices").write_text(json.dumps(payload))
+
+
+class StandInServer(ThreadingHTTPServer):
+    """
+    Local stand-in for tcgcsv.com / the image CDN. Records (path, status) for
+    every request; fail maps a path to a number of 503s to answer first.
+    """
+
+    def __init__(self, root: Path, etags=True):
+        super().__init__(("127.0.0.1", 0), partial(_StandInHandler, directory=str(root)))
+        self.etags = etags
+        self.fail = {}
+        self.requests = []
+        self._lock = threading.Lock()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def log(self, path, status):
+        with self._lock:
+            self.requests.append((path, status))
+
+    def statuses(self, suffix=""):
+        """{path: last status} for requests ending in suffix."""
+        with self._lock:
+            return {path: status for path, status in self.requests if path.endswith(suffix)}
+
+    def reset(self):
+        with self._lock:
+            self.requests.clear()
+
+
+class _StandInHandler(SimpleHTTPRequestHandler):
+    # Strong ETags from the content, 304 on If-None-Match, like a CDN
+
+    def do_GET(self):
+        server = self.server
+        with server._lock:
+            failures = server.fail.get(self.path, 0)
+            if failures:
+                server.fail[self.path] = failures - 1
+        if failures:
+            server.log(self.path, 503)
+            self.send_error(503)
+            return
+
+        path = Path(self.translate_path(self.path))
+        if not path.is_file():
+            server.log(self.path, 404)
+            self.send_error(404)
+            return
+        body = path.read_bytes()
+        etag = f'"{hashlib.sha1(body).hexdigest()}"'
+        if server.etags and self.headers.get("If-None-Match") == etag:
+            server.log(self.path, 304)
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+
+        server.log(self.path, 200)
+        self.send_response(200)
+        self.send_header("Content-Type", self.guess_type(str(path)))
+        self.send_header("Content-Length", str(len(body)))
+        if server.etags:
+            self.send_header("ETag", etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@contextmanager
+def stand_in_server(root: Path, etags=True):
+    server = StandInServer(root, etags)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield server
+    finally:
+        server.shutdown()
+        server.server_close()
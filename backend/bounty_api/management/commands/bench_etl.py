@@ -0,0 +1,310 @@
+import io
+import os
+import tempfile
+import time
+from contextlib import redirect_stdout
+from datetime import date, timedelta
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from bounty_api.models import OnePieceCard, OnePieceCardHistory
+from bounty_api.etl.cards import (
+    KEY_FIELDS, split_new_existing, card_load_frame, iter_set_frames, existing_card_keys,
+    snapshot_history,
+)
+from bounty_api.etl.history import HISTORY_TABLE, HISTORY_KEY, fill_history_gaps
+from bounty_api.etl.loader import upsert_dataframe
+from bounty_api.etl.partitions import ensure_partitions, is_partitioned
+from bounty_api.etl.runs import RUN_TABLE, RUN_KEY, encode_runs
+from bounty_api.etl.synthetic import (
+    FOIL_TYPES, SyntheticCatalog, stand_in_server, synthetic_cards, synthetic_existing, write_synthetic_day,
+)
+
+SUITES = ["classify", "parse", "gapfill", "pipeline", "history", "batch"]
+SUITE_DEFAULTS = {
+    "classify": {"sizes": [10_000, 100_000, 1_000_000]},
+    "parse": {"sets": 200, "cards_per_set": 500},
+    "gapfill": {"sizes": [20_000], "days": 365},
+    # 1x is roughly today's One Piece catalog
+    "pipeline": {"sets": 20, "cards_per_set": 250, "days": 7},
+    "history": {"sizes": [5_000], "years": [1, 5]},
+    "batch": {"sizes": [5_000], "days": 365},
+}
+# Far enough back that synthetic history never overlaps real rows
+SYNTHETIC_START = date(2000, 1, 1)
+
+
+class Command(BaseCommand):
+    help = "Benchmark ETL stages against synthetic data"
+
+    def add_arguments(self, parser):
+        parser.add_argument("suite", choices=SUITES)
+        parser.add_argument("--sizes", type=int, nargs="+",
+                            help="Rows per run (classify) or catalog sizes (gapfill, history, batch)")
+        parser.add_argument("--legacy", action="store_true",
+                            help="Also time the old row-wise apply() classification")
+        parser.add_argument("--sets", type=int, help="Sets per synthetic day (parse, pipeline at 1x)")
+        parser.add_argument("--cards-per-set", type=int)
+        parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8],
+                            help="Parse worker counts to compare (parse)")
+        parser.add_argument("--days", type=int, help="Days of history (gapfill, pipeline, batch)")
+        parser.add_argument("--coverage", type=float, default=0.9,
+                            help="Share of cards priced on each day (gapfill)")
+        parser.add_argument("--scales", type=int, nargs="+", default=[1, 10, 100],
+                            help="Catalog multiples to run (pipeline)")
+        parser.add_argument("--foil-types", nargs="+", default=list(FOIL_TYPES),
+                            help="Foil variants per product (pipeline)")
+        parser.add_argument("--years", type=int, nargs="+", help="Years of daily history (history)")
+        parser.add_argument("--batch-sizes", type=int, nargs="+", default=[10, 50, 300],
+                            help="Cards per history request (batch)")
+        parser.add_argument("--lookups", type=int, default=200,
+                            help="Random cards whose history is read (history)")
+
+    def handle(self, *args, **options):
+        for name, default in SUITE_DEFAULTS[options["suite"]].items():
+            if options[name] is None:
+                options[name] = default
+        getattr(self, f"bench_{options['suite']}")(**options)
+
+    def report(self, label, rows, seconds):
+        rate = rows / seconds if seconds else float("inf")
+        self.stdout.write(f"{label:<32} {rows:>10,} rows  {seconds:>8.3f}s  {rate:>14,.0f} rows/s")
+
+    def bench_classify(self, sizes, legacy, **options):
+        curr_date = date.today()
+        for n in sizes:
+            df_all = synthetic_cards(n)
+            existing = synthetic_existing(df_all)
+
+            start = time.perf_counter()
+            new_rows, existing_rows = split_new_existing(df_all, existing)
+            self.report(f"classify (merge) n={n}", n, time.perf_counter() - start)
+
+            start = time.perf_counter()
+            card_load_frame(new_rows, curr_date)
+            card_load_frame(existing_rows, curr_date)
+            self.report(f"build batches n={n}", n, time.perf_counter() - start)
+
+            if legacy:
+                start = time.perf_counter()
+                existing_pairs = set(zip(existing["product_id"], existing["foil_type"]))
+                mask = df_all.apply(lambda row: (row["product_id"], row["foil_type"]) in existing_pairs, axis=1)
+                df_all[~mask], df_all[mask]
+                self.report(f"classify (legacy apply) n={n}", n, time.perf_counter() - start)
+
+    def bench_parse(self, sets, cards_per_set, workers, **options):
+        with tempfile.TemporaryDirectory() as tmp:
+            csv_dir = Path(tmp)
+            write_synthetic_day(csv_dir, sets, cards_per_set)
+            n = sets * cards_per_set
+
+            for w in workers:
+                start = time.perf_counter()
+                for _ in iter_set_frames(csv_dir, workers=w):
+                    pass
+                self.report(f"parse+clean {sets} sets, workers={w}", n, time.perf_counter() - start)
+
+    def bench_gapfill(self, sizes, days, coverage, **options):
+        # Runs against the configured database inside a transaction that is rolled back
+        end_date = SYNTHETIC_START + timedelta(days=days - 1)
+        for n in sizes:
+            with transaction.atomic():
+                df_all = synthetic_cards(n)
+                upsert_dataframe(
+                    card_load_frame(df_all, SYNTHETIC_START), OnePieceCard._meta.db_table,
+                    conflict_columns=KEY_FIELDS,
+                )
+                card_ids = existing_card_keys(df_all["product_id"])["id"].to_numpy()
+
+                start = time.perf_counter()
+                ensure_partitions(SYNTHETIC_START, end_date)
+                rows = synthetic_history(card_ids, days, coverage)
+                upsert_dataframe(rows, HISTORY_TABLE, conflict_columns=HISTORY_KEY)
+                self.report(f"load priced history n={n}", len(rows), time.perf_counter() - start)
+
+                start = time.perf_counter()
+                filled = fill_history_gaps(SYNTHETIC_START, end_date)
+                self.report(f"gap fill {days} days n={n}", len(card_ids) * days, time.perf_counter() - start)
+                self.stdout.write(f"  {filled:,} prices carried forward")
+
+                transaction.set_rollback(True)
+
+    def bench_history(self, sizes, years, lookups, **options):
+        """
+        Per-card history reads and the nightly snapshot insert against `years`
+        of daily history. Compare layouts by running it before and after
+        migrating to (or back from) the partitioned table.
+        """
+        layout = "partitioned by month" if is_partitioned() else "single table"
+        self.stdout.write(f"{HISTORY_TABLE}: {layout}")
+        for n in sizes:
+            for y in years:
+                days = 365 * y
+                end_date = SYNTHETIC_START + timedelta(days=days - 1)
+                with transaction.atomic():
+                    df_all = synthetic_cards(n)
+                    upsert_dataframe(
+                        card_load_frame(df_all, SYNTHETIC_START), OnePieceCard._meta.db_table,
+                        conflict_columns=KEY_FIELDS,
+                    )
+                    card_ids = existing_card_keys(df_all["product_id"])["id"].to_numpy()
+
+                    start = time.perf_counter()
+                    ensure_partitions(SYNTHETIC_START, end_date + timedelta(days=1))
+                    rows = synthetic_history(card_ids, days, coverage=1.0)
+                    upsert_dataframe(rows, HISTORY_TABLE, conflict_columns=HISTORY_KEY)
+                    self.report(f"load {y}y history n={n}", len(rows), time.perf_counter() - start)
+                    if connection.vendor == "postgresql":
+                        with connection.cursor() as cursor:
+                            cursor.execute(f"ANALYZE {connection.ops.quote_name(HISTORY_TABLE)}")
+
+                    rng = np.random.default_rng(0)
+                    sample = rng.choice(card_ids, size=min(lookups, len(card_ids)), replace=False)
+                    recent = end_date - timedelta(days=90)
+                    for label, since in (("full", None), ("last 90 days", recent)):
+                        latencies = []
+                        for card_id in sample:
+                            query = OnePieceCardHistory.objects.filter(card_id=card_id)
+                            if since:
+                                query = query.filter(history_date__gte=since)
+                            start = time.perf_counter()
+                            list(query.order_by("history_date").values_list("history_date", "market_price"))
+                            latencies.append(time.perf_counter() - start)
+                        p50, p95 = np.percentile(latencies, [50, 95]) * 1000
+                        self.stdout.write(
+                            f"{f'card lookup {label} {y}y':<32} {len(sample):>10,} cards  "
+                            f"p50 {p50:>7.2f}ms  p95 {p95:>7.2f}ms"
+                        )
+
+                    start = time.perf_counter()
+                    inserted = snapshot_history(end_date + timedelta(days=1))
+                    self.report(f"nightly insert {y}y n={n}", inserted, time.perf_counter() - start)
+
+                    transaction.set_rollback(True)
+
+    def bench_batch(self, sizes, days, batch_sizes, **options):
+        """
+        k cards' history through the API: k single-card requests, as the
+        frontend used to make, against one batch request. Both go through the
+        full DRF stack in-process and return the columnar layout.
+        """
+        self.stdout.write(f"history store: {settings.HISTORY_STORE}")
+        client = APIClient()
+        single_url = reverse("onepiece_cardhistory-list")
+        batch_url = reverse("onepiece_cardhistory-batch")
+        for n in sizes:
+            end_date = SYNTHETIC_START + timedelta(days=days - 1)
+            with transaction.atomic(), override_settings(ALLOWED_HOSTS=["*"]):
+                df_all = synthetic_cards(n)
+                upsert_dataframe(
+                    card_load_frame(df_all, SYNTHETIC_START), OnePieceCard._meta.db_table,
+                    conflict_columns=KEY_FIELDS,
+                )
+                card_ids = existing_card_keys(df_all["product_id"])["id"].to_numpy()
+
+                start = time.perf_counter()
+                rows = synthetic_history(card_ids, days, coverage=1.0)
+                if settings.HISTORY_STORE == "runs":
+                    upsert_dataframe(encode_runs(rows), RUN_TABLE, conflict_columns=RUN_KEY)
+                else:
+                    ensure_partitions(SYNTHETIC_START, end_date)
+                    upsert_dataframe(rows, HISTORY_TABLE, conflict_columns=HISTORY_KEY)
+                self.report(f"load {days}d history n={n}", len(rows), time.perf_counter() - start)
+                if connection.vendor == "postgresql":
+                    with connection.cursor() as cursor:
+                        cursor.execute("ANALYZE")
+
+                rng = np.random.default_rng(0)
+                window = f"start={SYNTHETIC_START}&end={end_date}"
+                for k in batch_sizes:
+                    sample = rng.choice(card_ids, size=min(k, len(card_ids)), replace=False)
+
+                    start = time.perf_counter()
+                    single_bytes = 0
+                    for card_id in sample:
+                        response = client.get(f"{single_url}?card_id={card_id}&layout=columnar&{window}")
+                        single_bytes += len(response.content)
+                    single = time.perf_counter() - start
+
+                    start = time.perf_counter()
+                    response = client.get(f"{batch_url}?ids={','.join(map(str, sample))}&{window}")
+                    batch = time.perf_counter() - start
+                    if response.status_code != 200:
+                        raise CommandError(f"batch request failed: {response.content[:200]}")
+
+                    for label, seconds, size in (
+                        (f"{len(sample)} single requests", single, single_bytes),
+                        ("1 batch request", batch, len(response.content)),
+                    ):
+                        self.stdout.write(
+                            f"{label:<32} {len(sample):>10,} cards  {seconds * 1000:>9.1f}ms  "
+                            f"{size / 1024:>8.1f}KB"
+                        )
+
+                transaction.set_rollback(True)
+
+    def bench_pipeline(self, scales, sets, cards_per_set, days, foil_types, **options):
+        """
+        End to end: get_tcgcsv against a local stand-in for tcgcsv.com, then
+        db_reload over `days` dated folders and import_history over `days` more.
+        Runs in a scratch directory and a rolled-back transaction.
+        """
+        cwd = os.getcwd()
+        for scale in scales:
+            with tempfile.TemporaryDirectory() as tmp:
+                root = Path(tmp)
+                start = time.perf_counter()
+                catalog = SyntheticCatalog(sets * scale, cards_per_set, foil_types)
+                catalog.write_site(root / "site")
+                for day in range(days):
+                    history_day = root / "prices" / "prev" / str(SYNTHETIC_START + timedelta(days=day))
+                    catalog.write_history_day(history_day, day)
+                    catalog.write_day(root / "prices" / str(SYNTHETIC_START + timedelta(days=days + day)), days + day)
+                n = catalog.n_rows
+                self.report(f"generate {scale}x", n * (2 * days + 1), time.perf_counter() - start)
+
+                os.chdir(root)
+                try:
+                    with stand_in_server(root / "site") as server, transaction.atomic():
+                        self.run_command(f"get_tcgcsv {scale}x", n, "get_tcgcsv",
+                                         base_url=server.url, force_fetch=True)
+                        self.run_command(f"db_reload {scale}x", n * (days + 1), "db_reload")
+                        self.run_command(f"import_history {scale}x", n * days, "import_history", redo=True)
+                        transaction.set_rollback(True)
+                finally:
+                    os.chdir(cwd)
+
+    def run_command(self, label, rows, name, **options):
+        out = io.StringIO()
+        start = time.perf_counter()
+        # The ETL commands print progress as well as writing to self.stdout
+        with redirect_stdout(out):
+            call_command(name, stdout=out, stderr=out, **options)
+        elapsed = time.perf_counter() - start
+        # The ETL commands report failures instead of raising
+        if "ETL error" in out.getvalue():
+            raise CommandError(f"{name} failed:\n{out.getvalue()}")
+        self.report(label, rows, elapsed)
+
+
+def synthetic_history(card_ids, days, coverage, seed=0) -> pd.DataFrame:
+    """Priced history rows where each card is missing on about 1 - coverage of days."""
+    rng = np.random.default_rng(seed)
+    n = len(card_ids)
+    priced = rng.random((days, n)) < coverage
+    day_idx, card_idx = np.nonzero(priced)
+    dates = pd.date_range(SYNTHETIC_START, periods=days).strftime("%Y-%m-%d").to_numpy()
+    return pd.DataFrame({
+        "card_id": card_ids[card_idx],
+        "history_date": dates[day_idx],
+        "market_price": rng.gamma(1.2, 3.0, len(day_idx)).round(2),
+    })
@@ -1,15 +1,21 @@
 import logging
 from datetime import datetime
 from pathlib import Path
-import numpy as np
 import pandas as pd
-import requests
-import io
 
 from django.core.management.base import BaseCommand
 from django.db import transaction
 
-from bounty_api.models import OnePieceSet, OnePieceCard, OnePieceCardHistory 
+from bounty_api.models import EtlRun
+from bounty_api.etl.cache import iter_day_frames
+from bounty_api.etl.metrics import RunMetrics, peak_rss_mb, run_json_path, files_size
+from bounty_api.etl.parse import list_set_csvs
+from bounty_api.etl.cards import (
+    CardChanges, DEFAULT_MEMORY_LIMIT_MB, iter_batches,
+    upsert_cards, snapshot_history, CARD_TABLE,
+)
+from bounty_api.etl.rollups import refresh_rollups
+from bounty_api.etl.shadow import etl_lock, card_load_table, shadow_supported
 
 # Setup log dir
 log_dir = Path("logs")
@@ -22,60 +28,37 @@ logging.basicConfig(
     format="%(asctime)s - %(levelname)s - %(message)s"
 )
 
-CARD_SCHEMA = {
-    "product_id":   {"dtype": "int64",   "default": 0},
-    "foil_type":    {"dtype": "string",  "default": "Normal"},
-    "name":         {"dtype": "string",  "default": ""},
-    "image_url":    {"dtype": "string",  "default": None},
-    "tcgplayer_url":{"dtype": "string",  "default": None},
-    "market_price": {"dtype": "float64", "default": 0.0},
-    "rarity":       {"dtype": "string",  "default": None},
-    "card_id":      {"dtype": "string",  "default": None},
-    "description":  {"dtype": "string",  "default": None},
-    "color":        {"dtype": "string",  "default": None},
-    "card_type":    {"dtype": "string",  "default": None},
-    "life":         {"dtype": "int64",   "default": 0},
-    "power":        {"dtype": "int64",   "default": 0},
-    "subtype":      {"dtype": "string",  "default": None},
-    "attribute":    {"dtype": "string",  "default": None},
-    "cost":         {"dtype": "int64",   "default": 0},
-    "counter":      {"dtype": "int64",   "default": 0},
-}
-
 class Command(BaseCommand):
     help = "ETL pipeline for TCGCSV data into Django models for EXISTING CSVs"
 
-    def clean_df(self, df: pd.DataFrame) -> pd.DataFrame:
-        # Ensure all expected columns exist
-        df = df.reindex(columns=CARD_SCHEMA.keys())
-
-        # Replace common string-nulls
-        df = df.replace(to_replace=["nan", "NaN", "NaT", "NULL", "None"], value=np.nan)
-
-        for col, spec in CARD_SCHEMA.items():
-            dtype = spec["dtype"]
-            default = spec["default"]
-
-            if dtype == "int64":
-                df[col] = pd.to_numeric(df[col], errors="coerce").dropna().astype("int64")
-                if default is not None:
-                    df[col] = df[col].fillna(default)
-
-            elif dtype == "float64":
-                df[col] = pd.to_numeric(df[col], errors="coerce").astype("float64")
-                if default is not None:
-                    df[col] = df[col].fillna(default)
-
-            else:  # string-like
-                df[col] = df[col].astype("string")
-                if default is not None:
-                    df[col] = df[col].fillna(default)
-
-        return df
+    def add_arguments(self, parser):
+        parser.add_argument("--stream", action="store_true",
+                            help="Merge set files in bounded-memory batches instead of all at once")
+        parser.add_argument("--memory-limit", type=int, default=DEFAULT_MEMORY_LIMIT_MB,
+                            help="Batch size ceiling in MB for --stream")
+        parser.add_argument("--parse-workers", type=int, default=1,
+                            help="Processes used to parse and clean set files (1 = in-process)")
+        parser.add_argument("--no-cache", action="store_true",
+                            help="Ignore and don't write the cleaned Parquet cache")
+        parser.add_argument("--shadow", action="store_true",
+                            help="Build cards in a shadow table and swap it in at the end (PostgreSQL)")
+        parser.add_argument("--trace-memory", action="store_true",
+                            help="Record per-stage peak Python allocations with tracemalloc (slower)")
 
     def handle(self, *args, **options):
+        self.stream = options["stream"]
+        self.memory_limit_mb = options["memory_limit"]
+        self.parse_workers = options["parse_workers"]
+        self.use_cache = not options["no_cache"]
+        self.trace_memory = options["trace_memory"]
+        shadow = options["shadow"]
+        if shadow and not shadow_supported():
+            self.stdout.write(self.style.WARNING("--shadow needs PostgreSQL, loading in place"))
+            shadow = False
         try:
-            self.reload_csvs()
+            # One shadow table for the whole reload, swapped in after the last date
+            with etl_lock(), card_load_table(shadow) as self.card_table:
+                self.reload_csvs()
             self.stdout.write(self.style.SUCCESS("ETL Complete!"))
         except Exception as e:
             logging.error(f"ETL error: {e}")
@@ -85,171 +68,69 @@ class Command(BaseCommand):
         print("Fetching current price lists")
         prices_dir = Path("prices")
 
-        for prices in prices_dir.iterdir():
+        for prices in sorted(prices_dir.iterdir()):
             dir_date = str(prices).split('/')[-1]
-            if dir_date == 'prev':
+            if dir_date == 'prev' or not prices.is_dir():
                 continue
             print(f"Perform ETL for {dir_date}")
-            self.csv_etl(prices, dir_date)
+            self.csv_etl(
+                prices, dir_date, self.stream, self.memory_limit_mb,
+                self.parse_workers, self.use_cache, self.card_table,
+            )
             print("-------------------")
 
     @transaction.atomic
-    def csv_etl(self, csv_dir: Path, dir_date: str):
-        EXPECTED_INPUT = [
-            "productId", "name", "imageUrl", "url", "marketPrice",
-            "subTypeName", "extRarity", "extNumber", "extDescription", "extColor",
-            "extCardType", "extLife", "extPower", "extSubtypes",
-            "extAttribute", "extCost", "extCounterplus"
-        ]
-
+    def csv_etl(self, csv_dir: Path, dir_date: str, stream=False, memory_limit_mb=DEFAULT_MEMORY_LIMIT_MB,
+                parse_workers=1, use_cache=True, card_table=CARD_TABLE):
         curr_date = dir_date
-        csv_list = list(csv_dir.iterdir())
-        df_list = []
-
-        for file in csv_list:
-            df = pd.read_csv(file)
-            for col in EXPECTED_INPUT:
-                if col not in df.columns:
-                    df[col] = pd.NA
-
-            df["extSubtypes"] = df["extSubtypes"].str.replace(";", "/", regex=False)
-            df["extColor"] = df["extColor"].str.replace(";", "/", regex=False)
-
-            df = df.rename(columns={
-                "productId": "product_id",
-                "name": "name",
-                "imageUrl": "image_url",
-                "url": "tcgplayer_url",
-                "marketPrice": "market_price",
-                "subTypeName": "foil_type",
-                "extRarity": "rarity",
-                "extNumber": "card_id",
-                "extDescription": "description",
-                "extColor": "color",
-                "extCardType": "card_type",
-                "extLife": "life",
-                "extPower": "power",
-                "extSubtypes": "subtype",
-                "extAttribute": "attribute",
-                "extCost": "cost",
-                "extCounterplus": "counter",
-            })
-    
-            df_list.append(self.clean_df(df))
-
-        print("Dataframe cleaning complete")
-        df_all = pd.concat(df_list, ignore_index=True)
-
-        # Separate new vs existing cards
-        existing_pairs = set(
-            OnePieceCard.objects.values_list("product_id", "foil_type")
-        )
-        new_rows = df_all[
-            ~df_all.apply(lambda row: (row["product_id"], row["foil_type"]) in existing_pairs, axis=1)
-        ]
-        existing_rows = df_all[
-            df_all.apply(lambda row: (row["product_id"], row["foil_type"]) in existing_pairs, axis=1)
-        ]
-        logging.info((new_rows.to_string()))
-
-        # Bulk-Create any new cards
-        print("Bulk create")
-        logging.info("Starting bulk insert for table one_piece_card")
-        new_cards = [
-            OnePieceCard(
-                product_id=row["product_id"],
-                foil_type=row["foil_type"],
-                name=row["name"],
-                image_url=row["image_url"],
-                tcgplayer_url=row["tcgplayer_url"],
-                market_price=row["market_price"] or 0,
-                rarity=row["rarity"],
-                card_id=row["card_id"],
-                description=row["description"],
-                color=row["color"],
-                card_type=row["card_type"],
-                life=row["life"] if pd.notna(row["life"]) else None,
-                power=row["power"] if pd.notna(row["power"]) else None,
-                subtype=row["subtype"],
-                attribute=row["attribute"],
-                cost=row["cost"] if pd.notna(row["cost"]) else None,
-                counter=row["counter"] if pd.notna(row["counter"]) else None,
-                last_update=curr_date,
-            )
-            for _, row in new_rows.iterrows()
-        ]
-        OnePieceCard.objects.bulk_create(new_cards, batch_size=1000)
-        print(f"Inserted {len(new_cards)} new cards,")
-        logging.info(f"Inserted {len(new_cards)} new cards")
-
-        # Bulk-Update existing cards
-        print("Bulk update")
-        logging.info("Starting bulk update for table one_piece_card")
-        existing_cards = {
-            (c.product_id, c.foil_type): c
-            for c in OnePieceCard.objects.filter(
-                product_id__in=existing_rows["product_id"].unique(),
-                foil_type__in=existing_rows["foil_type"].unique()
-            ).exclude(last_update=curr_date)
-        }
-
-        to_update = []
-        for _, row in existing_rows.iterrows():
-            card = existing_cards.get((row["product_id"], row["foil_type"]))
-            if not card:
-                continue  # safety check
-
-            card.name = row["name"]
-            card.image_url = row["image_url"]
-            card.tcgplayer_url = row["tcgplayer_url"]
-            card.market_price = row["market_price"] or 0
-            card.rarity = row["rarity"]
-            card.card_id = row["card_id"]
-            card.description = row["description"]
-            card.color = row["color"]
-            card.card_type = row["card_type"]
-            card.life = row["life"] if pd.notna(row["life"]) else None
-            card.power = row["power"] if pd.notna(row["power"]) else None
-            card.subtype = row["subtype"]
-            card.attribute = row["attribute"]
-            card.cost = row["cost"] if pd.notna(row["cost"]) else None
-            card.counter = row["counter"] if pd.notna(row["counter"]) else None
-            card.last_update = curr_date
-            to_update.append(card)
-
-        OnePieceCard.objects.bulk_update(
-            to_update,
-            fields=[
-                "name", "image_url", "tcgplayer_url",
-                "market_price", "rarity", "card_id", "description", "color",
-                "card_type", "life", "power", "subtype", "attribute", "cost",
-                "counter", "last_update"
-            ],
-            batch_size=1000,
-        )
-
-        # Update last_update for any cards that were not included in CSVs
-        OnePieceCard.objects.exclude(last_update=curr_date).update(last_update=curr_date)
-
-        print(f"updated {len(to_update)} existing cards,")
-        logging.info(f"updated {len(to_update)} existing cards")
+        metrics = RunMetrics(trace_memory=self.trace_memory)
+        frames = iter_day_frames(csv_dir, workers=parse_workers, use_cache=use_cache)
+        frames = metrics.timed_iter("parse", frames, bytes=files_size(list_set_csvs(csv_dir)))
+
+        if stream:
+            batches = iter_batches(frames, memory_limit_mb)
+        else:
+            frames = list(frames)
+            batches = [pd.concat(frames, ignore_index=True)] if frames else []
+
+        # Write only new and changed cards
+        print("Bulk upsert")
+        logging.info(f"Starting bulk upsert for table {card_table}")
+        changes = CardChanges()
+        for batch in batches:
+            changes += upsert_cards(batch, curr_date, card_table, metrics)
+        print(f"Cards: {changes.summary()}")
+        logging.info(f"Cards: {changes.summary()}")
 
         # Bulk-Create history rows
         print("Bulk history")
         logging.info("Starting bulk insert for table one_piece_card_history")
-
-        all_cards = OnePieceCard.objects.all()
-        history_objs = [
-            OnePieceCardHistory(
-                card_id=card.id,
-                history_date=curr_date,
-                market_price=card.market_price or 0,
-            )
-            for card in all_cards
-        ]
-        OnePieceCardHistory.objects.bulk_create(history_objs, batch_size=1000, ignore_conflicts=True)
-
-        added_count = all_cards.count()
+        with metrics.stage("history") as stage:
+            added_count = snapshot_history(curr_date, card_table)
+            stage.rows_out = added_count
+        with metrics.stage("rollups") as stage:
+            stage.rows_out = sum(refresh_rollups(curr_date, curr_date, card_table).values())
 
         print(f"Inserted {added_count} history rows")
-        logging.info(f"Inserted {added_count} history rows for {curr_date}")
\ No newline at end of file
+        logging.info(f"Inserted {added_count} history rows for {curr_date}")
+        print(f"Peak RSS: {peak_rss_mb():.1f} MB")
+        logging.info(f"Peak RSS: {peak_rss_mb():.1f} MB")
+        print(metrics.summary())
+        logging.info(f"Stages:\n{metrics.summary()}")
+
+        EtlRun.objects.create(
+            command="db_reload",
+            run_date=curr_date,
+            rows_new=changes.new,
+            rows_changed=changes.changed,
+            rows_unchanged=changes.unchanged,
+            history_rows=added_count,
+            peak_rss_mb=peak_rss_mb(),
+            wall_time=metrics.wall_time,
+            stages=metrics.as_list(),
+        )
+        metrics.write_json(
+            run_json_path("db_reload", curr_date),
+            command="db_reload", run_date=curr_date,
+            rows_new=changes.new, rows_changed=changes.changed, history_rows=added_count,
+        )
@@ -0,0 +1,77 @@
+from statistics import median
+from django.core.management.base import BaseCommand
+from bounty_api.models import EtlRun
+
+DEFAULT_THRESHOLD = 1.5
+
+
+class Command(BaseCommand):
+    help = "Compare per-stage timings of the last N ETL runs and flag regressions"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--command", default="get_tcgcsv",
+                            help="ETL command whose runs to compare")
+        parser.add_argument("--last", type=int, default=7, help="Number of runs to compare")
+        parser.add_argument("--metric", default="wall_time",
+                            choices=["wall_time", "cpu_time", "rows_out", "rss_mb", "rss_delta_mb"])
+        parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                            help="Flag a stage when the latest run exceeds the median of "
+                                 "the earlier ones by this factor")
+
+    def handle(self, *args, **options):
+        metric = options["metric"]
+        runs = list(
+            EtlRun.objects.filter(command=options["command"])
+            .exclude(stages=[])
+            .order_by("-started_at")[:options["last"]]
+        )[::-1]
+        if not runs:
+            self.stdout.write(self.style.WARNING(f"No instrumented {options['command']} runs yet"))
+            return
+
+        # Stage names in pipeline order, as the newest run recorded them
+        names = []
+        for run in runs[::-1]:
+            names += [stage["name"] for stage in run.stages if stage["name"] not in names]
+        values = {
+            name: [self.stage_value(run, name, metric) for run in runs] for name in names
+        }
+        values["total"] = [
+            run.wall_time if metric == "wall_time" else None for run in runs
+        ]
+
+        header = f"{'stage':<10}" + "".join(f"{run.started_at:%m-%d %H:%M}".rjust(13) for run in runs)
+        self.stdout.write(f"{options['command']} - {metric}, oldest to newest")
+        self.stdout.write(header)
+
+        regressions = []
+        for name, row in values.items():
+            self.stdout.write(f"{name:<10}" + "".join(self.format(v, metric).rjust(13) for v in row))
+            earlier = [v for v in row[:-1] if v]
+            if row[-1] is not None and earlier and row[-1] > median(earlier) * options["threshold"]:
+                regressions.append((name, row[-1], median(earlier)))
+
+        for name, latest, typical in regressions:
+            self.stdout.write(self.style.ERROR(
+                f"Regression in {name}: {self.format(latest, metric)} vs median "
+                f"{self.format(typical, metric)} over the previous {len(runs) - 1} runs"
+            ))
+        if not regressions and len(runs) > 1:
+            self.stdout.write(self.style.SUCCESS("No regressions"))
+
+    def stage_value(self, run, name, metric):
+        for stage in run.stages:
+            if stage["name"] == name:
+                return stage.get(metric)
+        return None
+
+    def format(self, value, metric):
+        if value is None:
+            return "-"
+        if metric == "rows_out":
+            return f"{value:,}"
+        if metric == "rss_mb":
+            return f"{value:.1f}MB"
+        if metric == "rss_delta_mb":
+            return f"{value:+.1f}MB"
+        return f"{value:.2f}s"
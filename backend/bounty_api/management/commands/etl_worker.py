@@ -0,0 +1,73 @@
+import logging
+import time
+from datetime import datetime
+from pathlib import Path
+from django.core.management.base import BaseCommand
+from bounty_api.etl.download import Downloader, DEFAULT_PER_HOST, DEFAULT_RETRIES, DEFAULT_TIMEOUT
+from bounty_api.etl.jobs import JobLost, worker_name, claim_job, run_job, requeue_stale, has_pending
+
+# Setup log dir
+log_dir = Path("logs")
+log_dir.mkdir(parents=True, exist_ok=True)
+log_file = log_dir / f"etl_worker_{datetime.now().strftime('%Y-%m-%d')}.log"
+
+logging.basicConfig(
+    filename=log_file,
+    level=logging.INFO,
+    format="%(asctime)s - %(levelname)s - %(message)s"
+)
+
+class Command(BaseCommand):
+    help = "Run queued per-set ETL jobs; start as many as you like, on any node"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch", help="Only take jobs from this batch")
+        parser.add_argument("--name", help="Worker name recorded on its jobs (default host:pid)")
+        parser.add_argument("--drain", action="store_true",
+                            help="Exit once no job is queued, including retries still waiting "
+                                 "out their delay, instead of polling forever")
+        parser.add_argument("--poll", type=float, default=2.0,
+                            help="Seconds between polls of an empty queue")
+        parser.add_argument("--max-jobs", type=int, help="Exit after this many jobs")
+        parser.add_argument("--per-host", type=int, default=DEFAULT_PER_HOST)
+        parser.add_argument("--retries", type=int, default=DEFAULT_RETRIES)
+        parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT)
+
+    def handle(self, *args, **options):
+        worker = options["name"] or worker_name()
+        done = failed = lost = 0
+        self.stdout.write(f"Worker {worker} started")
+
+        with Downloader(
+            workers=1, per_host=options["per_host"],
+            retries=options["retries"], timeout=options["timeout"],
+        ) as downloader:
+            while options["max_jobs"] is None or done + failed + lost < options["max_jobs"]:
+                job = claim_job(worker, options["batch"])
+                if job is None:
+                    # A dead worker's job counts as queued work, even when draining
+                    if requeue_stale():
+                        continue
+                    if options["drain"] and not has_pending(options["batch"]):
+                        break
+                    time.sleep(options["poll"])
+                    continue
+
+                start = time.perf_counter()
+                try:
+                    changes = run_job(job, downloader)
+                except JobLost as e:
+                    lost += 1
+                    self.stderr.write(self.style.WARNING(f"{e}, its new worker will finish it"))
+                    continue
+                except Exception as e:
+                    failed += 1
+                    self.stderr.write(self.style.ERROR(f"Set {job.set_id} failed: {e}"))
+                    continue
+                done += 1
+                self.stdout.write(
+                    f"Set {job.set_id} ({job.batch}): {changes.summary()} "
+                    f"in {time.perf_counter() - start:.2f}s"
+                )
+
+        self.stdout.write(self.style.SUCCESS(f"Worker {worker} finished: {done} done, {failed} failed, {lost} lost"))
@@ -0,0 +1,120 @@
+import logging
+import os
+from datetime import datetime
+from pathlib import Path
+from urllib.parse import urlparse
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db.models import Min
+
+from bounty_api.models import OnePieceCard, EtlRun
+from bounty_api.etl.download import Downloader, DownloadStats, FetchManifest, DEFAULT_PER_HOST
+from bounty_api.etl.metrics import RunMetrics
+
+# Setup log dir
+log_dir = Path("logs")
+log_dir.mkdir(parents=True, exist_ok=True)
+log_file = log_dir / f"get_images_{datetime.now().strftime('%Y-%m-%d')}.log"
+
+logging.basicConfig(
+    filename=log_file,
+    level=logging.INFO,
+    format="%(asctime)s - %(levelname)s - %(message)s"
+)
+
+CARDS_DIR = Path(settings.BASE_DIR).parent / "frontend" / "public" / "cards"
+MANIFEST_NAME = ".image_manifest.json"
+RUN_COMMAND = "get_images"
+
+
+def image_filename(card_id, image_url):
+    return os.path.basename(urlparse(image_url).path) or f"{card_id}.jpg"
+
+
+class Command(BaseCommand):
+    help = "Mirror card images into frontend/public/cards, fetching only new and changed ones"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--cards-dir", type=Path, default=CARDS_DIR)
+        parser.add_argument("--workers", type=int, default=16, help="Concurrent downloads")
+        parser.add_argument("--per-host", type=int, default=DEFAULT_PER_HOST * 2,
+                            help="Max concurrent connections to a single host")
+        parser.add_argument("--timeout", type=float, default=10)
+        parser.add_argument("--full", action="store_true",
+                            help="Revalidate every mirrored image, not just new and changed image URLs")
+
+    def handle(self, *args, **options):
+        cards_dir = options["cards_dir"]
+        cards_dir.mkdir(parents=True, exist_ok=True)
+        manifest = FetchManifest(cards_dir / MANIFEST_NAME)
+        metrics = RunMetrics()
+
+        new_jobs, revalidate_jobs, skipped = self.plan(cards_dir, manifest, options["full"])
+        print(
+            f"{len(new_jobs)} new images, {len(revalidate_jobs)} to revalidate, "
+            f"{skipped} already mirrored (not requested)"
+        )
+
+        with metrics.stage("download", rows_in=len(new_jobs) + len(revalidate_jobs)) as stage, Downloader(
+            workers=options["workers"],
+            per_host=options["per_host"],
+            timeout=options["timeout"],
+            manifest=manifest,
+            content_type="image/",
+        ) as downloader:
+            stats = downloader.download_all(new_jobs)
+            # A file is already there: a conditional GET, usually a 304
+            revalidated = downloader.download_all(revalidate_jobs, skip_existing=False)
+            stage.rows_out = stats.files + revalidated.files
+            stage.bytes = stats.bytes + revalidated.bytes
+
+        total = DownloadStats(
+            files=stats.files + revalidated.files,
+            unchanged=revalidated.unchanged,
+            skipped=stats.skipped + skipped,
+            failed=stats.failed + revalidated.failed,
+            bytes=stats.bytes + revalidated.bytes,
+            wall_time=stats.wall_time + revalidated.wall_time,
+        )
+        rate = total.files / total.wall_time if total.wall_time else 0
+        print(f"Images: {total.summary()}, {rate:,.1f} images/s")
+        logging.info(f"Images: {total.summary()}")
+
+        EtlRun.objects.create(
+            command=RUN_COMMAND,
+            run_date=datetime.now().date(),
+            rows_new=stats.files,
+            rows_changed=revalidated.files,
+            rows_unchanged=total.unchanged + total.skipped,
+            wall_time=metrics.wall_time,
+            stages=metrics.as_list(),
+        )
+        if total.failed:
+            self.stderr.write(self.style.WARNING(f"{total.failed} images failed, see {log_file}"))
+        self.stdout.write(self.style.SUCCESS("Image sync complete!"))
+
+    def plan(self, cards_dir, manifest, full=False):
+        """
+        Split image URLs into ones never mirrored, mirrored files whose URL is
+        not in the manifest (the card's image_url changed, or a new product
+        reuses the file name), which are fetched again, and the rest, which
+        are skipped without a request unless full is set. Prices moving never
+        queue an image.
+        """
+        # Foil variants share an image: one row per URL
+        images = (
+            OnePieceCard.objects.exclude(image_url__isnull=True).exclude(image_url="")
+            .order_by().values_list("image_url").annotate(card_id=Min("id"))
+        )
+        new_jobs, revalidate_jobs = [], []
+        skipped = 0
+        for url, card_id in images:
+            path = cards_dir / image_filename(card_id, url)
+            if not path.exists():
+                new_jobs.append((url, path))
+            elif full or manifest.get(url) is None:
+                revalidate_jobs.append((url, path))
+            else:
+                skipped += 1
+        return new_jobs, revalidate_jobs, skipped
@@ -1,306 +1,327 @@
 import logging
 from datetime import datetime
 from pathlib import Path
-import numpy as np
 import pandas as pd
-import requests
-import io
 
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
 from django.db import transaction
 
-from bounty_api.models import OnePieceSet, OnePieceCard, OnePieceCardHistory 
+from bounty_api.models import OnePieceSet, EtlRun
+from bounty_api.etl.cards import (
+    CardChanges, DEFAULT_MEMORY_LIMIT_MB, iter_batches,
+    KEY_FIELDS, CARD_TABLE, iter_set_frames, upsert_cards, update_prices, snapshot_history,
+)
+from bounty_api.etl.rollups import refresh_rollups
+from bounty_api.etl.shadow import etl_lock, card_load_table, shadow_supported
+from bounty_api.etl.cache import iter_day_frames
+from bounty_api.etl.metrics import RunMetrics, peak_rss_mb, run_json_path, files_size
+from bounty_api.etl.parse import list_set_csvs, read_price_csv
+from bounty_api.etl.sets import SetChanges, groups_frame, sync_sets
+from bounty_api.etl.jobs import new_batch, enqueue_sets, wait_for_batch, batch_changes
+from bounty_api.etl.download import (
+    Downloader, FetchManifest, TCGCSV_BASE_URL, DEFAULT_WORKERS, DEFAULT_PER_HOST,
+    DEFAULT_RETRIES, DEFAULT_TIMEOUT,
+)
 
 # Setup log dir
 log_dir = Path("logs")
 log_dir.mkdir(parents=True, exist_ok=True)
 log_file = log_dir / f"get_tcgcsv_{datetime.now().strftime('%Y-%m-%d')}.log"
 
+MANIFEST_PATH = Path("prices") / "fetch_manifest.json"
+
 logging.basicConfig(
     filename=log_file,
     level=logging.INFO,
     format="%(asctime)s - %(levelname)s - %(message)s"
 )
 
-CARD_SCHEMA = {
-    "product_id":   {"dtype": "int64",   "default": 0},
-    "foil_type":    {"dtype": "string",  "default": "Normal"},
-    "name":         {"dtype": "string",  "default": ""},
-    "image_url":    {"dtype": "string",  "default": None},
-    "tcgplayer_url":{"dtype": "string",  "default": None},
-    "market_price": {"dtype": "float64", "default": 0.0},
-    "rarity":       {"dtype": "string",  "default": None},
-    "card_id":      {"dtype": "string",  "default": None},
-    "description":  {"dtype": "string",  "default": None},
-    "color":        {"dtype": "string",  "default": None},
-    "card_type":    {"dtype": "string",  "default": None},
-    "life":         {"dtype": "int64",   "default": 0},
-    "power":        {"dtype": "int64",   "default": 0},
-    "subtype":      {"dtype": "string",  "default": None},
-    "attribute":    {"dtype": "string",  "default": None},
-    "cost":         {"dtype": "int64",   "default": 0},
-    "counter":      {"dtype": "int64",   "default": 0}
-}
-
 class Command(BaseCommand):
     help = "ETL pipeline for TCGCSV data into Django models"
 
-    def clean_df(self, df: pd.DataFrame) -> pd.DataFrame:
-        # Ensure all expected columns exist
-        df = df.reindex(columns=CARD_SCHEMA.keys())
-
-        # Replace common string-nulls
-        df = df.replace(to_replace=["nan", "NaN", "NaT", "NULL", "None"], value=np.nan)
-
-        for col, spec in CARD_SCHEMA.items():
-            dtype = spec["dtype"]
-            default = spec["default"]
-
-            if dtype == "int64":
-                df[col] = pd.to_numeric(df[col], errors="coerce").dropna().astype("int64")
-                if default is not None:
-                    df[col] = df[col].fillna(default)
-
-            elif dtype == "float64":
-                df[col] = pd.to_numeric(df[col], errors="coerce").astype("float64")
-                if default is not None:
-                    df[col] = df[col].fillna(default)
-
-            else:  # string-like
-                df[col] = df[col].astype("string")
-                if default is not None:
-                    df[col] = df[col].fillna(default)
-
-        return df
-
+    def add_arguments(self, parser):
+        parser.add_argument("--base-url", default=TCGCSV_BASE_URL,
+                            help="TCGCSV category root (point at a local server for offline runs)")
+        parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                            help="Concurrent downloads (1 = serial)")
+        parser.add_argument("--per-host", type=int, default=DEFAULT_PER_HOST,
+                            help="Max concurrent connections to a single host")
+        parser.add_argument("--retries", type=int, default=DEFAULT_RETRIES)
+        parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT,
+                            help="Per-file timeout in seconds")
+        parser.add_argument("--force-fetch", action="store_true",
+                            help="Ignore the fetch manifest: download and load every set")
+        parser.add_argument("--stream", action="store_true",
+                            help="Merge set files in bounded-memory batches instead of all at once")
+        parser.add_argument("--memory-limit", type=int, default=DEFAULT_MEMORY_LIMIT_MB,
+                            help="Batch size ceiling in MB for --stream")
+        parser.add_argument("--parse-workers", type=int, default=1,
+                            help="Processes used to parse and clean set files (1 = in-process)")
+        parser.add_argument("--no-cache", action="store_true",
+                            help="Ignore and don't write the cleaned Parquet cache")
+        parser.add_argument("--shadow", action="store_true",
+                            help="Build cards in a shadow table and swap it in at the end (PostgreSQL)")
+        parser.add_argument("--prices-only", action="store_true",
+                            help="Read only productId/subTypeName/marketPrice and update prices; "
+                                 "full rows are loaded only for cards not seen before")
+        parser.add_argument("--distributed", action="store_true",
+                            help="Queue one job per set for etl_worker processes, wait for them, "
+                                 "then write the history snapshot")
+        parser.add_argument("--wait-timeout", type=float,
+                            help="Give up waiting on workers after this many seconds (--distributed)")
+        parser.add_argument("--trace-memory", action="store_true",
+                            help="Record per-stage peak Python allocations with tracemalloc (slower)")
 
     def handle(self, *args, **options):
+        if options["distributed"]:
+            # Workers always run the full in-place merge
+            for option in ("shadow", "prices_only"):
+                if options[option]:
+                    raise CommandError(f"--{option.replace('_', '-')} can't be combined with --distributed")
+        self.set_changes = SetChanges()
+        self.base_url = options["base_url"].rstrip("/")
+        self.metrics = RunMetrics(trace_memory=options["trace_memory"])
+        shadow = options["shadow"]
+        if shadow and not shadow_supported():
+            self.stdout.write(self.style.WARNING("--shadow needs PostgreSQL, loading in place"))
+            shadow = False
         try:
-            set_ids = self.get_set_ids()
-            csv_dir = self.get_csvs(set_ids)
-            self.csv_etl(csv_dir)
+            if options["distributed"]:
+                with etl_lock():
+                    self.coordinate(options)
+                self.stdout.write(self.style.SUCCESS("ETL Complete!"))
+                return
+
+            with etl_lock():
+                manifest = None if options["force_fetch"] else FetchManifest(MANIFEST_PATH)
+                with self.metrics.stage("download") as stage, Downloader(
+                    workers=options["workers"],
+                    per_host=options["per_host"],
+                    retries=options["retries"],
+                    timeout=options["timeout"],
+                    manifest=manifest,
+                    save_manifest=False,
+                ) as self.downloader:
+                    set_ids = self.get_set_ids()
+                    csv_dir, changed_files = self.get_csvs(set_ids, stage)
+                with card_load_table(shadow) as card_table:
+                    self.csv_etl(
+                        csv_dir, options["stream"], options["memory_limit"],
+                        options["parse_workers"], not options["no_cache"], changed_files,
+                        card_table, options["prices_only"],
+                    )
+                # Only once the sets are loaded: if the ETL fails, the next run
+                # must see them as changed again instead of getting 304s
+                if manifest is not None:
+                    manifest.save()
             self.stdout.write(self.style.SUCCESS("ETL Complete!"))
         except Exception as e:
             logging.error(f"ETL error: {e}")
             self.stderr.write(self.style.ERROR(f"ETL error: {e}"))
 
+    def coordinate(self, options):
+        """
+        Distributed run: refresh the set list, queue a job per set and wait for
+        etl_worker processes to merge them. Only the history snapshot and the
+        run record happen here.
+        """
+        metrics = self.metrics
+        curr_date = datetime.now().date()
+        with metrics.stage("download"), Downloader(
+            workers=1,
+            retries=options["retries"],
+            timeout=options["timeout"],
+            manifest=None if options["force_fetch"] else FetchManifest(MANIFEST_PATH),
+        ) as self.downloader:
+            set_ids = self.get_set_ids()
+
+        batch = new_batch(curr_date)
+        queued = enqueue_sets(batch, curr_date, self.base_url, set_ids)
+        print(f"Queued {queued} set jobs as batch {batch}, waiting for etl_worker processes")
+        logging.info(f"Queued {queued} set jobs as batch {batch}")
+
+        last = {}
+        def progress(counts):
+            nonlocal last
+            if counts != last:
+                print(", ".join(f"{n} {status}" for status, n in counts.items()))
+                last = counts
+
+        with metrics.stage("workers", rows_in=queued) as stage:
+            counts = wait_for_batch(batch, timeout=options["wait_timeout"], progress=progress)
+            stage.rows_out = counts["done"]
+        if counts["failed"]:
+            self.stderr.write(self.style.WARNING(
+                f"{counts['failed']} set jobs failed, see etl_job for batch {batch}"
+            ))
+
+        changes = batch_changes(batch)
+        print(f"Cards: {changes.summary()}")
+        logging.info(f"Cards: {changes.summary()}")
+
+        with transaction.atomic():
+            with metrics.stage("history") as stage:
+                added_count = snapshot_history(curr_date)
+                stage.rows_out = added_count
+            with metrics.stage("rollups") as stage:
+                stage.rows_out = sum(refresh_rollups(curr_date, curr_date).values())
+            print(f"Inserted {added_count} history rows")
+            logging.info(f"Inserted {added_count} history rows for {curr_date}")
+
+            EtlRun.objects.create(
+                command="get_tcgcsv",
+                run_date=curr_date,
+                rows_new=changes.new,
+                rows_changed=changes.changed,
+                rows_unchanged=changes.unchanged,
+                history_rows=added_count,
+                sets_new=len(self.set_changes.new),
+                sets_changed=len(self.set_changes.changed),
+                peak_rss_mb=peak_rss_mb(),
+                wall_time=metrics.wall_time,
+                stages=metrics.as_list(),
+            )
+        metrics.write_json(
+            run_json_path("get_tcgcsv", curr_date),
+            command="get_tcgcsv", run_date=curr_date, distributed=True, batch=batch,
+            rows_new=changes.new, rows_changed=changes.changed, history_rows=added_count,
+        )
+
+    def load_prices(self, csv_dir, files, curr_date, card_table) -> CardChanges:
+        """
+        Read only the key and price columns and update prices in place. Cards
+        not in the table yet go through the full metadata path, reading only
+        the files they appear in.
+        """
+        metrics = self.metrics
+        frames = []
+        with metrics.stage("parse", bytes=files_size(files)) as stage:
+            for i, file in enumerate(files):
+                try:
+                    frames.append(read_price_csv(file).assign(source=i))
+                except Exception as e:
+                    logging.warning(f"Skipping {file}: {e}")
+            prices = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+            stage.rows_out += len(prices)
+        if prices.empty:
+            return CardChanges()
+
+        changes, unseen = update_prices(prices, curr_date, card_table, metrics)
+        if unseen.empty:
+            return changes
+
+        unseen_files = [files[i] for i in sorted(unseen["source"].unique())]
+        print(f"{len(unseen)} unseen cards, loading full rows from {len(unseen_files)} files")
+        logging.info(f"{len(unseen)} unseen cards, loading full rows from {len(unseen_files)} files")
+        frames = iter_set_frames(csv_dir, skip_errors=True, files=unseen_files)
+        frames = list(metrics.timed_iter("parse", frames))
+        full = pd.concat(frames, ignore_index=True).astype({"product_id": "int64"})
+        full = full.merge(unseen[KEY_FIELDS], on=KEY_FIELDS, how="inner")
+        return changes + upsert_cards(full, curr_date, card_table, metrics)
+
     def get_set_ids(self):
         print("Downloading set list...")
-        url = "https://tcgcsv.com/tcgplayer/68/Groups.csv"
+        url = f"{self.base_url}/Groups.csv"
         logging.info("Downloading set list...")
-        response = requests.get(url)
-        response.raise_for_status()
-
-        df = pd.read_csv(io.StringIO(response.text))
         db_set_ids = set(OnePieceSet.objects.values_list("id", flat=True))
+        content = self.downloader.fetch(url, conditional=bool(db_set_ids))
+        if content is None:
+            print("Set list unchanged since last fetch")
+            logging.info("Set list unchanged since last fetch")
+            return sorted(db_set_ids)
 
-        if len(db_set_ids) != len(df):
-            logging.info("New set(s) found, updating CardSet table...")
-            for _, row in df.iterrows():
-                OnePieceSet.objects.update_or_create(
-                    id=row["groupId"],
-                    defaults={
-                        "name": row["abbreviation"].replace(" ", "_"),
-                        "description": row["name"],
-                    }
-                )
-        print("Set list up to date")
+        self.set_changes = sync_sets(groups_frame(content))
+        logging.info(f"Sets: {self.set_changes.summary()}")
+        print(f"Set list up to date ({self.set_changes.summary()})")
 
         return list(OnePieceSet.objects.values_list("id", flat=True))
 
-    def get_csvs(self, set_list):
+    def get_csvs(self, set_list, stage=None):
         print("Fetching most recent price lists")
         # curr_date = '2025-10-23'
         curr_date = datetime.today().strftime("%Y-%m-%d")
         prices_dir = Path("prices") / curr_date
         prices_dir.mkdir(parents=True, exist_ok=True)
 
-        for count, set_id in enumerate(set_list):
-            file_path = prices_dir / f"group_{set_id}.csv"
-            csv_url = f"https://tcgcsv.com/tcgplayer/68/{set_id}/ProductsAndPrices.csv"
-            print(f"\rLoading CSV: {file_path} ({count+1}/{len(set_list)})", end='', flush=True)
-
-            if file_path.exists():
-                logging.info(f"CSV already exists: {file_path}")
-                continue
-
-            try:
-                response = requests.get(csv_url)
-                response.raise_for_status()
-                with open(file_path, "wb") as f:
-                    f.write(response.content)
-                logging.info(f"Downloaded {file_path}")
-            except Exception as e:
-                logging.error(f"Error downloading {set_id}: {e}")
-        print()
+        jobs = [
+            (f"{self.base_url}/{set_id}/ProductsAndPrices.csv", prices_dir / f"group_{set_id}.csv")
+            for set_id in set_list
+        ]
+        stats = self.downloader.download_all(jobs)
+        if stage is not None:
+            stage.rows_in += len(jobs)
+            stage.rows_out += stats.files
+            stage.bytes += stats.bytes
 
-        print("... Complete!")
+        print(f"... Complete! {stats.summary()}")
+        logging.info(f"Download stage: {stats.summary()}")
 
-        return prices_dir
+        # Sets with no changes since the last fetch are skipped by the ETL
+        return prices_dir, stats.changed_paths
 
     @transaction.atomic
-    def csv_etl(self, csv_dir: Path):
-        EXPECTED_INPUT = [
-            "productId", "name", "imageUrl", "url", "marketPrice",
-            "subTypeName", "extRarity", "extNumber", "extDescription", "extColor",
-            "extCardType", "extLife", "extPower", "extSubtypes",
-            "extAttribute", "extCost", "extCounterplus"
-        ]
-
+    def csv_etl(self, csv_dir: Path, stream=False, memory_limit_mb=DEFAULT_MEMORY_LIMIT_MB,
+                parse_workers=1, use_cache=True, files=None, card_table=CARD_TABLE,
+                prices_only=False):
         # curr_date = '2025-10-23'
-        curr_date = datetime.now()
-        csv_list = list(csv_dir.iterdir())
-        df_list = []
-
-        for file in csv_list:
-            logging.info(f'ETL for file: {file}')
-            try:
-                df = pd.read_csv(file)
-            except Exception as e:
-                continue
-
-            for col in EXPECTED_INPUT:
-                if col not in df.columns:
-                    df[col] = pd.NA
-
-            df["extSubtypes"] = df["extSubtypes"].str.replace(";", "/", regex=False)
-            df["extColor"] = df["extColor"].str.replace(";", "/", regex=False)
-
-            df = df.rename(columns={
-                "productId": "product_id",
-                "name": "name",
-                "imageUrl": "image_url",
-                "url": "tcgplayer_url",
-                "marketPrice": "market_price",
-                "subTypeName": "foil_type",
-                "extRarity": "rarity",
-                "extNumber": "card_id",
-                "extDescription": "description",
-                "extColor": "color",
-                "extCardType": "card_type",
-                "extLife": "life",
-                "extPower": "power",
-                "extSubtypes": "subtype",
-                "extAttribute": "attribute",
-                "extCost": "cost",
-                "extCounterplus": "counter",
-            })
-
-            df_list.append(self.clean_df(df))
-
-        print("Dataframe cleaning complete")
-        logging.info("Dataframe cleaning complete")
-        df_all = pd.concat(df_list, ignore_index=True)
-
-        # Separate new vs existing cards
-        existing_pairs = set(
-            OnePieceCard.objects.values_list("product_id", "foil_type")
-        )
-        new_rows = df_all[
-            ~df_all.apply(lambda row: (row["product_id"], row["foil_type"]) in existing_pairs, axis=1)
-        ]
-        existing_rows = df_all[
-            df_all.apply(lambda row: (row["product_id"], row["foil_type"]) in existing_pairs, axis=1)
-        ]
-
-        # Bulk-Create any new cards
-        print("Bulk create")
-        logging.info("Starting bulk insert for table one_piece_card")
-        new_cards = [
-            OnePieceCard(
-                product_id=row["product_id"],
-                foil_type=row["foil_type"],
-                name=row["name"],
-                image_url=row["image_url"],
-                tcgplayer_url=row["tcgplayer_url"],
-                market_price=row["market_price"] or 0,
-                rarity=row["rarity"],
-                card_id=row["card_id"],
-                description=row["description"],
-                color=row["color"],
-                card_type=row["card_type"],
-                life=row["life"] if pd.notna(row["life"]) else None,
-                power=row["power"] if pd.notna(row["power"]) else None,
-                subtype=row["subtype"],
-                attribute=row["attribute"],
-                cost=row["cost"] if pd.notna(row["cost"]) else None,
-                counter=row["counter"] if pd.notna(row["counter"]) else None,
-                last_update=curr_date,
+        curr_date = datetime.now().date()
+        metrics = self.metrics
+        input_files = files if files is not None else list_set_csvs(csv_dir)
+
+        print("Bulk upsert")
+        logging.info(f"Starting bulk upsert for table {card_table}")
+        if prices_only:
+            changes = self.load_prices(csv_dir, input_files, curr_date, card_table)
+        else:
+            frames = iter_day_frames(
+                csv_dir, skip_errors=True, workers=parse_workers, use_cache=use_cache, files=files
             )
-            for _, row in new_rows.iterrows()
-        ]
-        OnePieceCard.objects.bulk_create(new_cards, batch_size=1000)
-        print(f"Inserted {len(new_cards)} new cards,")
-        logging.info(f"Inserted {len(new_cards)} new cards")
-
-        # Bulk-Update existing cards
-        print("Bulk update")
-        logging.info("Starting bulk update for table one_piece_card")
-        existing_cards = {
-            (c.product_id, c.foil_type): c
-            for c in OnePieceCard.objects.filter(
-                product_id__in=existing_rows["product_id"].unique(),
-                foil_type__in=existing_rows["foil_type"].unique()
-            ).exclude(last_update=curr_date)
-        }
-
-        to_update = []
-        for _, row in existing_rows.iterrows():
-            card = existing_cards.get((row["product_id"], row["foil_type"]))
-            if not card:
-                continue  # safety check
-
-            card.name = row["name"]
-            card.image_url = row["image_url"]
-            card.tcgplayer_url = row["tcgplayer_url"]
-            card.market_price = row["market_price"] or 0
-            card.rarity = row["rarity"]
-            card.card_id = row["card_id"]
-            card.description = row["description"]
-            card.color = row["color"]
-            card.card_type = row["card_type"]
-            card.life = row["life"] if pd.notna(row["life"]) else None
-            card.power = row["power"] if pd.notna(row["power"]) else None
-            card.subtype = row["subtype"]
-            card.attribute = row["attribute"]
-            card.cost = row["cost"] if pd.notna(row["cost"]) else None
-            card.counter = row["counter"] if pd.notna(row["counter"]) else None
-            card.last_update = curr_date
-            to_update.append(card)
-
-        OnePieceCard.objects.bulk_update(
-            to_update,
-            fields=[
-                "name", "image_url", "tcgplayer_url",
-                "market_price", "rarity", "card_id", "description", "color",
-                "card_type", "life", "power", "subtype", "attribute", "cost",
-                "counter", "last_update"
-            ],
-            batch_size=1000,
-        )
+            frames = metrics.timed_iter("parse", frames, bytes=files_size(input_files))
 
-        # Update last_update for any cards that were not included in CSVs
-        OnePieceCard.objects.exclude(last_update=curr_date).update(last_update=curr_date)
+            if stream:
+                batches = iter_batches(frames, memory_limit_mb)
+            else:
+                frames = list(frames)
+                batches = [pd.concat(frames, ignore_index=True)] if frames else []
 
-        print(f"updated {len(to_update)} existing cards,")
-        logging.info(f"updated {len(to_update)} existing cards")
+            # Write only new and changed cards
+            changes = CardChanges()
+            for batch in batches:
+                changes += upsert_cards(batch, curr_date, card_table, metrics)
+        print(f"Cards: {changes.summary()}")
+        logging.info(f"Cards: {changes.summary()}")
 
         # Bulk-Create history rows
         print("Bulk history")
         logging.info("Starting bulk insert for table one_piece_card_history")
-        
-        all_cards = OnePieceCard.objects.all()
-        history_objs = [
-            OnePieceCardHistory(
-                card_id=card.id,
-                history_date=curr_date,
-                market_price=card.market_price or 0,
-            )
-            for card in all_cards
-        ]
-        OnePieceCardHistory.objects.bulk_create(history_objs, batch_size=1000, ignore_conflicts=True)
-
-        added_count = all_cards.count()
+        with metrics.stage("history") as stage:
+            added_count = snapshot_history(curr_date, card_table)
+            stage.rows_out = added_count
+        with metrics.stage("rollups") as stage:
+            stage.rows_out = sum(refresh_rollups(curr_date, curr_date, card_table).values())
 
         print(f"Inserted {added_count} history rows")
-        logging.info(f"Inserted {added_count} history rows for {curr_date}")
\ No newline at end of file
+        logging.info(f"Inserted {added_count} history rows for {curr_date}")
+        print(f"Peak RSS: {peak_rss_mb():.1f} MB")
+        logging.info(f"Peak RSS: {peak_rss_mb():.1f} MB")
+        print(metrics.summary())
+        logging.info(f"Stages:\n{metrics.summary()}")
+
+        EtlRun.objects.create(
+            command="get_tcgcsv",
+            run_date=curr_date,
+            rows_new=changes.new,
+            rows_changed=changes.changed,
+            rows_unchanged=changes.unchanged,
+            history_rows=added_count,
+            sets_new=len(self.set_changes.new),
+            sets_changed=len(self.set_changes.changed),
+            peak_rss_mb=peak_rss_mb(),
+            wall_time=metrics.wall_time,
+            stages=metrics.as_list(),
+        )
+        metrics.write_json(
+            run_json_path("get_tcgcsv", curr_date),
+            command="get_tcgcsv", run_date=curr_date,
+            rows_new=changes.new, rows_changed=changes.changed, history_rows=added_count,
+        )
@@ -0,0 +1,87 @@
+import logging
+from datetime import datetime
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from bounty_api.etl.partitions import (
+    is_partitioned, list_partitions, ensure_partitions, detach_partition,
+    archive_table, drop_table, as_date,
+)
+
+# Setup log dir
+log_dir = Path("logs")
+log_dir.mkdir(parents=True, exist_ok=True)
+log_file = log_dir / f"history_partitions_{datetime.now().strftime('%Y-%m-%d')}.log"
+
+logging.basicConfig(
+    filename=log_file,
+    level=logging.INFO,
+    format="%(asctime)s - %(levelname)s - %(message)s"
+)
+
+# Outside prices/, whose subdirectories db_reload treats as dated CSV dumps
+ARCHIVE_DIR = Path("history_archive")
+
+
+class Command(BaseCommand):
+    help = "List, pre-create, detach and archive the monthly partitions of one_piece_card_history"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--create-through", type=as_date, metavar="YYYY-MM-DD",
+                            help="Create any missing partitions from today through this date")
+        parser.add_argument("--detach-before", type=as_date, metavar="YYYY-MM-DD",
+                            help="Detach every partition that ends on or before this date")
+        parser.add_argument("--archive", action="store_true",
+                            help="With --detach-before, write each detached partition to "
+                                 "gzipped CSV and drop it")
+        parser.add_argument("--archive-dir", type=Path, default=ARCHIVE_DIR)
+
+    def handle(self, *args, **options):
+        if not is_partitioned():
+            raise CommandError("one_piece_card_history is not partitioned (PostgreSQL only)")
+        if options["archive"] and not options["detach_before"]:
+            raise CommandError("--archive needs --detach-before")
+
+        if options["create_through"]:
+            created = ensure_partitions(datetime.now().date(), options["create_through"])
+            for name in created:
+                logging.info(f"Created partition {name}")
+            self.stdout.write(f"Created {len(created)} partitions")
+
+        if options["detach_before"]:
+            self.detach(options["detach_before"], options["archive"], options["archive_dir"])
+
+        self.list()
+
+    def detach(self, before, archive, archive_dir):
+        old = [p for p in list_partitions() if p.end <= before]
+        if not old:
+            self.stdout.write(f"No partitions end on or before {before}")
+            return
+        for partition in old:
+            # Each partition in its own transaction, so an archive failure keeps the rest
+            with transaction.atomic():
+                detached = detach_partition(partition.name)
+                message = f"Detached {partition.name} ({partition.start} to {partition.end})"
+                if archive:
+                    path = archive_dir / f"{partition.name}.csv.gz"
+                    size = archive_table(detached, path)
+                    drop_table(detached)
+                    message += f", archived to {path} ({size / 1024 / 1024:.2f} MB) and dropped"
+                else:
+                    message += f" as {detached}"
+            logging.info(message)
+            self.stdout.write(message)
+
+    def list(self):
+        partitions = list_partitions()
+        self.stdout.write(f"{'partition':<36} {'from':<11} {'to':<11} {'rows (est.)':>12} {'size':>10}")
+        for p in partitions:
+            rows = f"{p.rows:,}" if p.rows >= 0 else "-"
+            self.stdout.write(
+                f"{p.name:<36} {p.start!s:<11} {p.end!s:<11} {rows:>12} {p.bytes / 1024 / 1024:>8.2f}MB"
+            )
+        total = sum(p.bytes for p in partitions)
+        self.stdout.write(f"{len(partitions)} partitions, {total / 1024 / 1024:.2f} MB")
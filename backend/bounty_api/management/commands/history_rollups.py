@@ -0,0 +1,51 @@
+import logging
+import time
+from datetime import datetime
+from pathlib import Path
+
+from django.core.management.base import BaseCommand
+
+from bounty_api.etl.partitions import as_date
+from bounty_api.etl.rollups import ROLLUPS, refresh_rollups, history_bounds
+from bounty_api.etl.runs import DEFAULT_CHUNK_CARDS
+
+# Setup log dir
+log_dir = Path("logs")
+log_dir.mkdir(parents=True, exist_ok=True)
+log_file = log_dir / f"history_rollups_{datetime.now().strftime('%Y-%m-%d')}.log"
+
+logging.basicConfig(
+    filename=log_file,
+    level=logging.INFO,
+    format="%(asctime)s - %(levelname)s - %(message)s"
+)
+
+
+class Command(BaseCommand):
+    help = "Rebuild the weekly and monthly OHLC price rollups from history (the ETL keeps them current)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--since", type=as_date, metavar="YYYY-MM-DD",
+                            help="Only rebuild periods from this date on (default: all history)")
+        parser.add_argument("--chunk", type=int, default=DEFAULT_CHUNK_CARDS,
+                            help="Cards rolled up per transaction")
+
+    def handle(self, *args, **options):
+        first, last = history_bounds()
+        if first is None:
+            self.stdout.write(self.style.WARNING("No price history to roll up"))
+            return
+        start_date = max(first, options["since"]) if options["since"] else first
+
+        start = time.perf_counter()
+        written = refresh_rollups(start_date, last, chunk_cards=options["chunk"])
+        elapsed = time.perf_counter() - start
+
+        for granularity in ROLLUPS:
+            model = ROLLUPS[granularity][0]
+            self.stdout.write(
+                f"{granularity:<6} {written[granularity]:>10,} rows written, "
+                f"{model.objects.count():>10,} in {model._meta.db_table}"
+            )
+        logging.info(f"Rolled up {start_date} to {last}: {written} in {elapsed:.1f}s")
+        self.stdout.write(self.style.SUCCESS(f"Rolled up {start_date} to {last} in {elapsed:.1f}s"))
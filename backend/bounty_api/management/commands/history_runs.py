@@ -0,0 +1,81 @@
+import logging
+import time
+from datetime import datetime
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import F, Max, Sum
+
+from bounty_api.models import OnePieceCardHistory, OnePieceCardPriceRun
+from bounty_api.etl.runs import (
+    DEFAULT_CHUNK_CARDS, RUN_TABLE, HISTORY_TABLE, convert_history, table_bytes,
+)
+
+# Setup log dir
+log_dir = Path("logs")
+log_dir.mkdir(parents=True, exist_ok=True)
+log_file = log_dir / f"history_runs_{datetime.now().strftime('%Y-%m-%d')}.log"
+
+logging.basicConfig(
+    filename=log_file,
+    level=logging.INFO,
+    format="%(asctime)s - %(levelname)s - %(message)s"
+)
+
+
+class Command(BaseCommand):
+    help = "Convert daily price history into change-only price runs and report the storage saved"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--convert", action="store_true",
+                            help="Rebuild one_piece_card_price_run from one_piece_card_history")
+        parser.add_argument("--chunk", type=int, default=DEFAULT_CHUNK_CARDS,
+                            help="Cards converted per transaction")
+
+    def handle(self, *args, **options):
+        if options["convert"]:
+            # Runs written nightly with HISTORY_STORE = "runs" have no daily rows to rebuild from
+            last_daily = OnePieceCardHistory.objects.aggregate(last=Max("history_date"))["last"]
+            newer = OnePieceCardPriceRun.objects.exclude(valid_to__lte=last_daily) if last_daily else None
+            if newer is not None and newer.exists():
+                raise CommandError(
+                    f"Price runs extend past the last daily history ({last_daily}); "
+                    f"converting would drop them"
+                )
+            start = time.perf_counter()
+            daily, runs = convert_history(options["chunk"], progress=self.progress)
+            elapsed = time.perf_counter() - start
+            print(f"Converted {daily:,} daily rows into {runs:,} runs in {elapsed:.1f}s")
+            logging.info(f"Converted {daily} daily rows into {runs} runs in {elapsed:.1f}s")
+        self.report()
+        if settings.HISTORY_STORE != "runs":
+            self.stdout.write("HISTORY_STORE is \"daily\"; set it to \"runs\" to write and serve runs")
+
+    def progress(self, done, total, daily, runs):
+        print(f"  {done:,}/{total:,} cards, {daily:,} rows -> {runs:,} runs")
+
+    def report(self):
+        daily_rows = OnePieceCardHistory.objects.count()
+        run_rows = OnePieceCardPriceRun.objects.count()
+        # Days the runs expand back to; equal to daily_rows right after a conversion
+        covered = OnePieceCardPriceRun.objects.aggregate(
+            days=Sum(F("valid_to") - F("valid_from"))
+        )["days"]
+        covered_days = (covered.days if covered else 0) + run_rows
+
+        self.stdout.write(f"{'store':<12} {'rows':>14} {'size':>12}")
+        sizes = {}
+        for label, table, rows in (("daily", HISTORY_TABLE, daily_rows), ("runs", RUN_TABLE, run_rows)):
+            sizes[label] = table_bytes(table)
+            size = f"{sizes[label] / 1024 / 1024:.2f}MB" if sizes[label] is not None else "-"
+            self.stdout.write(f"{label:<12} {rows:>14,} {size:>12}")
+
+        if run_rows:
+            self.stdout.write(f"Runs cover {covered_days:,} card-days, {covered_days / run_rows:.1f} days per run")
+        if daily_rows and run_rows:
+            line = f"Row reduction: {daily_rows / run_rows:.1f}x"
+            if sizes["daily"] and sizes["runs"]:
+                line += f", storage reduction: {sizes['daily'] / sizes['runs']:.1f}x"
+            self.stdout.write(self.style.SUCCESS(line))
+            logging.info(line)
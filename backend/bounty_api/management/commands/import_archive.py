@@ -0,0 +1,78 @@
+import time
+from pathlib import Path
+from django.core.management.base import BaseCommand, CommandError
+from bounty_api.etl.archive import ONE_PIECE_CATEGORY, archive_support, read_archive_prices
+from bounty_api.etl.history import (
+    card_reference_frame, imported_dates, load_history_date, fill_history_gaps,
+)
+from bounty_api.etl.parse import parse_history_date
+from bounty_api.etl.rollups import refresh_rollups
+
+RUN_COMMAND = "import_history"
+
+class Command(BaseCommand):
+    help = "Import historical prices straight from TCGCSV prices-YYYY-MM-DD.ppmd.7z archives"
+
+    def add_arguments(self, parser):
+        parser.add_argument("archives", nargs="+", type=Path, help="Archive files to import")
+        parser.add_argument("--category", type=int, default=ONE_PIECE_CATEGORY,
+                            help="TCGplayer category to import (68 = One Piece)")
+        parser.add_argument("--redo", action="store_true",
+                            help="Re-import dates already recorded as imported")
+
+    def handle(self, *args, **options):
+        if not archive_support():
+            raise CommandError("import_archive needs py7zr (pip install py7zr)")
+
+        df_cards = card_reference_frame()
+        # Shares import_history's resume records: a date is done whichever way it came in
+        done = set() if options["redo"] else imported_dates(RUN_COMMAND)
+
+        history_dates = []
+        total_inserted = 0
+        start = time.perf_counter()
+
+        for archive in options["archives"]:
+            if not archive.is_file():
+                self.stderr.write(self.style.ERROR(f"{archive} is not a file"))
+                continue
+
+            dates, errors = read_archive_prices(archive, options["category"])
+            for date_errors in errors.values():
+                for error in date_errors:
+                    self.stderr.write(self.style.ERROR(error))
+            if not dates:
+                self.stdout.write(self.style.WARNING(
+                    f"No category {options['category']} prices in {archive}"
+                ))
+                continue
+
+            for name, columns in sorted(dates.items()):
+                history_date = parse_history_date(name)
+                history_dates.append(history_date)
+                if history_date in done:
+                    self.stdout.write(f"Skipping {name}: already imported")
+                    continue
+
+                date_errors = errors.get(name, [])
+                priced = load_history_date(columns, df_cards, history_date, RUN_COMMAND, date_errors)
+                total_inserted += priced
+                self.stdout.write(f"Inserted {priced} priced rows for {history_date} from {archive.name}")
+                if date_errors:
+                    self.stderr.write(self.style.WARNING(
+                        f"Not recording {name} as imported: {len(date_errors)} files failed, it is retried next run"
+                    ))
+
+        if history_dates:
+            first, last = min(history_dates), max(history_dates)
+            filled = fill_history_gaps(first, last)
+            total_inserted += filled
+            self.stdout.write(f"Carried forward {filled} missing prices for {first} to {last}")
+            written = refresh_rollups(first, last)
+            self.stdout.write(f"Refreshed {written['week']} weekly and {written['month']} monthly rollups")
+
+        elapsed = time.perf_counter() - start
+        rate = total_inserted / elapsed if elapsed else 0
+        self.stdout.write(self.style.SUCCESS(
+            f"Done! Inserted total {total_inserted} rows in {elapsed:.1f}s ({rate:,.0f} rows/s)."
+        ))
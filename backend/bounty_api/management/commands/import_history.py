@@ -1,160 +1,110 @@
 import os
-import json
+import time
 from pathlib import Path
-import numpy as np
-import pandas as pd
-from datetime import datetime
 from django.core.management.base import BaseCommand
-from django.db import transaction
-from bounty_api.models import OnePieceCard, OnePieceCardHistory
+from bounty_api.etl.history import (
+    card_reference_frame, imported_dates, load_history_date, fill_history_gaps,
+)
+from bounty_api.etl.parse import parse_date_dir, parse_history_date
+from bounty_api.etl.parallel import iter_pool_results
+from bounty_api.etl.rollups import refresh_rollups
 
-HISTORY_SCHEMA = {
-    "product_id":   {"dtype": "int64",   "default": 0},
-    "foil_type":    {"dtype": "string",  "default": "Normal"},
-    "market_price": {"dtype": "float64", "default": 0.0},
-}
+RUN_COMMAND = "import_history"
 
 class Command(BaseCommand):
     help = "Import historical price data from JSON directories into OnePieceCardHistory"
 
-    def clean_df(self, df: pd.DataFrame) -> pd.DataFrame:
-        # Ensure all expected columns exist
-        df = df.reindex(columns=HISTORY_SCHEMA.keys())
-
-        # Replace common string-nulls
-        df = df.replace(to_replace=["nan", "NaN", "NaT", "NULL", "None"], value=np.nan)
-
-        for col, spec in HISTORY_SCHEMA.items():
-            dtype = spec["dtype"]
-            default = spec["default"]
-
-            if dtype == "int64":
-                df[col] = pd.to_numeric(df[col], errors="coerce").dropna().astype("int64")
-                if default is not None:
-                    df[col] = df[col].fillna(default)
-
-            elif dtype == "float64":
-                df[col] = pd.to_numeric(df[col], errors="coerce").astype("float64")
-                if default is not None:
-                    df[col] = df[col].fillna(default)
-
-            else:  # string-like
-                df[col] = df[col].astype("string")
-                if default is not None:
-                    df[col] = df[col].fillna(default)
-
-        return df
+    def add_arguments(self, parser):
+        parser.add_argument("--base-dir", default="prices/prev",
+                            help="Directory of YYYY-MM-DD folders holding <group>/prices files")
+        parser.add_argument("--workers", type=int, default=1,
+                            help="Processes parsing dated folders in parallel (1 = in-process)")
+        parser.add_argument("--redo", action="store_true",
+                            help="Re-import dates already recorded as imported")
 
     def handle(self, *args, **options):
-        base_dir = Path('prices/prev')
+        base_dir = Path(options["base_dir"])
 
         if not os.path.isdir(base_dir):
             self.stderr.write(self.style.ERROR(f"{base_dir} is not a valid directory"))
             return
 
         # Load card reference once
-        cards = OnePieceCard.objects.all().values("id", "product_id", "foil_type")
-        df_cards = pd.DataFrame.from_records(cards)
+        df_cards = card_reference_frame()
 
-        total_inserted = 0
+        # Resume: dates finished by an earlier run are skipped
+        done = set()
+        if not options["redo"]:
+            done = imported_dates(RUN_COMMAND)
 
+        folders = []
+        dates = []
         for folder in sorted(os.listdir(base_dir)):
-            inserted_for_date = 0
-            folder_path = os.path.join(base_dir, folder)
-            if not os.path.isdir(folder_path):
+            folder_path = base_dir / folder
+            if not folder_path.is_dir():
                 continue
 
             # Try parsing folder name as date (YYYY-MM-DD)
-            try:
-                history_date = datetime.strptime(folder, "%Y-%m-%d").date()
-            except ValueError:
+            history_date = parse_history_date(folder)
+            if history_date is None:
                 self.stdout.write(self.style.WARNING(f"Skipping {folder}: not a valid date folder"))
                 continue
+            dates.append(history_date)
+            if history_date in done:
+                self.stdout.write(f"Skipping {folder}: already imported")
+                continue
+            folders.append(folder_path)
 
-            # Process each JSON file in this folder
-            for dir_path in os.listdir(folder_path):
-                fname = os.path.join(dir_path, 'prices')
-                fpath = os.path.join(folder_path, fname)
-                try:
-                    with open(fpath, "r") as f:
-                        raw_data = json.load(f)
-                except Exception as e:
-                    self.stderr.write(self.style.ERROR(f"Failed to load {fpath}: {e}"))
-                    continue
-                df_prices = pd.DataFrame(raw_data.get("results", []))
-                if df_prices.empty:
-                    self.stdout.write(f"Skipping empty file {fpath}")
-                    continue
-
-                # Keep relevant fields
-                df_prices = df_prices[['productId','subTypeName','marketPrice']]
-                df_prices = df_prices.rename(columns={
-                    "productId": "product_id",
-                    "subTypeName": "foil_type",
-                    "marketPrice": "market_price"
-                })
-
-                # Ensure numeric
-                # df_prices["market_price"] = pd.to_numeric(df_prices["market_price"], errors="coerce")
-                df_prices = self.clean_df(df_prices)
-
-                # Merge with card table
-                merged = df_prices.merge(
-                    df_cards,
-                    on=["product_id", "foil_type"],
-                    how="inner",
-                )
-
-                # Deduplicate just in case
-                merged = merged.drop_duplicates(subset=["id", "product_id", "foil_type", "market_price"])
-
-                # Convert to model instances
-                history_objs = [
-                    OnePieceCardHistory(
-                        card_id=row["id"],
-                        history_date=history_date,
-                        market_price=row["market_price"],
-                    )
-                    for _, row in merged.iterrows()
-                ]
-
-                if not history_objs:
-                    self.stdout.write(f"No matching rows found in {fpath}")
-                    continue
-
-                with transaction.atomic():
-                    OnePieceCardHistory.objects.bulk_create(
-                        history_objs, ignore_conflicts=True, batch_size=5000
-                    )
-
-                inserted_for_date += len(history_objs)
-                total_inserted += len(history_objs)
-                # self.stdout.write(self.style.SUCCESS(f"Inserted {len(history_objs)} rows from {fpath}"))
-
-            # --- fill in missing cards (those not in JSONs) ---
-            existing_card_ids = OnePieceCardHistory.objects.filter(
-                history_date=history_date
-            ).values_list("card_id", flat=True)
-
-            missing_cards = OnePieceCard.objects.exclude(id__in=existing_card_ids)
-
-            filler_objs = [
-                OnePieceCardHistory(
-                    card_id=c.id,
-                    history_date=history_date,
-                    market_price=c.market_price or 0,  # fall back to current card value
-                )
-                for c in missing_cards
-            ]
-
-            if filler_objs:
-                with transaction.atomic():
-                    OnePieceCardHistory.objects.bulk_create(
-                        filler_objs, ignore_conflicts=True, batch_size=5000
-                    )
-                inserted_for_date += len(filler_objs)
-
-            total_inserted += inserted_for_date
-            self.stdout.write(f"Inserted {inserted_for_date} rows for {history_date}")
-
-        self.stdout.write(self.style.SUCCESS(f"Done! Inserted total {total_inserted} rows."))
+        total_inserted = 0
+        start = time.perf_counter()
+
+        for name, columns, n_files, errors in self.parse_folders(folders, options["workers"]):
+            for error in errors:
+                self.stderr.write(self.style.ERROR(error))
+
+            history_date = parse_history_date(name)
+            inserted = self.load_date(columns, df_cards, history_date, errors)
+            total_inserted += inserted
+            if errors:
+                self.stderr.write(self.style.WARNING(
+                    f"Not recording {name} as imported: {len(errors)} files failed, it is retried next run"
+                ))
+
+        if dates:
+            total_inserted += self.fill_gaps(min(dates), max(dates))
+            written = refresh_rollups(min(dates), max(dates))
+            self.stdout.write(f"Refreshed {written['week']} weekly and {written['month']} monthly rollups")
+
+        elapsed = time.perf_counter() - start
+        rate = total_inserted / elapsed if elapsed else 0
+        self.stdout.write(self.style.SUCCESS(
+            f"Done! Inserted total {total_inserted} rows in {elapsed:.1f}s ({rate:,.0f} rows/s)."
+        ))
+
+    def parse_folders(self, folders, workers):
+        if workers > 1:
+            for _, future in iter_pool_results(parse_date_dir, folders, workers):
+                yield future.result()
+        else:
+            for folder in folders:
+                yield parse_date_dir(folder)
+
+    def load_date(self, columns, df_cards, history_date, errors) -> int:
+        start = time.perf_counter()
+        inserted = load_history_date(columns, df_cards, history_date, RUN_COMMAND, errors)
+
+        elapsed = time.perf_counter() - start
+        rate = inserted / elapsed if elapsed else 0
+        self.stdout.write(f"Inserted {inserted} priced rows for {history_date} ({rate:,.0f} rows/s)")
+        return inserted
+
+    def fill_gaps(self, start_date, end_date) -> int:
+        # Covers skipped dates too, so an interrupted run gets its gaps filled on resume
+        start = time.perf_counter()
+        filled = fill_history_gaps(start_date, end_date)
+
+        elapsed = time.perf_counter() - start
+        self.stdout.write(
+            f"Carried forward {filled} missing prices for {start_date} to {end_date} in {elapsed:.1f}s"
+        )
+        return filled
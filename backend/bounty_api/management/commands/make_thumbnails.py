@@ -0,0 +1,113 @@
+import logging
+import os
+from datetime import datetime
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from bounty_api.models import EtlRun
+from bounty_api.etl.images import (
+    SIZES, FORMATS, image_support, available_formats, list_sources, content_hash,
+    render_derivatives, DerivativeManifest,
+)
+from bounty_api.etl.metrics import RunMetrics
+from bounty_api.etl.parallel import iter_pool_results
+from bounty_api.management.commands.get_images import CARDS_DIR
+
+# Setup log dir
+log_dir = Path("logs")
+log_dir.mkdir(parents=True, exist_ok=True)
+log_file = log_dir / f"make_thumbnails_{datetime.now().strftime('%Y-%m-%d')}.log"
+
+logging.basicConfig(
+    filename=log_file,
+    level=logging.INFO,
+    format="%(asctime)s - %(levelname)s - %(message)s"
+)
+
+MANIFEST_NAME = ".derivatives_manifest.json"
+RUN_COMMAND = "make_thumbnails"
+
+
+class Command(BaseCommand):
+    help = "Render resized JPEG/WebP/AVIF derivatives of the mirrored card images, only for new ones"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--cards-dir", type=Path, default=CARDS_DIR)
+        parser.add_argument("--workers", type=int, default=os.cpu_count(),
+                            help="Encoder processes (1 = in-process)")
+        parser.add_argument("--sizes", nargs="+", choices=list(SIZES), default=list(SIZES))
+        parser.add_argument("--formats", nargs="+", choices=list(FORMATS), default=list(FORMATS))
+        parser.add_argument("--force", action="store_true",
+                            help="Re-render every image, even if its derivatives are current "
+                                 "or it failed before")
+
+    def handle(self, *args, **options):
+        if not image_support():
+            raise CommandError("make_thumbnails needs Pillow (pip install Pillow)")
+        cards_dir = options["cards_dir"]
+        if not cards_dir.is_dir():
+            raise CommandError(f"No mirrored images in {cards_dir}, run get_images first")
+
+        sizes = options["sizes"]
+        formats = available_formats(options["formats"])
+        for fmt in set(options["formats"]) - set(formats):
+            self.stdout.write(self.style.WARNING(f"This Pillow build can't encode {fmt}, skipping it"))
+
+        manifest = DerivativeManifest(cards_dir / MANIFEST_NAME)
+        metrics = RunMetrics()
+        sources = list_sources(cards_dir)
+        with metrics.stage("hash", rows_in=len(sources)) as stage:
+            jobs = []
+            for source in sources:
+                sha1 = content_hash(source)
+                if options["force"] or not manifest.is_current(source, sha1, sizes, formats):
+                    jobs.append((str(source), str(cards_dir), sha1, sizes, formats))
+            stage.rows_out = len(jobs)
+        print(f"{len(jobs)} of {len(sources)} images need derivatives ({', '.join(sizes)} x {', '.join(formats)})")
+
+        rendered = failed = 0
+        with metrics.stage("render", rows_in=len(jobs)) as stage:
+            if options["workers"] > 1 and len(jobs) > 1:
+                results = iter_pool_results(render_derivatives, jobs, options["workers"])
+            else:
+                results = ((job, None) for job in jobs)
+            for job, future in results:
+                source = Path(job[0])
+                try:
+                    entry = future.result() if future else render_derivatives(job)
+                except Exception as e:
+                    failed += 1
+                    logging.warning(f"Skipping {source.name}: {e}")
+                    manifest.record_failure(source, job[2], e)
+                    continue
+                manifest.record(source, entry)
+                rendered += 1
+                stage.bytes += sum(d["bytes"] for d in entry["derivatives"].values())
+            stage.rows_out = rendered
+
+        manifest.prune(sources)
+        manifest.save()
+
+        render = metrics.stages["render"]
+        rate = rendered / render.wall_time if render.wall_time else 0
+        print(f"Rendered {rendered} images, {failed} failed, {rate:,.1f} images/s")
+        totals = manifest.totals()
+        original = totals.pop("original")
+        print(f"Originals: {original / 1024 / 1024:.2f} MB")
+        for fmt, size in sorted(totals.items()):
+            print(f"  {fmt:<5} {size / 1024 / 1024:>8.2f} MB over all sizes")
+        logging.info(f"Rendered {rendered} images, {failed} failed; bytes {totals}, originals {original}")
+        print(metrics.summary())
+
+        EtlRun.objects.create(
+            command=RUN_COMMAND,
+            run_date=datetime.now().date(),
+            rows_new=rendered,
+            rows_unchanged=len(sources) - len(jobs),
+            wall_time=metrics.wall_time,
+            stages=metrics.as_list(),
+        )
+        if failed:
+            self.stderr.write(self.style.WARNING(f"{failed} images failed, see {log_file}"))
+        self.stdout.write(self.style.SUCCESS("Thumbnails complete!"))
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.6 on 2026-10-18 17:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bounty_api', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='onepiececard',
+            name='fingerprint',
+            field=models.CharField(blank=True, default='', max_length=16),
+        ),
+        migrations.CreateModel(
+            name='EtlRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('command', models.CharField(max_length=50)),
+                ('run_date', models.DateField()),
+                ('started_at', models.DateTimeField(auto_now_add=True)),
+                ('rows_new', models.IntegerField(default=0)),
+                ('rows_changed', models.IntegerField(default=0)),
+                ('rows_unchanged', models.IntegerField(default=0)),
+                ('history_rows', models.IntegerField(default=0)),
+            ],
+            options={
+                'db_table': 'etl_run',
+                'indexes': [models.Index(fields=['command', 'run_date'], name='ix_etl_run_command_date')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-18 17:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bounty_api', '0002_etl_run_and_card_fingerprint'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='etlrun',
+            name='peak_rss_mb',
+            field=models.FloatField(blank=True, null=True),
+        ),
+    ]
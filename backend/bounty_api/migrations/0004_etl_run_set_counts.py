@@ -0,0 +1,23 @@
+# Generated by Django 5.2.6 on 2026-10-18 17:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bounty_api', '0003_etl_run_peak_rss'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='etlrun',
+            name='sets_changed',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='etlrun',
+            name='sets_new',
+            field=models.IntegerField(default=0),
+        ),
+    ]
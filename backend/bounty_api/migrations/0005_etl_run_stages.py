@@ -0,0 +1,23 @@
+# Generated by Django 5.2.6 on 2026-10-18 17:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bounty_api', '0004_etl_run_set_counts'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='etlrun',
+            name='stages',
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.AddField(
+            model_name='etlrun',
+            name='wall_time',
+            field=models.FloatField(blank=True, null=True),
+        ),
+    ]
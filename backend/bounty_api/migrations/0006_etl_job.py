@@ -0,0 +1,38 @@
+# Generated by Django 5.2.6 on 2026-10-18 17:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bounty_api', '0005_etl_run_stages'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EtlJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('batch', models.CharField(max_length=40)),
+                ('run_date', models.DateField()),
+                ('set_id', models.IntegerField()),
+                ('url', models.URLField(max_length=300)),
+                ('status', models.CharField(choices=[('pending', 'pending'), ('running', 'running'), ('done', 'done'), ('failed', 'failed')], default='pending', max_length=10)),
+                ('attempts', models.IntegerField(default=0)),
+                ('worker', models.CharField(blank=True, default='', max_length=100)),
+                ('error', models.TextField(blank=True, default='')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('claimed_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('rows_new', models.IntegerField(default=0)),
+                ('rows_changed', models.IntegerField(default=0)),
+                ('rows_unchanged', models.IntegerField(default=0)),
+            ],
+            options={
+                'db_table': 'etl_job',
+                'indexes': [models.Index(fields=['status', 'id'], name='ix_etl_job_status')],
+                'unique_together': {('batch', 'set_id')},
+            },
+        ),
+    ]
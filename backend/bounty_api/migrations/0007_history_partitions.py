@@ -0,0 +1,114 @@
+from datetime import date
+
+from django.db import migrations
+
+TABLE = "one_piece_card_history"
+HEAP = f"{TABLE}_heap"
+BRIN_INDEX = "ix_history_date_brin"
+
+
+def _next_month(month):
+    return date(month.year + month.month // 12, month.month % 12 + 1, 1)
+
+
+def _constraints(cursor, table):
+    """{contype: constraint name} for the table's primary key and unique constraint."""
+    cursor.execute(
+        "SELECT contype, conname FROM pg_constraint "
+        "WHERE conrelid = %s::regclass AND contype IN ('p', 'u')",
+        [table],
+    )
+    return dict(cursor.fetchall())
+
+
+def _move_rows(cursor, source, target):
+    cursor.execute(
+        f"INSERT INTO {target} (id, card_id, history_date, market_price) "
+        f"SELECT id, card_id, history_date, market_price FROM {source}"
+    )
+    cursor.execute(
+        f"SELECT setval(pg_get_serial_sequence('{target}', 'id'), "
+        f"COALESCE((SELECT MAX(id) FROM {target}), 0) + 1, false)"
+    )
+
+
+def partition_history(apps, schema_editor):
+    """
+    Rebuild one_piece_card_history as a table range-partitioned by month on
+    history_date. The primary key has to include the partition key, so it
+    becomes (id, history_date); (card_id, history_date) stays unique.
+    """
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    with schema_editor.connection.cursor() as cursor:
+        names = _constraints(cursor, TABLE)
+        cursor.execute(f"ALTER TABLE {TABLE} RENAME TO {HEAP}")
+        # Free the constraint (and index) names for the new table
+        for name in names.values():
+            cursor.execute(f"ALTER TABLE {HEAP} RENAME CONSTRAINT {name} TO {name}_old")
+
+        cursor.execute(f"""
+            CREATE TABLE {TABLE} (
+                id bigint GENERATED BY DEFAULT AS IDENTITY,
+                card_id integer NOT NULL,
+                history_date date NOT NULL,
+                market_price numeric(10, 2) NOT NULL,
+                CONSTRAINT {names['p']} PRIMARY KEY (id, history_date),
+                CONSTRAINT {names['u']} UNIQUE (card_id, history_date)
+            ) PARTITION BY RANGE (history_date)
+        """)
+        # Rows arrive in date order, so a BRIN index stays a few pages per partition
+        cursor.execute(f"CREATE INDEX {BRIN_INDEX} ON {TABLE} USING brin (history_date)")
+
+        cursor.execute(f"SELECT MIN(history_date), MAX(history_date) FROM {HEAP}")
+        first, last = cursor.fetchone()
+        today = date.today()
+        month = (first or today).replace(day=1)
+        # Through next month, so the next nightly runs find their partition
+        end = _next_month(max(last or today, today).replace(day=1))
+        while month <= end:
+            cursor.execute(
+                f"CREATE TABLE {TABLE}_{month:%Y_%m} PARTITION OF {TABLE} "
+                f"FOR VALUES FROM (%s) TO (%s)",
+                [str(month), str(_next_month(month))],
+            )
+            month = _next_month(month)
+
+        _move_rows(cursor, HEAP, TABLE)
+        cursor.execute(f"DROP TABLE {HEAP}")
+
+
+def unpartition_history(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    with schema_editor.connection.cursor() as cursor:
+        names = _constraints(cursor, TABLE)
+        cursor.execute(f"ALTER TABLE {TABLE} RENAME TO {HEAP}")
+        for name in names.values():
+            cursor.execute(f"ALTER TABLE {HEAP} RENAME CONSTRAINT {name} TO {name}_old")
+        cursor.execute(f"DROP INDEX {BRIN_INDEX}")
+
+        cursor.execute(f"""
+            CREATE TABLE {TABLE} (
+                id bigint GENERATED BY DEFAULT AS IDENTITY,
+                card_id integer NOT NULL,
+                history_date date NOT NULL,
+                market_price numeric(10, 2) NOT NULL,
+                CONSTRAINT {names['p']} PRIMARY KEY (id),
+                CONSTRAINT {names['u']} UNIQUE (card_id, history_date)
+            )
+        """)
+        _move_rows(cursor, HEAP, TABLE)
+        # Partitions go with their parent
+        cursor.execute(f"DROP TABLE {HEAP}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bounty_api', '0006_etl_job'),
+    ]
+
+    operations = [
+        migrations.RunPython(partition_history, unpartition_history),
+    ]
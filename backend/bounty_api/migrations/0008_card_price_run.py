@@ -0,0 +1,28 @@
+# Generated by Django 5.2.6 on 2026-10-18 17:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bounty_api', '0007_history_partitions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OnePieceCardPriceRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('card_id', models.IntegerField()),
+                ('valid_from', models.DateField()),
+                ('valid_to', models.DateField()),
+                ('market_price', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+            ],
+            options={
+                'db_table': 'one_piece_card_price_run',
+                'indexes': [models.Index(fields=['valid_to'], name='ix_price_run_valid_to')],
+                'unique_together': {('card_id', 'valid_from')},
+            },
+        ),
+    ]
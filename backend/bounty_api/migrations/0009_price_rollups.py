@@ -0,0 +1,51 @@
+# Generated by Django 5.2.6 on 2026-10-18 18:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bounty_api', '0008_card_price_run'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OnePieceCardMonthlyPrice',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('card_id', models.IntegerField()),
+                ('period_start', models.DateField()),
+                ('open', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('high', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('low', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('close', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('avg', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('days', models.IntegerField(default=0)),
+            ],
+            options={
+                'db_table': 'one_piece_card_price_month',
+                'abstract': False,
+                'unique_together': {('card_id', 'period_start')},
+            },
+        ),
+        migrations.CreateModel(
+            name='OnePieceCardWeeklyPrice',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('card_id', models.IntegerField()),
+                ('period_start', models.DateField()),
+                ('open', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('high', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('low', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('close', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('avg', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('days', models.IntegerField(default=0)),
+            ],
+            options={
+                'db_table': 'one_piece_card_price_week',
+                'abstract': False,
+                'unique_together': {('card_id', 'period_start')},
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.6 on 2026-10-18 18:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bounty_api', '0009_price_rollups'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='etljob',
+            name='available_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='etljob',
+            name='heartbeat_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        # Jobs already running count from their claim until their worker beats
+        migrations.RunSQL(
+            "UPDATE etl_job SET heartbeat_at = claimed_at WHERE status = 'running'",
+            migrations.RunSQL.noop,
+        ),
+    ]
@@ -39,6 +39,8 @@ class OnePieceCard(models.Model):
     counter = models.IntegerField(blank=True)
 
     last_update = models.DateField()
+    # Content hash of the ETL-managed fields, used to skip unchanged rows
+    fingerprint = models.CharField(max_length=16, blank=True, default="")
 
     class Meta:
         unique_together = ("product_id", "foil_type")
@@ -48,6 +50,9 @@ class OnePieceCard(models.Model):
         return f"{self.name} ({self.foil_type or 'Normal'})"
 
 
+# On PostgreSQL the table is range-partitioned by month on history_date
+# (migration 0007) with (id, history_date) as its primary key; the ETL creates
+# partitions as it needs them (etl/partitions.py)
 class OnePieceCardHistory(models.Model):
     # card = models.ForeignKey(OnePieceCard, on_delete=models.CASCADE, related_name="history")
     card_id = models.IntegerField()
@@ -62,6 +67,121 @@ class OnePieceCardHistory(models.Model):
         return f"{self.card_id} on {self.history_date} - {self.market_price}"
 
 
+class OnePieceCardPriceRun(models.Model):
+    """A card's price for every day from valid_from through valid_to, inclusive."""
+    card_id = models.IntegerField()
+    valid_from = models.DateField()
+    valid_to = models.DateField()
+    market_price = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+
+    class Meta:
+        unique_together = ("card_id", "valid_from")
+        db_table = "one_piece_card_price_run"
+        indexes = [
+            # The nightly extension finds yesterday's open runs
+            models.Index(fields=["valid_to"], name="ix_price_run_valid_to"),
+        ]
+
+    def __str__(self):
+        return f"{self.card_id} {self.valid_from} to {self.valid_to} - {self.market_price}"
+
+
+class PriceRollup(models.Model):
+    """One card's open/high/low/close/average price over a period starting period_start."""
+    card_id = models.IntegerField()
+    period_start = models.DateField()
+    open = models.DecimalField(max_digits=10, decimal_places=2)
+    high = models.DecimalField(max_digits=10, decimal_places=2)
+    low = models.DecimalField(max_digits=10, decimal_places=2)
+    close = models.DecimalField(max_digits=10, decimal_places=2)
+    avg = models.DecimalField(max_digits=10, decimal_places=2)
+    # Days of history in the period so far; the current period is partial
+    days = models.IntegerField(default=0)
+
+    class Meta:
+        abstract = True
+        unique_together = ("card_id", "period_start")
+
+    def __str__(self):
+        return f"{self.card_id} from {self.period_start} - {self.open}/{self.high}/{self.low}/{self.close}"
+
+
+class OnePieceCardWeeklyPrice(PriceRollup):
+    # Weeks start on Monday
+    class Meta(PriceRollup.Meta):
+        db_table = "one_piece_card_price_week"
+
+
+class OnePieceCardMonthlyPrice(PriceRollup):
+    class Meta(PriceRollup.Meta):
+        db_table = "one_piece_card_price_month"
+
+
+class EtlRun(models.Model):
+    command = models.CharField(max_length=50)
+    run_date = models.DateField()
+    started_at = models.DateTimeField(auto_now_add=True)
+
+    rows_new = models.IntegerField(default=0)
+    rows_changed = models.IntegerField(default=0)
+    rows_unchanged = models.IntegerField(default=0)
+    history_rows = models.IntegerField(default=0)
+    sets_new = models.IntegerField(default=0)
+    sets_changed = models.IntegerField(default=0)
+    peak_rss_mb = models.FloatField(null=True, blank=True)
+    wall_time = models.FloatField(null=True, blank=True)
+    # One entry per stage: name, wall/cpu time, rows in/out, bytes, peak memory
+    stages = models.JSONField(default=list, blank=True)
+
+    class Meta:
+        db_table = "etl_run"
+        indexes = [
+            models.Index(fields=["command", "run_date"], name="ix_etl_run_command_date"),
+        ]
+
+    def __str__(self):
+        return f"{self.command} for {self.run_date}"
+
+
+class EtlJob(models.Model):
+    """One set's download + parse + merge for a distributed get_tcgcsv run."""
+    PENDING = "pending"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    STATUS_CHOICES = [(s, s) for s in (PENDING, RUNNING, DONE, FAILED)]
+
+    batch = models.CharField(max_length=40)
+    run_date = models.DateField()
+    set_id = models.IntegerField()
+    url = models.URLField(max_length=300)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    attempts = models.IntegerField(default=0)
+    worker = models.CharField(max_length=100, blank=True, default="")
+    error = models.TextField(blank=True, default="")
+    created_at = models.DateTimeField(auto_now_add=True)
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    # Touched by the worker while the job runs; a silent job has lost its worker
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    # A failed job waits until then before it can be claimed again
+    available_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    rows_new = models.IntegerField(default=0)
+    rows_changed = models.IntegerField(default=0)
+    rows_unchanged = models.IntegerField(default=0)
+
+    class Meta:
+        db_table = "etl_job"
+        unique_together = ("batch", "set_id")
+        indexes = [
+            models.Index(fields=["status", "id"], name="ix_etl_job_status"),
+        ]
+
+    def __str__(self):
+        return f"{self.batch} set {self.set_id} ({self.status})"
+
+
 class OnePieceDeck(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     user = models.ForeignKey(
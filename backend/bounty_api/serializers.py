@@ -80,6 +80,19 @@ class OnePieceCardHistorySerializer(serializers.ModelSerializer):
         model = OnePieceCardHistory
         fields = '__all__'
         
+class PriceRollupSerializer(serializers.Serializer):
+    card_id = serializers.IntegerField()
+    period_start = serializers.DateField()
+    open = serializers.DecimalField(max_digits=10, decimal_places=2)
+    high = serializers.DecimalField(max_digits=10, decimal_places=2)
+    low = serializers.DecimalField(max_digits=10, decimal_places=2)
+    close = serializers.DecimalField(max_digits=10, decimal_places=2)
+    avg = serializers.DecimalField(max_digits=10, decimal_places=2)
+    days = serializers.IntegerField()
+    # Same keys as daily history, so a chart of closes works unchanged
+    history_date = serializers.DateField(source="period_start")
+    market_price = serializers.DecimalField(max_digits=10, decimal_places=2, source="close")
+
 class OnePieceDeckSerializer(serializers.ModelSerializer):
     user = serializers.ReadOnlyField(source="user.username")
     
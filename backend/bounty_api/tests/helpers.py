@@ -0,0 +1,53 @@
+import io
+import logging
+import os
+import tempfile
+from contextlib import redirect_stdout
+from datetime import datetime
+from pathlib import Path
+
+from django.core.management import call_command
+
+# Shared with bench_etl, which serves its synthetic site the same way
+from bounty_api.etl.synthetic import stand_in_server
+
+
+def frozen_datetime(when: datetime):
+    """A datetime class whose now() and today() are `when`, to patch into a command module."""
+
+    class FrozenDatetime(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return when
+
+        @classmethod
+        def today(cls):
+            return when
+
+    return FrozenDatetime
+
+
+def run_command(name, *args, **options) -> str:
+    """call_command with everything it prints or writes captured and returned."""
+    out = io.StringIO()
+    with redirect_stdout(out):
+        call_command(name, *args, stdout=out, stderr=out, **options)
+    return out.getvalue()
+
+
+class ScratchDirMixin:
+    """
+    Runs each test in an empty working directory: the ETL commands read and
+    write prices/ and logs/ relative to it. Expected download errors and
+    retries are not logged.
+    """
+
+    def setUp(self):
+        super().setUp()
+        logging.disable(logging.ERROR)
+        self.addCleanup(logging.disable, logging.NOTSET)
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.addCleanup(os.chdir, os.getcwd())
+        self.root = Path(tmp.name)
+        os.chdir(self.root)
@@ -0,0 +1,83 @@
+import unittest
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+from django.test import SimpleTestCase
+
+from bounty_api.etl import cache
+from bounty_api.etl.cache import cache_available, iter_day_frames, CACHE_PREFIX
+from bounty_api.etl.cards import iter_set_frames
+from bounty_api.etl.synthetic import SyntheticCatalog
+from bounty_api.tests.helpers import ScratchDirMixin
+
+
+@unittest.skipUnless(cache_available(), "the cleaned cache needs pyarrow")
+class CleanedCacheTests(ScratchDirMixin, SimpleTestCase):
+    def setUp(self):
+        super().setUp()
+        self.catalog = SyntheticCatalog(n_sets=3, cards_per_set=10)
+        self.day_dir = self.root / "prices" / "2026-03-01"
+        self.catalog.write_day(self.day_dir, day=0)
+
+    def load(self, **kwargs):
+        """(prices of the day, whether the CSVs were parsed) for one iter_day_frames pass."""
+        with mock.patch.object(cache, "iter_set_frames", wraps=iter_set_frames) as parse:
+            df = pd.concat(iter_day_frames(self.day_dir, **kwargs), ignore_index=True)
+        return df["market_price"].to_numpy(), parse.called
+
+    def cache_files(self):
+        return sorted(path.name for path in self.day_dir.glob(f"{CACHE_PREFIX}*.parquet"))
+
+    def test_second_load_is_served_from_the_cache(self):
+        prices, parsed = self.load()
+        self.assertTrue(parsed)
+        self.assertEqual(len(self.cache_files()), 1)
+
+        cached, parsed = self.load()
+        self.assertFalse(parsed)
+        np.testing.assert_array_equal(cached, prices)
+        np.testing.assert_array_equal(cached, self.catalog.prices(0))
+
+    def test_changed_csv_invalidates_the_cache(self):
+        self.load()
+        before = self.cache_files()
+        self.catalog.write_day(self.day_dir, day=1)
+
+        prices, parsed = self.load()
+
+        self.assertTrue(parsed)
+        np.testing.assert_array_equal(prices, self.catalog.prices(1))
+        # The stale file is removed, not left next to the new one
+        self.assertEqual(len(self.cache_files()), 1)
+        self.assertNotEqual(self.cache_files(), before)
+
+    def test_cache_version_bump_invalidates_the_cache(self):
+        self.load()
+        before = self.cache_files()
+        with mock.patch.object(cache, "CACHE_VERSION", cache.CACHE_VERSION + 1):
+            prices, parsed = self.load()
+            self.assertTrue(parsed)
+            self.assertFalse(self.load()[1])
+        self.assertEqual(len(self.cache_files()), 1)
+        self.assertNotEqual(self.cache_files(), before)
+
+    def test_partial_day_bypasses_the_cache(self):
+        self.load()
+        files = sorted(self.day_dir.glob("group_*.csv"))[:2]
+        prices, parsed = self.load(files=files)
+
+        self.assertTrue(parsed)
+        np.testing.assert_array_equal(prices, self.catalog.prices(0)[:2 * self.catalog.rows_per_set])
+        self.assertEqual(len(self.cache_files()), 1)
+
+    def test_partial_day_does_not_write_a_cache(self):
+        files = sorted(self.day_dir.glob("group_*.csv"))[:2]
+        self.load(files=files)
+        self.assertEqual(self.cache_files(), [])
+
+    def test_no_cache(self):
+        self.load(use_cache=False)
+        self.assertEqual(self.cache_files(), [])
+        self.load()
+        self.assertTrue(self.load(use_cache=False)[1])
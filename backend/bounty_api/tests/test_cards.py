@@ -0,0 +1,123 @@
+from datetime import date
+
+from django.test import TestCase
+
+from bounty_api.models import OnePieceCard, OnePieceCardHistory
+from bounty_api.etl.cards import CardChanges, card_load_frame, upsert_cards, update_prices, snapshot_history
+from bounty_api.etl.synthetic import synthetic_cards
+
+DAY_1, DAY_2, DAY_3 = date(2026, 3, 1), date(2026, 3, 2), date(2026, 3, 3)
+
+
+def card(product_id, foil_type="Normal"):
+    return OnePieceCard.objects.get(product_id=product_id, foil_type=foil_type)
+
+
+class UpsertCardsTests(TestCase):
+    def setUp(self):
+        self.cards = synthetic_cards(6)
+        self.first = int(self.cards["product_id"].iloc[0])
+
+    def test_first_load_is_all_new(self):
+        changes = upsert_cards(self.cards, DAY_1)
+        self.assertEqual(changes, CardChanges(new=6))
+        self.assertEqual(OnePieceCard.objects.count(), 6)
+
+    def test_reload_of_same_rows_is_unchanged(self):
+        upsert_cards(self.cards, DAY_1)
+        changes = upsert_cards(self.cards, DAY_2)
+        self.assertEqual(changes, CardChanges(unchanged=6))
+        self.assertEqual(set(OnePieceCard.objects.values_list("last_update", flat=True)), {DAY_1})
+
+    def test_new_changed_and_unchanged(self):
+        upsert_cards(self.cards.iloc[:4], DAY_1)
+        incoming = self.cards.copy()
+        incoming.loc[0, "name"] = "Renamed"
+        incoming.loc[1, "market_price"] += 1.0
+
+        changes = upsert_cards(incoming, DAY_2)
+
+        self.assertEqual(changes, CardChanges(new=2, changed=2, unchanged=2))
+        renamed, repriced = card(self.first, "Normal"), card(self.first, "Foil")
+        self.assertEqual((renamed.name, renamed.last_update), ("Renamed", DAY_2))
+        self.assertAlmostEqual(float(repriced.market_price), round(incoming.loc[1, "market_price"], 2))
+        self.assertEqual(repriced.last_update, DAY_2)
+        untouched = OnePieceCard.objects.filter(last_update=DAY_1)
+        self.assertEqual(untouched.count(), 2)
+
+    def test_stored_fingerprint_matches_load_frame(self):
+        upsert_cards(self.cards, DAY_1)
+        expected = card_load_frame(self.cards, DAY_1).set_index(["product_id", "foil_type"])["fingerprint"]
+        for product_id, foil_type, fingerprint in OnePieceCard.objects.values_list(
+            "product_id", "foil_type", "fingerprint"
+        ):
+            self.assertEqual(fingerprint, expected[(product_id, foil_type)])
+
+    def test_blank_fingerprint_is_rewritten(self):
+        upsert_cards(self.cards, DAY_1)
+        OnePieceCard.objects.filter(product_id=self.first).update(fingerprint="")
+        changes = upsert_cards(self.cards, DAY_3)
+        self.assertEqual(changes, CardChanges(changed=2, unchanged=4))
+        self.assertNotEqual(card(self.first).fingerprint, "")
+
+
+class UpdatePricesTests(TestCase):
+    def setUp(self):
+        self.cards = synthetic_cards(4)
+        self.first = int(self.cards["product_id"].iloc[0])
+        upsert_cards(self.cards, DAY_1)
+
+    def prices(self, bump=0.0):
+        prices = self.cards[["product_id", "foil_type", "market_price"]].copy()
+        prices.loc[0, "market_price"] += bump
+        return prices
+
+    def test_updates_only_moved_prices(self):
+        changes, unseen = update_prices(self.prices(bump=5.0), DAY_2)
+        self.assertEqual(changes, CardChanges(changed=1, unchanged=3))
+        self.assertTrue(unseen.empty)
+        moved = card(self.first)
+        self.assertAlmostEqual(float(moved.market_price), round(self.cards.loc[0, "market_price"] + 5.0, 2))
+        self.assertEqual(moved.last_update, DAY_2)
+
+    def test_full_run_after_prices_only_restores_the_price(self):
+        # Full run at P, prices-only at P + 5, full run back at P
+        update_prices(self.prices(bump=5.0), DAY_2)
+        changes = upsert_cards(self.cards, DAY_3)
+
+        self.assertEqual(changes, CardChanges(changed=1, unchanged=3))
+        restored = card(self.first)
+        self.assertAlmostEqual(float(restored.market_price), round(self.cards.loc[0, "market_price"], 2))
+        self.assertEqual(restored.fingerprint, card_load_frame(self.cards, DAY_3)["fingerprint"].iloc[0])
+
+    def test_unknown_cards_are_returned_as_unseen(self):
+        prices = self.prices()
+        prices.loc[len(prices)] = [1, "Normal", 1.0]
+        changes, unseen = update_prices(prices, DAY_2)
+        self.assertEqual(changes, CardChanges(unchanged=4))
+        self.assertEqual(unseen["product_id"].tolist(), [1])
+
+
+class SnapshotHistoryTests(TestCase):
+    def setUp(self):
+        upsert_cards(synthetic_cards(4), DAY_1)
+
+    def history(self, day):
+        return dict(OnePieceCardHistory.objects.filter(history_date=day).values_list("card_id", "market_price"))
+
+    def test_copies_current_prices(self):
+        self.assertEqual(snapshot_history(DAY_1), 4)
+        self.assertEqual(self.history(DAY_1), dict(OnePieceCard.objects.values_list("id", "market_price")))
+
+    def test_rerun_inserts_nothing(self):
+        snapshot_history(DAY_1)
+        first = self.history(DAY_1)
+        OnePieceCard.objects.update(market_price=1)
+        self.assertEqual(snapshot_history(DAY_1), 0)
+        self.assertEqual(self.history(DAY_1), first)
+
+    def test_only_missing_cards_are_added(self):
+        snapshot_history(DAY_2)
+        OnePieceCardHistory.objects.filter(card_id=OnePieceCard.objects.order_by("id")[0].id).delete()
+        self.assertEqual(snapshot_history(DAY_2), 1)
+        self.assertEqual(len(self.history(DAY_2)), 4)
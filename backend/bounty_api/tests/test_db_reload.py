@@ -0,0 +1,83 @@
+from datetime import date
+from unittest import mock
+
+from django.test import TestCase
+
+from bounty_api.models import OnePieceCard, OnePieceCardHistory, EtlRun
+from bounty_api.etl.cards import iter_batches
+from bounty_api.etl.synthetic import SyntheticCatalog
+from bounty_api.tests.helpers import ScratchDirMixin, run_command
+
+DAYS = ["2026-03-01", "2026-03-02"]
+
+
+class DbReloadTests(ScratchDirMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.catalog = SyntheticCatalog(n_sets=3, cards_per_set=10)
+        for day, date_dir in enumerate(DAYS):
+            self.catalog.write_day(self.root / "prices" / date_dir, day)
+
+    def db_reload(self, **options):
+        # Record the batches each date is loaded in
+        self.batches = []
+
+        def spy(frames, memory_limit_mb):
+            for batch in iter_batches(frames, memory_limit_mb):
+                self.batches.append(len(batch))
+                yield batch
+
+        with mock.patch("bounty_api.management.commands.db_reload.iter_batches", spy):
+            return run_command("db_reload", no_cache=True, **options)
+
+    def loaded(self):
+        cards = {
+            (product_id, foil_type): float(price)
+            for product_id, foil_type, price in OnePieceCard.objects.values_list(
+                "product_id", "foil_type", "market_price"
+            )
+        }
+        history = sorted(
+            (str(day), float(price))
+            for day, price in OnePieceCardHistory.objects.values_list("history_date", "market_price")
+        )
+        return cards, history
+
+    def catalog_prices(self, day):
+        keys = zip(self.catalog.cards["product_id"], self.catalog.cards["foil_type"])
+        return dict(zip(keys, self.catalog.prices(day)))
+
+    def test_loads_every_date_in_order(self):
+        out = self.db_reload()
+        self.assertIn("ETL Complete!", out)
+        cards, history = self.loaded()
+        self.assertEqual(cards, self.catalog_prices(1))
+        self.assertEqual(len(history), 2 * self.catalog.n_rows)
+        self.assertEqual(sorted(map(str, EtlRun.objects.values_list("run_date", flat=True))), DAYS)
+
+    def test_stream_batches_stay_under_the_limit(self):
+        # A 0 MB ceiling puts every set file in a batch of its own
+        out = self.db_reload(stream=True, memory_limit=0)
+        self.assertIn("ETL Complete!", out)
+        self.assertEqual(self.batches, [self.catalog.rows_per_set] * len(self.catalog.set_ids) * len(DAYS))
+
+        streamed = self.loaded()
+        OnePieceCardHistory.objects.all().delete()
+        OnePieceCard.objects.all().delete()
+        EtlRun.objects.all().delete()
+        self.db_reload()
+        self.assertEqual(self.loaded(), streamed)
+
+    def test_one_batch_when_everything_fits(self):
+        self.db_reload(stream=True, memory_limit=64)
+        self.assertEqual(self.batches, [self.catalog.n_rows] * len(DAYS))
+
+    def test_empty_date_dir_does_not_stop_the_reload(self):
+        (self.root / "prices" / "2026-03-03").mkdir()
+        out = self.db_reload()
+
+        self.assertIn("ETL Complete!", out)
+        cards, history = self.loaded()
+        self.assertEqual(cards, self.catalog_prices(1))
+        # The empty day still snapshots every card's price
+        self.assertEqual(OnePieceCardHistory.objects.filter(history_date=date(2026, 3, 3)).count(), self.catalog.n_rows)
@@ -0,0 +1,78 @@
+import numpy as np
+from django.test import SimpleTestCase
+
+from bounty_api.etl.downsample import lttb
+from bounty_api.etl.series import downsample
+
+
+def reference_lttb(x, y, n_out):
+    """Point-by-point LTTB as originally described, to check the vectorized one against."""
+    n = len(x)
+    every = (n - 2) / (n_out - 2)
+    keep, a = [0], 0
+    for i in range(n_out - 2):
+        lo, hi = int(i * every) + 1, int((i + 1) * every) + 1
+        next_lo, next_hi = hi, min(int((i + 2) * every) + 1, n)
+        if i == n_out - 3:
+            next_lo, next_hi = n - 1, n
+        avg_x = sum(x[next_lo:next_hi]) / (next_hi - next_lo)
+        avg_y = sum(y[next_lo:next_hi]) / (next_hi - next_lo)
+        areas = [
+            abs((x[a] - avg_x) * (y[j] - y[a]) - (x[a] - x[j]) * (avg_y - y[a]))
+            for j in range(lo, hi)
+        ]
+        a = lo + areas.index(max(areas))
+        keep.append(a)
+    return keep + [n - 1]
+
+
+class LttbTests(SimpleTestCase):
+    def setUp(self):
+        rng = np.random.default_rng(7)
+        self.x = np.arange(500, dtype="float64")
+        self.y = np.cumsum(rng.normal(size=500))
+
+    def test_short_series_is_unchanged(self):
+        for n_out in (500, 501, 10_000):
+            self.assertEqual(lttb(self.x, self.y, n_out).tolist(), list(range(500)))
+
+    def test_keeps_first_and_last(self):
+        for n_out in (3, 10, 77, 499):
+            keep = lttb(self.x, self.y, n_out)
+            self.assertEqual((keep[0], keep[-1]), (0, 499))
+
+    def test_returns_n_out_ascending_indices(self):
+        for n_out in (3, 4, 10, 77, 250, 499):
+            keep = lttb(self.x, self.y, n_out)
+            self.assertEqual(len(keep), n_out)
+            self.assertTrue(np.all(np.diff(keep) > 0))
+
+    def test_known_series(self):
+        # Two interior buckets, {1, 2} and {3, 4, 5}; the spike at 3 must survive
+        x = np.arange(7)
+        y = [0, 1, 0, 5, 0, 1, 0]
+        self.assertEqual(lttb(x, y, 4).tolist(), [0, 2, 3, 6])
+
+    def test_matches_reference(self):
+        for n_out in (3, 10, 77, 250):
+            self.assertEqual(
+                lttb(self.x, self.y, n_out).tolist(), reference_lttb(self.x.tolist(), self.y.tolist(), n_out)
+            )
+
+
+class DownsampleTests(SimpleTestCase):
+    def setUp(self):
+        self.dates = np.arange("2026-01-01", "2026-12-31", dtype="datetime64[D]")
+        self.prices = np.linspace(1, 2, len(self.dates))
+
+    def test_no_limit_or_short_series_is_unchanged(self):
+        for max_points in (None, 0, len(self.dates), len(self.dates) + 1):
+            dates, prices = downsample(self.dates, self.prices, max_points)
+            self.assertIs(dates, self.dates)
+            self.assertIs(prices, self.prices)
+
+    def test_keeps_the_date_range(self):
+        dates, prices = downsample(self.dates, self.prices, 50)
+        self.assertEqual(len(dates), 50)
+        self.assertEqual((dates[0], dates[-1]), (self.dates[0], self.dates[-1]))
+        self.assertEqual((prices[0], prices[-1]), (self.prices[0], self.prices[-1]))
@@ -0,0 +1,111 @@
+from datetime import date
+
+from django.test import TestCase
+from django.utils import timezone
+
+from bounty_api.models import OnePieceCard
+from bounty_api.etl.cards import upsert_cards
+from bounty_api.etl.synthetic import synthetic_cards
+from bounty_api.tests.helpers import ScratchDirMixin, stand_in_server, run_command
+
+LOADED = date(2026, 1, 1)
+
+
+class GetImagesTests(ScratchDirMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.site = self.root / "cdn"
+        self.site.mkdir()
+        self.cards_dir = self.root / "cards"
+        self.server = self.enterContext(stand_in_server(self.site))
+
+        # Three products, each a Normal and a Foil card sharing one image
+        cards = synthetic_cards(6)
+        cards["image_url"] = cards["product_id"].map(f"{self.server.url}/{{}}_200w.jpg".format)
+        upsert_cards(cards, LOADED)
+        self.products = sorted(set(cards["product_id"].astype(int)))
+        for product_id in self.products:
+            self.write_image(product_id, b"original")
+
+    def image(self, product_id):
+        return f"{product_id}_200w.jpg"
+
+    def write_image(self, product_id, content):
+        (self.site / self.image(product_id)).write_bytes(b"\xff\xd8\xff" + content)
+
+    def mirrored(self, product_id):
+        return (self.cards_dir / self.image(product_id)).read_bytes()[3:]
+
+    def get_images(self, **options):
+        """Run get_images; returns {image file: status} for the requests it made."""
+        self.server.reset()
+        out = run_command("get_images", cards_dir=self.cards_dir, **options)
+        self.assertIn("Image sync complete!", out)
+        return {path.lstrip("/"): status for path, status in self.server.requests}
+
+    def move_image(self, product_id, content):
+        # The card's image_url changes; the file name stays the same
+        (self.site / "v2").mkdir(exist_ok=True)
+        (self.site / "v2" / self.image(product_id)).write_bytes(b"\xff\xd8\xff" + content)
+        OnePieceCard.objects.filter(product_id=product_id).update(
+            image_url=f"{self.server.url}/v2/{self.image(product_id)}"
+        )
+
+    def test_first_sync_downloads_each_image_once(self):
+        requests = self.get_images()
+        self.assertEqual(len(self.server.requests), 3)
+        self.assertEqual(requests, {self.image(p): 200 for p in self.products})
+        for product_id in self.products:
+            self.assertEqual(self.mirrored(product_id), b"original")
+        self.assertTrue((self.cards_dir / ".image_manifest.json").exists())
+
+    def test_unchanged_cards_are_not_requested(self):
+        self.get_images()
+        self.assertEqual(self.get_images(), {})
+
+    def test_price_changes_do_not_revalidate(self):
+        self.get_images()
+        OnePieceCard.objects.update(market_price=123, last_update=timezone.now().date())
+        self.assertEqual(self.get_images(), {})
+
+    def test_changed_image_url_is_fetched(self):
+        moved, untouched, _ = self.products
+        self.get_images()
+        self.move_image(moved, b"redrawn")
+
+        self.assertEqual(self.get_images(), {f"v2/{self.image(moved)}": 200})
+        self.assertEqual(self.mirrored(moved), b"redrawn")
+        self.assertEqual(self.mirrored(untouched), b"original")
+        self.assertEqual(self.get_images(), {})
+
+    def test_new_product_is_fetched(self):
+        self.get_images()
+        card = synthetic_cards(1).assign(product_id=200000, image_url=f"{self.server.url}/{self.image(200000)}")
+        upsert_cards(card, LOADED)
+        self.write_image(200000, b"new")
+
+        self.assertEqual(self.get_images(), {self.image(200000): 200})
+        self.assertEqual(self.mirrored(200000), b"new")
+
+    def test_full_revalidates_everything(self):
+        self.get_images()
+        self.write_image(self.products[0], b"redrawn")
+        requests = self.get_images(full=True)
+        self.assertEqual(requests, {
+            self.image(self.products[0]): 200,
+            self.image(self.products[1]): 304,
+            self.image(self.products[2]): 304,
+        })
+        self.assertEqual(self.mirrored(self.products[0]), b"redrawn")
+
+    def test_deleted_image_is_downloaded_again(self):
+        self.get_images()
+        (self.cards_dir / self.image(self.products[1])).unlink()
+        self.assertEqual(self.get_images(), {self.image(self.products[1]): 200})
+
+    def test_non_image_responses_are_not_saved(self):
+        (self.site / "gone.html").write_text("<html>gone</html>")
+        OnePieceCard.objects.filter(product_id=self.products[0]).update(image_url=f"{self.server.url}/gone.html")
+        out = run_command("get_images", cards_dir=self.cards_dir)
+        self.assertIn("1 images failed", out)
+        self.assertFalse((self.cards_dir / "gone.html").exists())
@@ -0,0 +1,219 @@
+import shutil
+from datetime import datetime, timedelta
+from unittest import mock
+
+from django.test import TestCase
+
+from bounty_api.models import OnePieceSet, OnePieceCard, OnePieceCardHistory
+from bounty_api.etl.download import Downloader
+from bounty_api.etl.synthetic import SyntheticCatalog
+from bounty_api.tests.helpers import ScratchDirMixin, stand_in_server, frozen_datetime, run_command
+
+RUN_DAY = datetime(2026, 3, 2, 6, 0)
+
+
+class StandInSiteMixin(ScratchDirMixin):
+    """A small synthetic catalog written to site/ in the tcgcsv.com layout."""
+
+    def setUp(self):
+        super().setUp()
+        self.catalog = SyntheticCatalog(n_sets=3, cards_per_set=10)
+        self.site = self.root / "site"
+        self.catalog.write_site(self.site)
+
+    def get_tcgcsv(self, base_url, when=RUN_DAY, **options):
+        with mock.patch("bounty_api.management.commands.get_tcgcsv.datetime", frozen_datetime(when)):
+            return run_command("get_tcgcsv", base_url=base_url, **options)
+
+    def change_set(self, set_id, day):
+        """Serve set_id's file as it looks on catalog day `day`; the other sets stay as they are."""
+        staging = self.root / f"site_day{day}"
+        self.catalog.write_site(staging, day)
+        shutil.copyfile(staging / str(set_id) / "ProductsAndPrices.csv",
+                        self.site / str(set_id) / "ProductsAndPrices.csv")
+
+    def catalog_prices(self, day=0):
+        cards = self.catalog.cards
+        return dict(zip(zip(cards["product_id"], cards["foil_type"]), self.catalog.prices(day)))
+
+    def db_prices(self):
+        cards = OnePieceCard.objects.values_list("product_id", "foil_type", "market_price")
+        return {(product_id, foil_type): float(price) for product_id, foil_type, price in cards}
+
+
+class DownloaderTests(ScratchDirMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.site = self.root / "site"
+        self.site.mkdir()
+        for name in ["a.csv", "b.csv", "c.csv"]:
+            (self.site / name).write_text(f"productId,marketPrice\n1,{len(name)}\n")
+        self.out = self.root / "out"
+        self.out.mkdir()
+
+    def jobs(self, base_url, names=("a.csv", "b.csv", "c.csv")):
+        return [(f"{base_url}/{name}", self.out / name) for name in names]
+
+    def test_downloads_every_file(self):
+        with stand_in_server(self.site) as server, Downloader(workers=3, backoff=0) as downloader:
+            stats = downloader.download_all(self.jobs(server.url))
+        self.assertEqual((stats.files, stats.failed), (3, 0))
+        self.assertEqual(stats.bytes, sum(f.stat().st_size for f in self.site.iterdir()))
+        self.assertEqual(sorted(p.name for p in self.out.iterdir()), ["a.csv", "b.csv", "c.csv"])
+
+    def test_retries_server_errors(self):
+        with stand_in_server(self.site) as server, Downloader(retries=3, backoff=0) as downloader:
+            server.fail["/b.csv"] = 2
+            stats = downloader.download_all(self.jobs(server.url))
+            requests = [status for path, status in server.requests if path == "/b.csv"]
+        self.assertEqual(stats.failed, 0)
+        self.assertEqual(requests, [503, 503, 200])
+
+    def test_gives_up_after_retries_without_partial_files(self):
+        with stand_in_server(self.site) as server, Downloader(retries=1, backoff=0) as downloader:
+            server.fail["/b.csv"] = 5
+            stats = downloader.download_all(self.jobs(server.url))
+        self.assertEqual((stats.files, stats.failed), (2, 1))
+        self.assertEqual(sorted(p.name for p in self.out.iterdir()), ["a.csv", "c.csv"])
+
+    def test_missing_file_is_not_retried(self):
+        with stand_in_server(self.site) as server, Downloader(retries=3, backoff=0) as downloader:
+            stats = downloader.download_all(self.jobs(server.url, ["missing.csv"]))
+            requests = server.requests
+        self.assertEqual(stats.failed, 1)
+        self.assertEqual(requests, [("/missing.csv", 404)])
+
+    def test_existing_file_is_skipped(self):
+        (self.out / "a.csv").write_text("already here")
+        with stand_in_server(self.site) as server, Downloader() as downloader:
+            stats = downloader.download_all(self.jobs(server.url))
+            paths = [path for path, status in server.requests]
+        self.assertEqual((stats.files, stats.skipped), (2, 1))
+        self.assertNotIn("/a.csv", paths)
+
+
+class GetTcgcsvTests(StandInSiteMixin, TestCase):
+    def test_loads_catalog_from_stand_in_server(self):
+        with stand_in_server(self.site) as server:
+            out = self.get_tcgcsv(server.url)
+
+        self.assertIn("ETL Complete!", out)
+        self.assertEqual(sorted(OnePieceSet.objects.values_list("id", flat=True)), [1, 2, 3])
+        self.assertEqual(self.db_prices(), self.catalog_prices())
+        self.assertEqual(
+            OnePieceCardHistory.objects.filter(history_date=RUN_DAY.date()).count(), self.catalog.n_rows
+        )
+        day_dir = self.root / "prices" / "2026-03-02"
+        self.assertEqual(
+            sorted(p.name for p in day_dir.glob("group_*")), ["group_1.csv", "group_2.csv", "group_3.csv"]
+        )
+
+    def test_failed_set_download_does_not_stop_the_others(self):
+        with stand_in_server(self.site) as server:
+            server.fail["/2/ProductsAndPrices.csv"] = 10
+            out = self.get_tcgcsv(server.url, retries=0)
+
+        self.assertIn("1 failed", out)
+        loaded = {product_id for product_id, foil_type in self.db_prices()}
+        expected = set(self.catalog.raw["productId"].iloc[
+            list(range(0, 20)) + list(range(40, 60))
+        ])
+        self.assertEqual(loaded, expected)
+
+
+class ConditionalFetchTests(StandInSiteMixin, TestCase):
+    """Only sets that changed since the last successful run are loaded."""
+
+    def get_tcgcsv(self, base_url, when=RUN_DAY, **options):
+        # Record which set files each run hands to the ETL
+        from bounty_api.management.commands.get_tcgcsv import Command
+        csv_etl = Command.csv_etl
+        self.loaded = None
+
+        def spy(command, csv_dir, *args, **kwargs):
+            files = args[4]
+            self.loaded = sorted(path.name for path in files)
+            if self.fail_etl:
+                raise RuntimeError("database went away")
+            return csv_etl(command, csv_dir, *args, **kwargs)
+
+        with mock.patch.object(Command, "csv_etl", spy):
+            return super().get_tcgcsv(base_url, when, **options)
+
+    def setUp(self):
+        super().setUp()
+        self.fail_etl = False
+        self.day_2 = RUN_DAY + timedelta(days=1)
+        self.day_3 = RUN_DAY + timedelta(days=2)
+
+    def set_prices(self, set_id, day):
+        rows = self.catalog.rows_per_set
+        prices = list(self.catalog_prices(day).items())
+        return dict(prices[(set_id - 1) * rows:set_id * rows])
+
+    def test_unchanged_sets_get_304_and_are_skipped(self):
+        with stand_in_server(self.site) as server:
+            self.get_tcgcsv(server.url)
+            self.assertEqual(self.loaded, ["group_1.csv", "group_2.csv", "group_3.csv"])
+
+            self.change_set(2, day=1)
+            server.reset()
+            self.get_tcgcsv(server.url, self.day_2)
+            statuses = server.statuses()
+
+        self.assertEqual(statuses, {
+            "/Groups.csv": 304,
+            "/1/ProductsAndPrices.csv": 304,
+            "/2/ProductsAndPrices.csv": 200,
+            "/3/ProductsAndPrices.csv": 304,
+        })
+        self.assertEqual(self.loaded, ["group_2.csv"])
+        prices = self.db_prices()
+        self.assertEqual({k: prices[k] for k in self.set_prices(2, 1)}, self.set_prices(2, 1))
+        self.assertEqual({k: prices[k] for k in self.set_prices(1, 0)}, self.set_prices(1, 0))
+        # Unchanged files are linked into the new day, which stays complete
+        day_dir = self.root / "prices" / "2026-03-03"
+        self.assertEqual(len(list(day_dir.glob("group_*.csv"))), 3)
+        # Every card still gets a history row for the day
+        self.assertEqual(
+            OnePieceCardHistory.objects.filter(history_date=self.day_2.date()).count(), self.catalog.n_rows
+        )
+
+    def test_same_content_is_skipped_without_etags(self):
+        with stand_in_server(self.site, etags=False) as server:
+            self.get_tcgcsv(server.url)
+            self.change_set(3, day=1)
+            server.reset()
+            self.get_tcgcsv(server.url, self.day_2)
+            statuses = set(server.statuses().values())
+
+        self.assertEqual(statuses, {200})
+        self.assertEqual(self.loaded, ["group_3.csv"])
+
+    def test_force_fetch_loads_every_set(self):
+        with stand_in_server(self.site) as server:
+            self.get_tcgcsv(server.url)
+            self.get_tcgcsv(server.url, self.day_2, force_fetch=True)
+        self.assertEqual(self.loaded, ["group_1.csv", "group_2.csv", "group_3.csv"])
+
+    def test_sets_from_a_failed_etl_are_loaded_next_run(self):
+        with stand_in_server(self.site) as server:
+            self.get_tcgcsv(server.url)
+
+            self.change_set(2, day=1)
+            self.fail_etl = True
+            out = self.get_tcgcsv(server.url, self.day_2)
+            self.assertIn("ETL error", out)
+            self.assertEqual(self.loaded, ["group_2.csv"])
+
+            # Nothing changed on the server since the failed run
+            self.fail_etl = False
+            server.reset()
+            out = self.get_tcgcsv(server.url, self.day_3)
+            statuses = server.statuses()
+
+        self.assertIn("ETL Complete!", out)
+        self.assertEqual(statuses["/2/ProductsAndPrices.csv"], 200)
+        self.assertEqual(self.loaded, ["group_2.csv"])
+        prices = self.db_prices()
+        self.assertEqual({k: prices[k] for k in self.set_prices(2, 1)}, self.set_prices(2, 1))
@@ -0,0 +1,71 @@
+from datetime import date, timedelta
+
+from django.test import TestCase
+
+from bounty_api.models import OnePieceCard, OnePieceCardHistory
+from bounty_api.etl.cards import upsert_cards
+from bounty_api.etl.history import fill_history_gaps
+from bounty_api.etl.partitions import ensure_partitions
+from bounty_api.etl.synthetic import synthetic_cards
+
+D1 = date(2026, 1, 30)
+D2, D3, D4 = (D1 + timedelta(days=i) for i in range(1, 4))
+
+
+class FillHistoryGapsTests(TestCase):
+    def setUp(self):
+        upsert_cards(synthetic_cards(3), D1)
+        self.a, self.b, self.c = OnePieceCard.objects.order_by("id").values_list("id", flat=True)
+        # Today's price must never be what gets carried back
+        OnePieceCard.objects.update(market_price=99)
+        ensure_partitions(D1, D4)
+        priced = {
+            self.a: {D1: 1, D2: 2, D4: 4},
+            self.b: {D1: 10, D3: 30},
+            self.c: {D3: 5},
+        }
+        OnePieceCardHistory.objects.bulk_create(
+            OnePieceCardHistory(card_id=card_id, history_date=day, market_price=price)
+            for card_id, days in priced.items() for day, price in days.items()
+        )
+        self.expected_fill = {
+            (self.a, D3): 2,
+            (self.b, D2): 10,
+            (self.b, D4): 30,
+            (self.c, D4): 5,
+        }
+
+    def history(self):
+        return {
+            (card_id, day): float(price)
+            for card_id, day, price in OnePieceCardHistory.objects.values_list("card_id", "history_date", "market_price")
+        }
+
+    def test_carries_last_known_price_forward(self):
+        before = self.history()
+        filled = fill_history_gaps(D1, D4)
+
+        after = self.history()
+        self.assertEqual(filled, len(self.expected_fill))
+        self.assertEqual({key: after[key] for key in after.keys() - before.keys()}, self.expected_fill)
+        # Existing rows are left alone, and a card with no earlier price gets nothing
+        self.assertEqual({key: after[key] for key in before}, before)
+        self.assertNotIn((self.c, D1), after)
+        self.assertNotIn((self.c, D2), after)
+
+    def test_prices_before_the_range_seed_the_fill(self):
+        filled = fill_history_gaps(D2, D4)
+        after = self.history()
+        self.assertEqual(filled, len(self.expected_fill))
+        self.assertEqual(after[(self.b, D2)], 10)
+
+    def test_is_idempotent(self):
+        fill_history_gaps(D1, D4)
+        once = self.history()
+        self.assertEqual(fill_history_gaps(D1, D4), 0)
+        self.assertEqual(self.history(), once)
+
+    def test_dates_without_history_are_not_filled(self):
+        ensure_partitions(D4, D4 + timedelta(days=2))
+        fill_history_gaps(D1, D4 + timedelta(days=2))
+        self.assertFalse(OnePieceCardHistory.objects.filter(history_date__gt=D4).exists())
@@ -0,0 +1,154 @@
+from datetime import date, timedelta
+
+import pandas as pd
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from bounty_api.models import OnePieceCardHistory, OnePieceCardWeeklyPrice
+from bounty_api.etl.loader import upsert_dataframe
+from bounty_api.etl.partitions import ensure_partitions
+from bounty_api.etl.runs import RUN_TABLE, RUN_KEY, encode_runs
+from bounty_api.views import MAX_BATCH_CARDS
+
+D1 = date(2026, 3, 1)
+DAYS = [D1 + timedelta(days=i) for i in range(10)]
+PRICES = {
+    1: [1.00, 1.00, 1.50, 2.00, 9.00, 2.00, 2.00, 2.50, 3.00, 3.00],
+    2: [5.00, 5.00, 5.00],
+}
+
+
+class HistoryApiTestCase(TestCase):
+    url = reverse("onepiece_cardhistory-list")
+    batch_url = reverse("onepiece_cardhistory-batch")
+
+    def setUp(self):
+        ensure_partitions(DAYS[0], DAYS[-1])
+        OnePieceCardHistory.objects.bulk_create(
+            OnePieceCardHistory(card_id=card_id, history_date=day, market_price=price)
+            for card_id, prices in PRICES.items() for day, price in zip(DAYS, prices)
+        )
+
+    def get(self, **params):
+        return self.client.get(self.url, params)
+
+
+class HistoryListTests(HistoryApiTestCase):
+    def test_rows_keep_the_serializer_shape(self):
+        rows = self.get(card_id=2).json()
+        first = OnePieceCardHistory.objects.get(card_id=2, history_date=D1)
+        self.assertEqual(rows[0], {"id": first.id, "card_id": 2, "history_date": "2026-03-01", "market_price": "5.00"})
+        self.assertEqual(len(rows), 3)
+
+    def test_start_and_end_are_inclusive(self):
+        rows = self.get(card_id=1, start="2026-03-03", end="2026-03-05").json()
+        self.assertEqual([row["history_date"] for row in rows], ["2026-03-03", "2026-03-04", "2026-03-05"])
+        self.assertEqual([row["market_price"] for row in rows], ["1.50", "2.00", "9.00"])
+
+    def test_max_points_keeps_the_ends_and_the_spike(self):
+        rows = self.get(card_id=1, max_points=3).json()
+        self.assertEqual([row["history_date"] for row in rows], ["2026-03-01", "2026-03-05", "2026-03-10"])
+        # Still the stored rows, ids and all
+        ids = dict(OnePieceCardHistory.objects.filter(card_id=1).values_list("history_date", "id"))
+        self.assertEqual([row["id"] for row in rows], [ids[DAYS[0]], ids[DAYS[4]], ids[DAYS[9]]])
+
+    def test_columnar(self):
+        body = self.get(card_id=1, layout="columnar", start="2026-03-08").json()
+        self.assertEqual(body, {
+            "card_id": 1,
+            "dates": ["2026-03-08", "2026-03-09", "2026-03-10"],
+            "prices": [2.5, 3.0, 3.0],
+        })
+
+    def test_columnar_without_a_card(self):
+        self.assertEqual(self.get(layout="columnar").json(), {"card_id": None, "dates": [], "prices": []})
+
+    def test_malformed_params_are_400(self):
+        for params in (
+            {"start": "bad"},
+            {"start": "2025-13-01"},
+            {"end": "2025-02-30"},
+            {"max_points": "2"},
+            {"max_points": "many"},
+            {"granularity": "hour"},
+            {"layout": "csv"},
+        ):
+            with self.subTest(**params):
+                response = self.get(card_id=1, **params)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn("error", response.json())
+
+    @override_settings(HISTORY_STORE="runs")
+    def test_rows_from_runs_have_no_id(self):
+        daily = pd.DataFrame.from_records(
+            OnePieceCardHistory.objects.values_list("card_id", "history_date", "market_price"),
+            columns=["card_id", "history_date", "market_price"],
+        )
+        upsert_dataframe(encode_runs(daily), RUN_TABLE, conflict_columns=RUN_KEY)
+        OnePieceCardHistory.objects.all().delete()
+
+        rows = self.get(card_id=2).json()
+        self.assertEqual(rows[0], {"id": None, "card_id": 2, "history_date": "2026-03-01", "market_price": "5.00"})
+        self.assertEqual(len(rows), 3)
+
+
+class HistoryBatchTests(HistoryApiTestCase):
+    def batch(self, ids, **params):
+        return self.client.get(self.batch_url, {"ids": ids, **params})
+
+    def test_series_keyed_by_card_id(self):
+        body = self.batch("2,1,2").json()
+        self.assertEqual(body["granularity"], "day")
+        self.assertEqual(list(body["series"]), ["2", "1"])
+        self.assertEqual(body["series"]["2"], {
+            "dates": ["2026-03-01", "2026-03-02", "2026-03-03"],
+            "prices": [5.0, 5.0, 5.0],
+        })
+        self.assertEqual(body["series"]["1"]["prices"], PRICES[1])
+
+    def test_unknown_ids_get_empty_series(self):
+        body = self.batch("1,999").json()
+        self.assertEqual(body["series"]["999"], {"dates": [], "prices": []})
+        self.assertEqual(len(body["series"]["1"]["dates"]), 10)
+
+    def test_range_and_max_points(self):
+        body = self.batch("1,2", start="2026-03-02", end="2026-03-09", max_points=3).json()
+        self.assertEqual(body["series"]["1"], {
+            "dates": ["2026-03-02", "2026-03-05", "2026-03-09"],
+            "prices": [1.0, 9.0, 3.0],
+        })
+        self.assertEqual(body["series"]["2"]["dates"], ["2026-03-02", "2026-03-03"])
+
+    def test_granularity(self):
+        OnePieceCardWeeklyPrice.objects.bulk_create(
+            OnePieceCardWeeklyPrice(card_id=1, period_start=monday, open=close, high=close, low=close,
+                                    close=close, avg=close, days=7)
+            for monday, close in ((date(2026, 2, 23), 1.00), (date(2026, 3, 2), 2.00), (date(2026, 3, 9), 3.00))
+        )
+        body = self.batch("1,2", granularity="week", start="2026-03-04").json()
+        self.assertEqual(body, {
+            "granularity": "week",
+            "series": {
+                # The week holding start is included
+                "1": {"dates": ["2026-03-02", "2026-03-09"], "prices": [2.0, 3.0]},
+                "2": {"dates": [], "prices": []},
+            },
+        })
+
+    def test_at_most_max_batch_cards(self):
+        ids = ",".join(map(str, range(1, MAX_BATCH_CARDS + 1)))
+        self.assertEqual(self.batch(ids).status_code, 200)
+        response = self.batch(f"{ids},{MAX_BATCH_CARDS + 1}")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn(str(MAX_BATCH_CARDS), response.json()["error"])
+
+    def test_no_valid_ids_is_400(self):
+        for ids in ("", "a,b", "-1", "1.5"):
+            with self.subTest(ids=ids):
+                self.assertEqual(self.batch(ids).status_code, 400)
+        self.assertEqual(self.client.get(self.batch_url).status_code, 400)
+
+    def test_malformed_params_are_400(self):
+        for params in ({"start": "bad"}, {"max_points": "2"}, {"granularity": "hour"}):
+            with self.subTest(**params):
+                self.assertEqual(self.batch("1", **params).status_code, 400)
@@ -0,0 +1,139 @@
+import json
+import os
+import unittest
+from datetime import date
+from unittest import mock
+
+from django.test import TestCase
+
+from bounty_api.models import OnePieceCard, OnePieceCardHistory, EtlRun
+from bounty_api.etl.archive import ONE_PIECE_CATEGORY, archive_support
+from bounty_api.etl.cards import upsert_cards
+from bounty_api.etl.history import load_history_date
+from bounty_api.etl.synthetic import synthetic_cards
+from bounty_api.tests.helpers import ScratchDirMixin, run_command
+
+try:
+    import py7zr
+except ImportError:
+    py7zr = None
+
+DAYS = [date(2026, 2, 1), date(2026, 2, 2), date(2026, 2, 3)]
+OTHER_CATEGORY = 3
+
+
+@unittest.skipUnless(archive_support(), "import_archive needs py7zr")
+class ImportArchiveTests(ScratchDirMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        cards = synthetic_cards(4)
+        upsert_cards(cards, DAYS[0])
+        self.keys = list(zip(cards["product_id"].astype(int), cards["foil_type"]))
+        a, b, c, d = self.keys
+        # d goes unpriced after the first day, a moves on the last
+        self.prices = [
+            {a: 1.00, b: 2.00, c: 3.00, d: 4.00},
+            {a: 1.00, b: 2.50, c: 3.00},
+            {a: 1.75, b: 2.50, c: 3.00},
+        ]
+        self.archives = [self.build_archive(day, prices) for day, prices in zip(DAYS, self.prices)]
+
+    def build_archive(self, day, prices, broken=None):
+        """
+        prices-YYYY-MM-DD.ppmd.7z with the day's One Piece prices split over
+        two groups, plus another category. The broken group's file is not JSON.
+        """
+        tree = self.root / "tree" / str(day)
+        items = [
+            {"productId": product_id, "subTypeName": foil_type, "marketPrice": price}
+            for (product_id, foil_type), price in prices.items()
+        ]
+        groups = {
+            f"{ONE_PIECE_CATEGORY}/1": items[:2],
+            f"{ONE_PIECE_CATEGORY}/2": items[2:],
+            # Same products, wrong prices: must never be read
+            f"{OTHER_CATEGORY}/9": [dict(item, marketPrice=999.0) for item in items],
+        }
+        for group, results in groups.items():
+            (tree / group).mkdir(parents=True, exist_ok=True)
+            payload = json.dumps({"success": True, "errors": [], "results": results})
+            (tree / group / "prices").write_text(payload[:20] if group == broken else payload)
+
+        path = self.root / f"prices-{day}.ppmd.7z"
+        with py7zr.SevenZipFile(path, "w") as archive:
+            archive.writeall(tree, arcname=str(day))
+        return path
+
+    def history(self):
+        ids = {
+            (product_id, foil_type): card_id
+            for card_id, product_id, foil_type in OnePieceCard.objects.values_list("id", "product_id", "foil_type")
+        }
+        keys = {card_id: key for key, card_id in ids.items()}
+        return {
+            (keys[card_id], history_date): float(price)
+            for card_id, history_date, price in OnePieceCardHistory.objects.values_list(
+                "card_id", "history_date", "market_price"
+            )
+        }
+
+    def assert_complete_history(self):
+        a, b, c, d = self.keys
+        history = self.history()
+        self.assertEqual(len(history), 12)
+        for day, prices in zip(DAYS, self.prices):
+            for key, price in prices.items():
+                self.assertEqual(history[(key, day)], price)
+        # Carried forward from the last priced day, not today's price
+        self.assertEqual(history[(d, DAYS[1])], 4.00)
+        self.assertEqual(history[(d, DAYS[2])], 4.00)
+
+    def test_imports_archives_without_extracting(self):
+        before = sorted(os.listdir(self.root))
+        out = run_command("import_archive", *map(str, self.archives))
+
+        self.assertIn("Carried forward 2 missing prices", out)
+        self.assert_complete_history()
+        self.assertEqual(sorted(os.listdir(self.root)), before)
+        self.assertEqual(set(EtlRun.objects.values_list("run_date", flat=True)), set(DAYS))
+
+    def test_interrupted_import_resumes(self):
+        def fail_on_second_day(columns, df_cards, history_date, command, errors):
+            if history_date == DAYS[1]:
+                raise RuntimeError("interrupted")
+            return load_history_date(columns, df_cards, history_date, command, errors)
+
+        with mock.patch("bounty_api.management.commands.import_archive.load_history_date",
+                        side_effect=fail_on_second_day):
+            with self.assertRaises(RuntimeError):
+                run_command("import_archive", *map(str, self.archives))
+        self.assertEqual(list(EtlRun.objects.values_list("run_date", flat=True)), [DAYS[0]])
+
+        out = run_command("import_archive", *map(str, self.archives))
+        self.assertIn(f"Skipping {DAYS[0]}: already imported", out)
+        self.assertNotIn(f"Skipping {DAYS[1]}", out)
+        self.assert_complete_history()
+
+    def test_date_with_a_broken_member_is_retried(self):
+        a, b, c, d = self.keys
+        broken = self.build_archive(DAYS[1], self.prices[1], broken=f"{ONE_PIECE_CATEGORY}/1")
+        run_command("import_archive", str(self.archives[0]), str(broken))
+
+        self.assertEqual(list(EtlRun.objects.values_list("run_date", flat=True)), [DAYS[0]])
+        history = self.history()
+        self.assertEqual(history[(c, DAYS[1])], 3.00)
+        # Group 1 is filled from the day before until the retry
+        self.assertEqual(history[(b, DAYS[1])], 2.00)
+
+        self.build_archive(DAYS[1], self.prices[1])
+        out = run_command("import_archive", *map(str, self.archives))
+
+        self.assertIn(f"Skipping {DAYS[0]}: already imported", out)
+        self.assertNotIn(f"Skipping {DAYS[1]}", out)
+        self.assert_complete_history()
+        self.assertEqual(set(EtlRun.objects.values_list("run_date", flat=True)), set(DAYS))
+
+    def test_other_category(self):
+        out = run_command("import_archive", str(self.archives[0]), category=OTHER_CATEGORY)
+        self.assertIn(f"Inserted 4 priced rows for {DAYS[0]}", out)
+        self.assertEqual(set(self.history().values()), {999.0})
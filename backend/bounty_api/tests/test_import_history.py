@@ -0,0 +1,66 @@
+from datetime import date
+
+from django.test import TestCase
+
+from bounty_api.models import OnePieceCard, OnePieceCardHistory, EtlRun
+from bounty_api.etl.cards import upsert_cards
+from bounty_api.etl.synthetic import SyntheticCatalog
+from bounty_api.tests.helpers import ScratchDirMixin, run_command
+
+DAYS = [date(2026, 2, 1), date(2026, 2, 2)]
+
+
+class ImportHistoryTests(ScratchDirMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.catalog = SyntheticCatalog(n_sets=3, cards_per_set=5)
+        upsert_cards(self.catalog.cards, DAYS[0])
+        self.base_dir = self.root / "prices" / "prev"
+        for day, history_date in enumerate(DAYS):
+            self.catalog.write_history_day(self.base_dir / str(history_date), day)
+
+    def import_history(self):
+        return run_command("import_history", base_dir=str(self.base_dir))
+
+    def history(self, history_date):
+        ids = {
+            (product_id, foil_type): card_id
+            for card_id, product_id, foil_type in OnePieceCard.objects.values_list("id", "product_id", "foil_type")
+        }
+        stored = dict(
+            OnePieceCardHistory.objects.filter(history_date=history_date).values_list("card_id", "market_price")
+        )
+        keys = zip(self.catalog.cards["product_id"], self.catalog.cards["foil_type"])
+        return [float(stored[ids[key]]) for key in keys]
+
+    def imported(self):
+        return sorted(EtlRun.objects.filter(command="import_history").values_list("run_date", flat=True))
+
+    def test_imports_every_date_once(self):
+        self.import_history()
+        self.assertEqual(self.imported(), DAYS)
+        self.assertEqual(self.history(DAYS[1]), self.catalog.prices(1).tolist())
+
+        self.assertIn("already imported", self.import_history())
+        self.assertEqual(self.imported(), DAYS)
+
+    def test_date_with_a_corrupt_file_is_retried(self):
+        prices_file = self.base_dir / str(DAYS[1]) / "2" / "prices"
+        good = prices_file.read_bytes()
+        prices_file.write_bytes(good[:len(good) // 2])
+
+        self.import_history()
+
+        # The readable sets load, the broken one is carried forward from the day before
+        self.assertEqual(self.imported(), DAYS[:1])
+        expected = self.catalog.prices(1).copy()
+        broken = slice(self.catalog.rows_per_set, 2 * self.catalog.rows_per_set)
+        expected[broken] = self.catalog.prices(0)[broken]
+        self.assertEqual(self.history(DAYS[1]), expected.tolist())
+
+        prices_file.write_bytes(good)
+        out = self.import_history()
+
+        self.assertIn(f"Skipping {DAYS[0]}: already imported", out)
+        self.assertEqual(self.imported(), DAYS)
+        self.assertEqual(self.history(DAYS[1]), self.catalog.prices(1).tolist())
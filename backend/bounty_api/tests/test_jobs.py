@@ -0,0 +1,185 @@
+import io
+import json
+import threading
+from unittest import mock
+from datetime import date, timedelta
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connections
+from django.test import TestCase, TransactionTestCase, skipUnlessDBFeature
+from django.utils import timezone
+
+from bounty_api.models import EtlJob, EtlRun, OnePieceCard
+from bounty_api.etl.cards import CardChanges
+from bounty_api.etl.download import Downloader
+from bounty_api.etl.jobs import (
+    MAX_ATTEMPTS, STALE_AFTER, RETRY_BACKOFF, JobLost,
+    enqueue_sets, claim_job, requeue_stale, run_job, batch_changes, batch_status, wait_for_batch,
+)
+from bounty_api.etl.metrics import RUNS_DIR
+from bounty_api.etl.synthetic import SyntheticCatalog
+from bounty_api.tests.helpers import ScratchDirMixin, stand_in_server, run_command
+
+RUN_DATE = date(2026, 3, 2)
+BATCH = "2026-03-02T060000"
+
+
+class StandInCatalogMixin(ScratchDirMixin):
+    n_sets = 3
+
+    def setUp(self):
+        super().setUp()
+        self.catalog = SyntheticCatalog(n_sets=self.n_sets, cards_per_set=5)
+        self.catalog.write_site(self.root / "site")
+        self.server = self.enterContext(stand_in_server(self.root / "site"))
+        enqueue_sets(BATCH, RUN_DATE, self.server.url, self.catalog.set_ids)
+
+
+class JobQueueTests(StandInCatalogMixin, TestCase):
+    def age(self, job, **fields):
+        """Move the job's timestamps into the past."""
+        past = timezone.now() - STALE_AFTER - timedelta(minutes=1)
+        EtlJob.objects.filter(id=job.id).update(**{field: past for field in fields})
+
+    def test_claims_oldest_pending_job_once(self):
+        first, second = claim_job("w1"), claim_job("w2")
+        self.assertEqual((first.set_id, second.set_id), (1, 2))
+        first.refresh_from_db()
+        self.assertEqual((first.status, first.worker, first.attempts), (EtlJob.RUNNING, "w1", 1))
+        self.assertIsNotNone(first.heartbeat_at)
+        claim_job("w3")
+        self.assertIsNone(claim_job("w4"))
+
+    def test_requeues_only_jobs_without_a_heartbeat(self):
+        silent, slow = claim_job("dead"), claim_job("alive")
+        self.age(silent, claimed_at=True, heartbeat_at=True)
+        # Claimed long ago but still beating: a long job, not a lost one
+        self.age(slow, claimed_at=True)
+
+        self.assertEqual(requeue_stale(), 1)
+        silent.refresh_from_db()
+        slow.refresh_from_db()
+        self.assertEqual(silent.status, EtlJob.PENDING)
+        self.assertEqual(slow.status, EtlJob.RUNNING)
+        self.assertEqual(claim_job("w2").id, silent.id)
+
+    def test_stale_job_fails_after_max_attempts(self):
+        job = claim_job("dead")
+        EtlJob.objects.filter(id=job.id).update(attempts=MAX_ATTEMPTS)
+        self.age(job, heartbeat_at=True)
+        requeue_stale()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.error), (EtlJob.FAILED, "Worker lost"))
+
+    def test_failed_job_is_retried_after_a_delay(self):
+        EtlJob.objects.filter(set_id__gt=1).delete()
+        EtlJob.objects.update(url=f"{self.server.url}/missing/ProductsAndPrices.csv")
+
+        with Downloader(retries=0) as downloader:
+            for attempt in range(1, MAX_ATTEMPTS + 1):
+                job = claim_job("w1")
+                self.assertEqual(job.attempts, attempt)
+                with self.assertRaises(Exception):
+                    run_job(job, downloader)
+                job.refresh_from_db()
+                if attempt < MAX_ATTEMPTS:
+                    self.assertEqual(job.status, EtlJob.PENDING)
+                    delay = job.available_at - job.finished_at
+                    self.assertEqual(delay, RETRY_BACKOFF * 2 ** (attempt - 1))
+                    # Not claimable until the delay is up
+                    self.assertIsNone(claim_job("w1"))
+                    EtlJob.objects.filter(id=job.id).update(available_at=timezone.now())
+
+        self.assertEqual(job.status, EtlJob.FAILED)
+        self.assertIn("404", job.error)
+        self.assertIsNone(claim_job("w1"))
+
+    def test_requeued_job_cannot_be_finished_by_its_old_worker(self):
+        job = claim_job("slow")
+        self.age(job, heartbeat_at=True)
+        requeue_stale()
+        claim_job("fresh")
+
+        with Downloader() as downloader, self.assertRaises(JobLost):
+            run_job(job, downloader)
+        self.assertFalse(OnePieceCard.objects.exists())
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.worker, job.attempts), (EtlJob.RUNNING, "fresh", 2))
+
+
+class DistributedOptionsTests(TestCase):
+    def test_rejects_options_workers_ignore(self):
+        for option in ["shadow", "prices_only"]:
+            with self.assertRaisesMessage(CommandError, "can't be combined with --distributed"):
+                call_command("get_tcgcsv", distributed=True, **{option: True})
+
+
+class DistributedRunTests(StandInCatalogMixin, TestCase):
+    def test_run_is_recorded_like_a_local_one(self):
+        def drain_then_wait(batch, **kwargs):
+            call_command("etl_worker", drain=True, batch=batch, stdout=io.StringIO(), stderr=io.StringIO())
+            return wait_for_batch(batch, **kwargs)
+
+        with mock.patch("bounty_api.management.commands.get_tcgcsv.wait_for_batch", side_effect=drain_then_wait):
+            out = run_command("get_tcgcsv", distributed=True, base_url=self.server.url)
+        self.assertIn("ETL Complete!", out)
+
+        run = EtlRun.objects.get(command="get_tcgcsv")
+        self.assertEqual(run.rows_new, self.catalog.n_rows)
+        [path] = RUNS_DIR.glob("get_tcgcsv_*.json")
+        payload = json.loads(path.read_text())
+        self.assertTrue(payload["distributed"])
+        self.assertEqual((payload["rows_new"], payload["history_rows"]), (self.catalog.n_rows, self.catalog.n_rows))
+        self.assertEqual([stage["name"] for stage in payload["stages"]], [stage["name"] for stage in run.stages])
+        self.assertIn("workers", run_command("etl_report"))
+
+
+@skipUnlessDBFeature("has_select_for_update_skip_locked")
+class WorkerPoolTests(StandInCatalogMixin, TransactionTestCase):
+    """Several etl_worker loops, each on its own connection, draining one queue."""
+    n_sets = 12
+    workers = 4
+
+    def run_workers(self):
+        errors = []
+
+        def work(name):
+            try:
+                call_command("etl_worker", drain=True, batch=BATCH, name=name,
+                             stdout=io.StringIO(), stderr=io.StringIO())
+            except Exception as e:
+                errors.append(e)
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=work, args=(f"w{i}",)) for i in range(self.workers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+
+    def test_each_job_is_claimed_once(self):
+        self.run_workers()
+
+        self.assertEqual(batch_status(BATCH)[EtlJob.DONE], self.n_sets)
+        jobs = EtlJob.objects.filter(batch=BATCH)
+        self.assertEqual(set(jobs.values_list("attempts", flat=True)), {1})
+        self.assertTrue(set(jobs.values_list("worker", flat=True)) <= {f"w{i}" for i in range(self.workers)})
+        # A set merged twice would show up as unchanged rows
+        self.assertEqual(batch_changes(BATCH), CardChanges(new=self.catalog.n_rows))
+        self.assertEqual(OnePieceCard.objects.count(), self.catalog.n_rows)
+
+    def test_dead_workers_job_is_requeued_and_finished(self):
+        lost = claim_job("dead", BATCH)
+        past = timezone.now() - STALE_AFTER - timedelta(minutes=1)
+        EtlJob.objects.filter(id=lost.id).update(heartbeat_at=past)
+
+        self.run_workers()
+
+        lost.refresh_from_db()
+        self.assertEqual(lost.status, EtlJob.DONE)
+        self.assertEqual(lost.attempts, 2)
+        self.assertNotEqual(lost.worker, "dead")
+        self.assertEqual(batch_status(BATCH)[EtlJob.DONE], self.n_sets)
@@ -0,0 +1,114 @@
+import unittest
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+from django.db import connection
+from django.test import TestCase
+
+from bounty_api.models import OnePieceSet
+from bounty_api.etl import loader
+from bounty_api.etl.loader import upsert_dataframe, update_dataframe
+
+TABLE = OnePieceSet._meta.db_table
+# Only rewrite a set whose name actually changed
+NAME_CHANGED = f"{TABLE}.name <> EXCLUDED.name"
+
+
+def sets_frame(rows):
+    return pd.DataFrame(rows, columns=["id", "name", "description"])
+
+
+def stored_sets():
+    return {s.id: (s.name, s.description) for s in OnePieceSet.objects.all()}
+
+
+class UpsertDataframeTests(TestCase):
+    def setUp(self):
+        self.first = sets_frame([(1, "OP-01", "Romance Dawn"), (2, "OP-02", "Paramount War"), (3, "OP-03", None)])
+
+    def test_inserts_and_counts_rows(self):
+        self.assertEqual(upsert_dataframe(self.first, TABLE, conflict_columns=["id"]), 3)
+        self.assertEqual(stored_sets(), {1: ("OP-01", "Romance Dawn"), 2: ("OP-02", "Paramount War"), 3: ("OP-03", None)})
+
+    def test_do_nothing_counts_only_inserted_rows(self):
+        upsert_dataframe(self.first, TABLE, conflict_columns=["id"])
+        incoming = sets_frame([(1, "Renamed", None), (4, "OP-04", "Kingdoms of Intrigue")])
+        self.assertEqual(upsert_dataframe(incoming, TABLE, conflict_columns=["id"]), 1)
+        self.assertEqual(stored_sets()[1], ("OP-01", "Romance Dawn"))
+
+    def test_update_where_skips_unchanged_rows(self):
+        upsert_dataframe(self.first, TABLE, conflict_columns=["id"])
+        incoming = sets_frame([
+            (1, "OP-01", "Romance Dawn"),  # unchanged
+            (2, "OP-02 Renamed", "Paramount War"),  # changed
+            (4, "OP-04", None),  # new
+        ])
+        written = upsert_dataframe(
+            incoming, TABLE, conflict_columns=["id"], update_columns=["name", "description"],
+            update_where=NAME_CHANGED,
+        )
+        self.assertEqual(written, 2)
+        self.assertEqual(stored_sets()[2], ("OP-02 Renamed", "Paramount War"))
+        self.assertEqual(len(stored_sets()), 4)
+
+    def test_duplicate_keys_keep_the_last_row(self):
+        incoming = sets_frame([(1, "first", None), (1, "last", None)])
+        self.assertEqual(upsert_dataframe(incoming, TABLE, conflict_columns=["id"], update_columns=["name"]), 1)
+        self.assertEqual(stored_sets(), {1: ("last", None)})
+
+    def test_missing_values_are_null(self):
+        incoming = sets_frame([(1, "OP-01", np.nan), (2, "OP-02", pd.NA)])
+        upsert_dataframe(incoming, TABLE, conflict_columns=["id"])
+        self.assertEqual(stored_sets(), {1: ("OP-01", None), 2: ("OP-02", None)})
+
+    def test_counts_add_up_over_chunks(self):
+        incoming = sets_frame([(i, f"Set {i}", None) for i in range(1, 12)])
+        with mock.patch.object(loader, "INSERT_CHUNK_ROWS", 3), mock.patch.object(loader, "COPY_CHUNK_ROWS", 3):
+            self.assertEqual(upsert_dataframe(incoming, TABLE, conflict_columns=["id"]), 11)
+            renamed = incoming.assign(name=incoming["name"] + "!")
+            self.assertEqual(update_dataframe(renamed.iloc[:7], TABLE, key_columns=["id"]), 7)
+        self.assertEqual(OnePieceSet.objects.filter(name__endswith="!").count(), 7)
+
+    def test_empty_frame_writes_nothing(self):
+        self.assertEqual(upsert_dataframe(sets_frame([]), TABLE, conflict_columns=["id"]), 0)
+        self.assertEqual(update_dataframe(sets_frame([]), TABLE, key_columns=["id"]), 0)
+
+
+class UpdateDataframeTests(TestCase):
+    def setUp(self):
+        upsert_dataframe(sets_frame([(1, "OP-01", "a"), (2, "OP-02", "b")]), TABLE, conflict_columns=["id"])
+
+    def test_updates_matching_rows_only(self):
+        incoming = pd.DataFrame({"id": [2, 9], "description": ["changed", "no such set"]})
+        self.assertEqual(update_dataframe(incoming, TABLE, key_columns=["id"]), 1)
+        self.assertEqual(stored_sets(), {1: ("OP-01", "a"), 2: ("OP-02", "changed")})
+
+
+@unittest.skipUnless(connection.vendor == "postgresql", "COPY staging is PostgreSQL only")
+class CopyStagingTests(TestCase):
+    def test_upsert_and_update_go_through_copy(self):
+        # Values CSV would mangle without quoting: commas, quotes, newlines
+        incoming = sets_frame([
+            (1, 'OP-01 "Romance, Dawn"', "line one\nline two"),
+            (2, "OP-02", None),
+            (3, "OP-03", ""),
+        ])
+        with mock.patch.object(loader, "COPY_CHUNK_ROWS", 2), \
+                mock.patch.object(loader, "_copy_chunks", wraps=loader._copy_chunks) as copy_chunks:
+            self.assertEqual(upsert_dataframe(incoming, TABLE, conflict_columns=["id"]), 3)
+            changed = pd.DataFrame({"id": [1, 3, 9], "description": [None, "third", "no such set"]})
+            self.assertEqual(update_dataframe(changed, TABLE, key_columns=["id"]), 2)
+
+        self.assertEqual(copy_chunks.call_count, 2)
+        self.assertEqual(stored_sets(), {
+            1: ('OP-01 "Romance, Dawn"', None),
+            2: ("OP-02", None),
+            3: ("OP-03", "third"),
+        })
+
+    def test_staging_table_is_gone_after_the_load(self):
+        upsert_dataframe(sets_frame([(1, "OP-01", None)]), TABLE, conflict_columns=["id"])
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT to_regclass(%s)", [f"_stage_{TABLE}"])
+            self.assertIsNone(cursor.fetchone()[0])
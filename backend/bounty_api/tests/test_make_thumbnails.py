@@ -0,0 +1,84 @@
+import json
+import unittest
+
+from django.test import TestCase
+
+from bounty_api.etl.images import image_support, render_derivatives, DerivativeManifest, content_hash
+from bounty_api.management.commands.make_thumbnails import MANIFEST_NAME
+from bounty_api.tests.helpers import ScratchDirMixin, run_command
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+
+@unittest.skipUnless(image_support(), "make_thumbnails needs Pillow")
+class MakeThumbnailsTests(ScratchDirMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.cards = self.root / "cards"
+        self.cards.mkdir()
+
+    def source(self, name, width):
+        path = self.cards / name
+        Image.new("RGB", (width, width * 7 // 5), (200, 40, 40)).save(path, format="JPEG")
+        return path
+
+    def make_thumbnails(self, **options):
+        return run_command("make_thumbnails", cards_dir=self.cards, workers=1, formats=["jpeg"], **options)
+
+    def manifest(self):
+        return json.loads((self.cards / MANIFEST_NAME).read_text())
+
+    def test_sizes_wider_than_the_source_are_skipped(self):
+        self.source("small.jpg", 200)
+        self.make_thumbnails()
+
+        entry = self.manifest()["small.jpg"]
+        self.assertEqual(entry["skipped"], ["medium_75", "large_80"])
+        self.assertEqual(list(entry["derivatives"]), ["small_60/small.jpg"])
+        self.assertFalse((self.cards / "medium_75" / "small.jpg").exists())
+        self.assertFalse((self.cards / "large_80" / "small.jpg").exists())
+
+    def test_larger_source_gets_every_size(self):
+        self.source("big.jpg", 1000)
+        self.make_thumbnails()
+
+        entry = self.manifest()["big.jpg"]
+        self.assertEqual(entry["skipped"], [])
+        widths = {name: derivative["width"] for name, derivative in entry["derivatives"].items()}
+        self.assertEqual(widths, {"small_60/big.jpg": 200, "medium_75/big.jpg": 400, "large_80/big.jpg": 800})
+
+    def test_source_narrower_than_the_smallest_size_keeps_it(self):
+        self.source("tiny.jpg", 120)
+        self.make_thumbnails()
+        entry = self.manifest()["tiny.jpg"]
+        self.assertEqual(entry["derivatives"]["small_60/tiny.jpg"]["width"], 120)
+
+    def test_skipped_sizes_are_current(self):
+        self.source("small.jpg", 200)
+        self.make_thumbnails()
+        out = self.make_thumbnails()
+        self.assertIn("0 of 1 images need derivatives", out)
+
+    def test_oversized_derivatives_from_older_runs_are_removed(self):
+        source = self.source("small.jpg", 200)
+        # As rendered before sizes were skipped: every size, no "skipped" key
+        sizes = ["small_60", "medium_75", "large_80"]
+        entry = render_derivatives((source, self.cards, content_hash(source), ["small_60"], ["jpeg"]))
+        for size in sizes[1:]:
+            (self.cards / size).mkdir()
+            (self.cards / size / "small.jpg").write_bytes(source.read_bytes())
+            entry["derivatives"][f"{size}/small.jpg"] = {"width": 200, "height": 280, "bytes": 1}
+        del entry["skipped"]
+        manifest = DerivativeManifest(self.cards / MANIFEST_NAME)
+        manifest.record(source, entry)
+        manifest.save()
+
+        out = self.make_thumbnails()
+
+        self.assertIn("1 of 1 images need derivatives", out)
+        self.assertEqual(list(self.manifest()["small.jpg"]["derivatives"]), ["small_60/small.jpg"])
+        for size in sizes[1:]:
+            self.assertFalse((self.cards / size / "small.jpg").exists())
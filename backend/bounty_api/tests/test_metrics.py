@@ -0,0 +1,31 @@
+import unittest
+
+from django.test import SimpleTestCase
+
+from bounty_api.etl.metrics import RunMetrics, rss_mb
+
+
+@unittest.skipIf(rss_mb() is None, "needs /proc/self/statm")
+class StageRssTests(SimpleTestCase):
+    def test_rss_is_measured_per_stage(self):
+        metrics = RunMetrics()
+        with metrics.stage("allocate"):
+            block = b"x" * (64 * 1024 * 1024)
+        with metrics.stage("idle"):
+            pass
+        del block
+
+        allocate, idle = metrics.stages["allocate"], metrics.stages["idle"]
+        self.assertGreater(allocate.rss_delta_mb, 48)
+        # A later stage doesn't inherit the earlier one's growth, unlike a process peak
+        self.assertLess(abs(idle.rss_delta_mb), 8)
+        self.assertIn("RSS", allocate.summary())
+
+    def test_repeated_stage_accumulates(self):
+        metrics = RunMetrics()
+        blocks = []
+        # Blocks above glibc's 32 MB mmap threshold, so they can't reuse heap freed by earlier tests
+        for _ in range(2):
+            with metrics.stage("batch"):
+                blocks.append(b"x" * (64 * 1024 * 1024))
+        self.assertGreater(metrics.stages["batch"].rss_delta_mb, 96)
@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+from django.test import SimpleTestCase
+
+from bounty_api.etl.cards import iter_set_frames, card_load_frame
+from bounty_api.etl.parallel import iter_pool_results
+from bounty_api.etl.parse import parse_date_dir, conform_schema
+from bounty_api.etl.synthetic import SyntheticCatalog
+from bounty_api.tests.helpers import ScratchDirMixin
+
+
+class ParallelParseTests(ScratchDirMixin, SimpleTestCase):
+    def setUp(self):
+        super().setUp()
+        self.catalog = SyntheticCatalog(n_sets=4, cards_per_set=25)
+        self.day_dir = self.root / "prices" / "2026-03-01"
+        self.catalog.write_day(self.day_dir, day=0)
+
+    def test_pool_parse_matches_in_process(self):
+        serial = list(iter_set_frames(self.day_dir, workers=1))
+        pooled = list(iter_set_frames(self.day_dir, workers=3))
+
+        self.assertEqual(len(pooled), len(self.catalog.set_ids))
+        for expected, actual in zip(serial, pooled):
+            # Integer columns come back from the pool as float64, like the cache
+            pd.testing.assert_frame_equal(actual, conform_schema(expected))
+            pd.testing.assert_series_equal(
+                card_load_frame(actual, "2026-03-01")["fingerprint"],
+                card_load_frame(expected, "2026-03-01")["fingerprint"],
+            )
+
+    def test_parsed_day_is_the_catalog(self):
+        df = pd.concat(iter_set_frames(self.day_dir, workers=2), ignore_index=True)
+        cards = self.catalog.cards
+        self.assertEqual(df["product_id"].tolist(), cards["product_id"].tolist())
+        self.assertEqual(df["foil_type"].tolist(), cards["foil_type"].tolist())
+        self.assertEqual(df["color"].tolist(), cards["color"].tolist())
+        np.testing.assert_array_equal(df["market_price"].to_numpy(), self.catalog.prices(0))
+
+    def test_pool_skips_a_broken_file_like_in_process(self):
+        (self.day_dir / "group_2.csv").write_bytes(b"\xff\xfe not a csv \x00")
+        serial = list(iter_set_frames(self.day_dir, skip_errors=True, workers=1))
+        pooled = list(iter_set_frames(self.day_dir, skip_errors=True, workers=3))
+        self.assertEqual(len(serial), len(self.catalog.set_ids) - 1)
+        self.assertEqual([len(df) for df in pooled], [len(df) for df in serial])
+
+    def test_pool_parse_of_history_dates_matches_in_process(self):
+        folders = []
+        for day in range(3):
+            folder = self.root / "prices" / "prev" / f"2026-02-0{day + 1}"
+            self.catalog.write_history_day(folder, day)
+            folders.append(folder)
+
+        serial = [parse_date_dir(folder) for folder in folders]
+        pooled = [future.result() for _, future in iter_pool_results(parse_date_dir, folders, 2)]
+
+        self.assertEqual(len(pooled), len(serial))
+        for (name, columns, files, errors), expected in zip(pooled, serial):
+            self.assertEqual((name, files, errors), (expected[0], expected[2], expected[3]))
+            self.assertEqual(columns.keys(), expected[1].keys())
+            for key, values in columns.items():
+                np.testing.assert_array_equal(values, expected[1][key])
+        np.testing.assert_array_equal(pooled[1][1]["market_price"], self.catalog.prices(1))
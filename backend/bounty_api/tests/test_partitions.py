@@ -0,0 +1,53 @@
+import unittest
+from datetime import date
+
+from django.db import connection
+from django.test import TestCase
+
+from bounty_api.models import OnePieceCardHistory
+from bounty_api.etl.partitions import ensure_partitions, list_partitions, partition_name
+from bounty_api.tests.helpers import ScratchDirMixin, run_command
+
+JANUARY, FEBRUARY = date(2026, 1, 15), date(2026, 2, 15)
+
+
+def table_rows(name):
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT card_id, history_date FROM {connection.ops.quote_name(name)}")
+        return cursor.fetchall()
+
+
+def detached_tables():
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT relname FROM pg_class WHERE relname LIKE %s AND relkind = 'r'", ["%\\_detached\\_%"])
+        return [name for name, in cursor.fetchall()]
+
+
+@unittest.skipUnless(connection.vendor == "postgresql", "history is only partitioned on PostgreSQL")
+class DetachPartitionTests(ScratchDirMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        ensure_partitions(JANUARY, FEBRUARY)
+        OnePieceCardHistory.objects.create(card_id=1, history_date=JANUARY, market_price=1)
+        OnePieceCardHistory.objects.create(card_id=1, history_date=FEBRUARY, market_price=2)
+
+    def test_detached_month_can_be_loaded_again(self):
+        out = run_command("history_partitions", detach_before=date(2026, 2, 1))
+        self.assertIn(f"Detached {partition_name(JANUARY)}", out)
+        [detached] = detached_tables()
+        self.assertEqual(table_rows(detached), [(1, JANUARY)])
+
+        # The month's partition is created afresh, not mistaken for the detached table
+        self.assertEqual(ensure_partitions(JANUARY), [partition_name(JANUARY)])
+        OnePieceCardHistory.objects.create(card_id=2, history_date=JANUARY, market_price=3)
+
+        self.assertIn(date(2026, 1, 1), [p.start for p in list_partitions()])
+        self.assertEqual(table_rows(partition_name(JANUARY)), [(2, JANUARY)])
+        self.assertEqual(table_rows(detached), [(1, JANUARY)])
+
+    def test_archive_drops_the_detached_table(self):
+        out = run_command("history_partitions", detach_before=date(2026, 2, 1), archive=True)
+        self.assertIn("and dropped", out)
+        self.assertEqual(detached_tables(), [])
+        self.assertTrue((self.root / "history_archive" / f"{partition_name(JANUARY)}.csv.gz").exists())
+        self.assertEqual(ensure_partitions(JANUARY), [partition_name(JANUARY)])
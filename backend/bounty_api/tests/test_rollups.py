@@ -0,0 +1,76 @@
+from datetime import date, timedelta
+
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from bounty_api.models import (
+    OnePieceCard, OnePieceCardHistory, OnePieceCardWeeklyPrice, OnePieceCardMonthlyPrice,
+)
+from bounty_api.etl.cards import upsert_cards
+from bounty_api.etl.partitions import ensure_partitions
+from bounty_api.etl.rollups import period_bounds, refresh_rollups
+from bounty_api.etl.runs import convert_history
+from bounty_api.etl.synthetic import synthetic_cards
+
+FIRST, LAST = date(2026, 9, 21), date(2026, 11, 1)
+
+
+def price_on(day):
+    # Moves every day, so a period rebuilt from part of its days gets a different OHLC
+    return 10 + (day - FIRST).days * 0.25
+
+
+class PeriodBoundsTests(SimpleTestCase):
+    def test_each_granularity_gets_its_own_window(self):
+        # A Sunday that is also the first of a month
+        self.assertEqual(period_bounds(LAST, LAST, "week"), (date(2026, 10, 26), LAST))
+        self.assertEqual(period_bounds(LAST, LAST, "month"), (LAST, date(2026, 11, 30)))
+        self.assertEqual(
+            period_bounds(date(2026, 10, 14), date(2026, 10, 14), "week"), (date(2026, 10, 12), date(2026, 10, 18))
+        )
+        self.assertEqual(period_bounds(date(2026, 2, 3), date(2026, 2, 3), "month"), (date(2026, 2, 1), date(2026, 2, 28)))
+
+
+class RefreshRollupsTests(TestCase):
+    def setUp(self):
+        upsert_cards(synthetic_cards(2), FIRST)
+        ensure_partitions(FIRST, LAST)
+        days = [FIRST + timedelta(days=i) for i in range((LAST - FIRST).days + 1)]
+        OnePieceCardHistory.objects.bulk_create(
+            OnePieceCardHistory(card_id=card_id, history_date=day, market_price=price_on(day))
+            for card_id in OnePieceCard.objects.values_list("id", flat=True) for day in days
+        )
+
+    def rollups(self):
+        return {
+            model.__name__: set(model.objects.values_list("card_id", "period_start", "open", "close", "days"))
+            for model in (OnePieceCardWeeklyPrice, OnePieceCardMonthlyPrice)
+        }
+
+    def assert_refresh_keeps_other_periods(self, day):
+        refresh_rollups(FIRST, LAST)
+        complete = self.rollups()
+
+        refresh_rollups(day, day)
+
+        self.assertEqual(self.rollups(), complete)
+
+    def test_full_rebuild(self):
+        refresh_rollups(FIRST, LAST)
+        october = OnePieceCardMonthlyPrice.objects.filter(period_start=date(2026, 10, 1))
+        self.assertEqual({row.days for row in october}, {31})
+        self.assertEqual({float(row.open) for row in october}, {price_on(date(2026, 10, 1))})
+        self.assertEqual({float(row.close) for row in october}, {price_on(date(2026, 10, 31))})
+        self.assertEqual(OnePieceCardWeeklyPrice.objects.filter(period_start=date(2026, 9, 28), days=7).count(), 2)
+
+    def test_first_of_month_keeps_previous_month(self):
+        # The week of 2026-11-01 starts in October; October's monthly row must stay whole
+        self.assert_refresh_keeps_other_periods(LAST)
+
+    def test_mid_month_keeps_week_started_in_previous_month(self):
+        # The week of 2026-09-28 overlaps October; it must not be rebuilt from October's days only
+        self.assert_refresh_keeps_other_periods(date(2026, 10, 14))
+
+    @override_settings(HISTORY_STORE="runs")
+    def test_run_store(self):
+        convert_history()
+        self.assert_refresh_keeps_other_periods(LAST)
@@ -0,0 +1,129 @@
+from datetime import date, timedelta
+
+import pandas as pd
+from django.test import SimpleTestCase, TestCase
+
+from bounty_api.models import OnePieceCard, OnePieceCardHistory, OnePieceCardPriceRun
+from bounty_api.etl.cards import upsert_cards
+from bounty_api.etl.partitions import ensure_partitions
+from bounty_api.etl.runs import encode_runs, expand_runs, convert_history, extend_runs
+from bounty_api.etl.synthetic import synthetic_cards
+
+D1 = date(2026, 4, 1)
+
+
+def day(n):
+    return D1 + timedelta(days=n)
+
+
+def daily(prices):
+    """{card_id: {day offset: price}} -> daily history rows, in no particular order."""
+    rows = [
+        (card_id, day(offset), price)
+        for card_id, days in prices.items() for offset, price in days.items()
+    ]
+    return pd.DataFrame(rows[::-1], columns=["card_id", "history_date", "market_price"])
+
+
+def as_tuples(df):
+    df = df.sort_values(["card_id", "history_date"])
+    return [
+        (int(card_id), pd.Timestamp(history_date).date(), round(float(price), 2))
+        for card_id, history_date, price in df.itertuples(index=False)
+    ]
+
+
+def runs_as_tuples(runs):
+    return [
+        (int(card_id), str(valid_from), str(valid_to), float(price))
+        for card_id, valid_from, valid_to, price in runs.itertuples(index=False)
+    ]
+
+
+class EncodeRunsTests(SimpleTestCase):
+    def test_round_trip(self):
+        df = daily({
+            1: {0: 1.00, 1: 1.00, 2: 1.50, 3: 1.50, 4: 1.00},
+            # A gap on day 2 at an unchanged price
+            2: {0: 5.00, 1: 5.00, 3: 5.00, 4: 5.00},
+            3: {4: 0.25},
+        })
+        self.assertEqual(as_tuples(expand_runs(encode_runs(df))), as_tuples(df))
+
+    def test_runs_break_on_price_card_and_gap(self):
+        df = daily({
+            1: {0: 1.00, 1: 1.00, 2: 1.50, 3: 1.00},
+            2: {0: 1.00, 1: 1.00, 3: 1.00},
+        })
+        self.assertEqual(runs_as_tuples(encode_runs(df)), [
+            (1, "2026-04-01", "2026-04-02", 1.00),
+            (1, "2026-04-03", "2026-04-03", 1.50),
+            # Back to an earlier price is a new run, not the old one reopened
+            (1, "2026-04-04", "2026-04-04", 1.00),
+            (2, "2026-04-01", "2026-04-02", 1.00),
+            (2, "2026-04-04", "2026-04-04", 1.00),
+        ])
+
+    def test_last_run_ends_on_the_last_day(self):
+        df = daily({1: {offset: 2.00 for offset in range(30)}})
+        runs = encode_runs(df)
+        self.assertEqual(runs_as_tuples(runs), [(1, "2026-04-01", "2026-04-30", 2.00)])
+        self.assertEqual(len(expand_runs(runs)), 30)
+
+    def test_float_noise_is_not_a_price_change(self):
+        df = daily({1: {0: 0.1 + 0.2, 1: 0.3}})
+        self.assertEqual(runs_as_tuples(encode_runs(df)), [(1, "2026-04-01", "2026-04-02", 0.30)])
+
+    def test_empty(self):
+        runs = encode_runs(daily({}))
+        self.assertTrue(runs.empty)
+        self.assertTrue(expand_runs(runs).empty)
+
+
+class RunTableTests(TestCase):
+    def setUp(self):
+        upsert_cards(synthetic_cards(2), D1)
+        self.a, self.b = OnePieceCard.objects.order_by("id").values_list("id", flat=True)
+        ensure_partitions(day(0), day(5))
+        self.prices = {
+            self.a: {0: 1.00, 1: 1.00, 2: 1.25},
+            self.b: {0: 3.00, 2: 3.00},
+        }
+        OnePieceCardHistory.objects.bulk_create(
+            OnePieceCardHistory(card_id=card_id, history_date=day(offset), market_price=price)
+            for card_id, days in self.prices.items() for offset, price in days.items()
+        )
+
+    def stored_runs(self):
+        return list(OnePieceCardPriceRun.objects.order_by("card_id", "valid_from").values_list(
+            "card_id", "valid_from", "valid_to", "market_price"
+        ))
+
+    def test_convert_history_round_trips(self):
+        self.assertEqual(convert_history(chunk_cards=1), (5, 4))
+        runs = pd.DataFrame(self.stored_runs(), columns=["card_id", "valid_from", "valid_to", "market_price"])
+        expanded = expand_runs(runs.astype({"market_price": "float64"}))
+        self.assertEqual(as_tuples(expanded), as_tuples(daily(self.prices)))
+
+    def test_extend_runs_continues_the_open_run(self):
+        convert_history()
+        OnePieceCard.objects.filter(id=self.a).update(market_price=1.25)
+        OnePieceCard.objects.filter(id=self.b).update(market_price=3.50)
+
+        started = extend_runs(day(3))
+
+        self.assertEqual(started, 1)
+        a_last, b_last = [
+            [run for run in self.stored_runs() if run[0] == card_id][-1] for card_id in (self.a, self.b)
+        ]
+        # Same price as yesterday: the run grows; a new price starts a run
+        self.assertEqual(a_last[1:3], (day(2), day(3)))
+        self.assertEqual(b_last[1:3], (day(3), day(3)))
+        self.assertEqual(float(b_last[3]), 3.50)
+
+    def test_extend_runs_is_idempotent(self):
+        convert_history()
+        extend_runs(day(3))
+        once = self.stored_runs()
+        self.assertEqual(extend_runs(day(3)), 0)
+        self.assertEqual(self.stored_runs(), once)
@@ -0,0 +1,76 @@
+from unittest import mock
+
+from django.test import SimpleTestCase, TestCase
+
+from bounty_api.models import OnePieceSet
+from bounty_api.etl.sets import SetChanges, groups_frame, sync_sets
+
+HEADER = "groupId,name,abbreviation,isSupplemental,categoryId\n"
+
+
+def groups(*rows):
+    """Groups.csv content from (groupId, name, abbreviation) rows."""
+    lines = [f'{group_id},"{name}",{abbreviation},False,68' for group_id, name, abbreviation in rows]
+    return groups_frame((HEADER + "\n".join(lines) + "\n").encode())
+
+
+ROMANCE_DAWN = (1, "Romance Dawn", "OP01")
+PARAMOUNT_WAR = (2, "Paramount War", "OP02")
+PILLARS = (3, "Pillars of Strength", "OP03")
+
+
+def stored_sets():
+    return {s.id: (s.name, s.description) for s in OnePieceSet.objects.all()}
+
+
+class GroupsFrameTests(SimpleTestCase):
+    def test_shapes_groups_like_one_piece_set(self):
+        df = groups((1, "Romance Dawn", "OP 01"), (2, "", "OP02"), (1, "Romance Dawn v2", "OP 01"))
+        self.assertEqual(df["id"].tolist(), [2, 1])
+        self.assertEqual(df["name"].tolist(), ["OP02", "OP_01"])
+        self.assertEqual(df["description"].tolist(), [None, "Romance Dawn v2"])
+
+
+class SyncSetsTests(TestCase):
+    def setUp(self):
+        sync_sets(groups(ROMANCE_DAWN, PARAMOUNT_WAR))
+
+    def sync(self, df):
+        with mock.patch.object(OnePieceSet.objects, "bulk_create", wraps=OnePieceSet.objects.bulk_create) as create, \
+                mock.patch.object(OnePieceSet.objects, "bulk_update", wraps=OnePieceSet.objects.bulk_update) as update:
+            changes = sync_sets(df)
+        return changes, create, update
+
+    def test_first_sync_creates_every_set(self):
+        self.assertEqual(stored_sets(), {1: ("OP01", "Romance Dawn"), 2: ("OP02", "Paramount War")})
+
+    def test_renamed_set_is_updated_not_duplicated(self):
+        changes, create, update = self.sync(groups((1, "Romance Dawn (Reprint)", "OP-01"), PARAMOUNT_WAR))
+
+        self.assertEqual(changes, SetChanges(changed=[1]))
+        create.assert_not_called()
+        self.assertEqual(update.call_count, 1)
+        self.assertEqual([s.id for s in update.call_args.args[0]], [1])
+        self.assertEqual(OnePieceSet.objects.count(), 2)
+        self.assertEqual(stored_sets()[1], ("OP-01", "Romance Dawn (Reprint)"))
+
+    def test_unchanged_feed_writes_nothing(self):
+        with self.assertNumQueries(1):
+            changes = sync_sets(groups(ROMANCE_DAWN, PARAMOUNT_WAR))
+        self.assertEqual(changes, SetChanges())
+
+    def test_new_changed_and_missing_in_one_pass(self):
+        changes, create, update = self.sync(groups((2, "Paramount War", "OP-02"), PILLARS))
+
+        self.assertEqual(changes, SetChanges(new=[3], changed=[2], missing=[1]))
+        self.assertEqual((create.call_count, update.call_count), (1, 1))
+        # Sets that left the feed are reported, not deleted
+        self.assertEqual(stored_sets(), {
+            1: ("OP01", "Romance Dawn"),
+            2: ("OP-02", "Paramount War"),
+            3: ("OP03", "Pillars of Strength"),
+        })
+
+    def test_blank_description_matches_null(self):
+        sync_sets(groups((4, "", "PRB")))
+        self.assertEqual(sync_sets(groups(ROMANCE_DAWN, PARAMOUNT_WAR, (4, "", "PRB"))), SetChanges())
@@ -0,0 +1,128 @@
+import threading
+import unittest
+from datetime import date
+from unittest import mock
+
+from django.db import connection, connections
+from django.test import TransactionTestCase
+
+from bounty_api.models import OnePieceCard
+from bounty_api.etl import shadow
+from bounty_api.etl.cards import CARD_TABLE, upsert_cards
+from bounty_api.etl.shadow import EtlLocked, create_shadow, etl_lock, shadow_name, swap_shadow
+from bounty_api.etl.synthetic import synthetic_cards
+from bounty_api.tests.helpers import ScratchDirMixin
+
+D1 = date(2026, 3, 1)
+
+
+def index_names(table=CARD_TABLE):
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT indexname FROM pg_indexes WHERE tablename = %s", [table])
+        return {name for name, in cursor.fetchall()}
+
+
+def shadow_count():
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT COUNT(*) FROM {shadow_name()}")
+        return cursor.fetchone()[0]
+
+
+def in_thread(target):
+    """Run target on its own connection; returns (thread, errors)."""
+    errors = []
+
+    def run():
+        try:
+            target()
+        except Exception as e:
+            errors.append(e)
+        finally:
+            connections.close_all()
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    return thread, errors
+
+
+@unittest.skipUnless(connection.vendor == "postgresql", "shadow tables are PostgreSQL only")
+class ShadowSwapTests(ScratchDirMixin, TransactionTestCase):
+    def setUp(self):
+        super().setUp()
+        upsert_cards(synthetic_cards(20), D1)
+        self.cards = sorted(OnePieceCard.objects.values_list("id", "product_id", "foil_type", "market_price"))
+
+    def test_swap_keeps_rows_sequence_and_index_names(self):
+        indexes = index_names()
+        table = create_shadow()
+        self.assertEqual(shadow_count(), len(self.cards))
+        swap_shadow()
+
+        self.assertEqual(table, shadow_name())
+        self.assertEqual(sorted(OnePieceCard.objects.values_list("id", "product_id", "foil_type", "market_price")),
+                         self.cards)
+        self.assertEqual(index_names(), indexes)
+        self.assertEqual(index_names(shadow_name()), set())
+        # The new table's own sequence carries on after the copied ids
+        upsert_cards(synthetic_cards(1).assign(product_id=999999), D1)
+        new_id = OnePieceCard.objects.get(product_id=999999).id
+        self.assertEqual(new_id, max(card_id for card_id, *_ in self.cards) + 1)
+
+    def test_reader_survives_the_swap(self):
+        table = create_shadow()
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {table} WHERE id = %s", [self.cards[0][0]])
+
+        reading = threading.Event()
+        counts = []
+
+        def read():
+            # Holds the live table for longer than the swap's lock timeout
+            with connections["default"].cursor() as cursor:
+                cursor.execute("BEGIN")
+                cursor.execute(f"SELECT COUNT(*) FROM {CARD_TABLE}")
+                counts.append(cursor.fetchone()[0])
+                reading.set()
+                cursor.execute("SELECT pg_sleep(0.8)")
+                cursor.execute(f"SELECT COUNT(*) FROM {CARD_TABLE}")
+                counts.append(cursor.fetchone()[0])
+                cursor.execute("COMMIT")
+
+        thread, errors = in_thread(read)
+        reading.wait(5)
+        with mock.patch.object(shadow, "SWAP_RETRY_DELAY", 0.1), \
+                mock.patch.object(shadow, "_swap_once", wraps=shadow._swap_once) as swap_once:
+            swap_shadow()
+        thread.join()
+
+        self.assertEqual(errors, [])
+        # The reader saw the old table throughout, the swap waited for it
+        self.assertEqual(counts, [len(self.cards)] * 2)
+        self.assertGreater(swap_once.call_count, 1)
+        self.assertEqual(OnePieceCard.objects.count(), len(self.cards) - 1)
+
+
+@unittest.skipUnless(connection.vendor == "postgresql", "the ETL lock is PostgreSQL only")
+class EtlLockTests(TransactionTestCase):
+    def test_second_holder_is_refused(self):
+        held, release = threading.Event(), threading.Event()
+
+        def hold():
+            with etl_lock():
+                held.set()
+                release.wait(5)
+
+        thread, errors = in_thread(hold)
+        held.wait(5)
+        try:
+            with self.assertRaises(EtlLocked):
+                with etl_lock():
+                    pass
+        finally:
+            release.set()
+            thread.join()
+        self.assertEqual(errors, [])
+
+        # Free again once the first run lets go
+        with etl_lock():
+            pass
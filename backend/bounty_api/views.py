@@ -6,15 +6,18 @@ from rest_framework.decorators import action
 from .models import OnePieceSet, OnePieceCard, OnePieceCardHistory, OnePieceDeck
 # , OnePieceDeckCard
 from .serializers import RegisterSerializer, OnePieceSetSerializer, OnePieceCardSerializer, \
-                         OnePieceCardHistorySerializer, OnePieceDeckSerializer
+                         OnePieceCardHistorySerializer, PriceRollupSerializer, OnePieceDeckSerializer
 # , OnePieceDeckCardSerializer
 from .utils import generate_verification_link
+from .etl.rollups import ROLLUPS, period_floor
+from .etl.series import GRANULARITIES, EMPTY_SERIES, history_series, downsample, columnar, daily_rows
 
 from django.conf import settings
 from django.core.mail import send_mail
 from django.core.signing import BadSignature, SignatureExpired, loads
 from django.contrib.auth import get_user_model
 from django.utils import timezone
+from django.utils.dateparse import parse_date
 
 
 User = get_user_model()
@@ -96,6 +99,30 @@ class OnePieceCardViewSet(viewsets.ModelViewSet):
         price_map = {card["id"]: card["market_price"] for card in cards}
         return Response(price_map)
 
+MAX_BATCH_CARDS = 300
+
+def history_params(query_params) -> dict:
+    """granularity, start, end, max_points and layout from a history request; ValueError if malformed."""
+    params = {"granularity": query_params.get("granularity", "day"),
+              "layout": query_params.get("layout", "rows")}
+    if params["granularity"] not in GRANULARITIES:
+        raise ValueError(f"granularity must be one of {', '.join(GRANULARITIES)}")
+    if params["layout"] not in ("rows", "columnar"):
+        raise ValueError("layout must be rows or columnar")
+    for name in ("start", "end"):
+        value = query_params.get(name)
+        try:
+            params[name] = parse_date(value) if value else None
+        except ValueError:
+            params[name] = None
+        if value and params[name] is None:
+            raise ValueError(f"{name} must be YYYY-MM-DD")
+    max_points = query_params.get("max_points")
+    if max_points and (not max_points.isdigit() or int(max_points) < 3):
+        raise ValueError("max_points must be a whole number of at least 3")
+    params["max_points"] = int(max_points) if max_points else None
+    return params
+
 class OnePieceCardHistoryViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = OnePieceCardHistory.objects.all()
     serializer_class = OnePieceCardHistorySerializer
@@ -103,10 +130,93 @@ class OnePieceCardHistoryViewSet(viewsets.ReadOnlyModelViewSet):
     def get_queryset(self):
         card_id = self.request.query_params.get("card_id")
         if card_id:
-            return self.queryset.filter(card_id=card_id).order_by("history_date")
+            queryset = self.queryset.filter(card_id=card_id).order_by("history_date")
+            # Parsed by list(); detail requests don't filter by date
+            params = getattr(self, "params", {})
+            if params.get("start"):
+                queryset = queryset.filter(history_date__gte=params["start"])
+            if params.get("end"):
+                queryset = queryset.filter(history_date__lte=params["end"])
+            return queryset
         return self.queryset.none()
         # return self.queryset.all() //for debug
 
+    def list(self, request, *args, **kwargs):
+        """
+        ?card_id=X, optionally with:
+          granularity=day|week|month - week and month are OHLC rollups, one row per period
+          start, end=YYYY-MM-DD - inclusive date range
+          max_points=N - downsample to N points with LTTB
+          layout=columnar - {"card_id", "dates": [...], "prices": [...]} instead of one object per point
+        """
+        try:
+            self.params = history_params(request.query_params)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=400)
+        granularity, start, end = self.params["granularity"], self.params["start"], self.params["end"]
+        is_columnar = self.params["layout"] == "columnar"
+
+        card_id = request.query_params.get("card_id", "")
+        if not card_id.isdigit():
+            return Response({"card_id": None, **columnar(*EMPTY_SERIES)} if is_columnar else [])
+        card_id = int(card_id)
+
+        if not is_columnar and not self.params["max_points"]:
+            if granularity in ROLLUPS:
+                return Response(PriceRollupSerializer(self.rollups(card_id), many=True).data)
+            if settings.HISTORY_STORE != "runs":
+                return super().list(request, *args, **kwargs)
+
+        dates, prices = history_series([card_id], granularity, start, end).get(card_id, EMPTY_SERIES)
+        dates, prices = downsample(dates, prices, self.params["max_points"])
+        if is_columnar:
+            return Response({"card_id": card_id, **columnar(dates, prices)})
+        if granularity in ROLLUPS:
+            kept = self.rollups(card_id).filter(period_start__in=dates.astype(object).tolist())
+            return Response(PriceRollupSerializer(kept, many=True).data)
+        if settings.HISTORY_STORE != "runs":
+            kept = self.get_queryset().filter(history_date__in=dates.astype(object).tolist())
+            return Response(self.get_serializer(kept, many=True).data)
+        return Response(daily_rows(card_id, dates, prices))
+
+    @action(detail=False, methods=["get"], url_path="batch")
+    def batch(self, request):
+        """
+        Several cards' histories in one request and one query, keyed by card id.
+        Example: /bounty_api/onepiece_cardhistory/batch/?ids=1,2,3&start=2025-01-01
+        Takes the same granularity, start, end and max_points as the list;
+        the layout is always columnar.
+        """
+        try:
+            params = history_params(request.query_params)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=400)
+        ids = request.query_params.get("ids", "")
+        id_list = list(dict.fromkeys(int(i) for i in ids.split(",") if i.isdigit()))
+
+        if not id_list:
+            return Response({"error": "No valid card IDs provided"}, status=400)
+        if len(id_list) > MAX_BATCH_CARDS:
+            return Response({"error": f"At most {MAX_BATCH_CARDS} card IDs per request"}, status=400)
+
+        series = history_series(id_list, params["granularity"], params["start"], params["end"])
+        return Response({
+            "granularity": params["granularity"],
+            "series": {
+                card_id: columnar(*downsample(*series.get(card_id, EMPTY_SERIES), params["max_points"]))
+                for card_id in id_list
+            },
+        })
+
+    def rollups(self, card_id):
+        model = ROLLUPS[self.params["granularity"]][0]
+        rollups = model.objects.filter(card_id=card_id).order_by("period_start")
+        if self.params["start"]:
+            rollups = rollups.filter(period_start__gte=period_floor(self.params["start"], self.params["granularity"]))
+        if self.params["end"]:
+            rollups = rollups.filter(period_start__lte=self.params["end"])
+        return rollups
+
 class OnePieceDeckViewSet(viewsets.ModelViewSet):
     serializer_class = OnePieceDeckSerializer
     permission_classes = [permissions.IsAuthenticated]
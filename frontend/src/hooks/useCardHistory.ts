@@ -2,25 +2,25 @@ import useSWR from "swr";
 import { fetcher } from "@/bh_lib/fetcher";
 import { HistoryData } from "@/bh_lib/types";
 
-interface RawHistory{
-    id: number;
-    card_id: number;
-    history_date: string;
-    market_price: number;
+interface ColumnarHistory{
+    card_id: number | null;
+    dates: string[];
+    prices: number[];
 }
 
-export function useCardHistory(cardId?: number) {
+// The chart is a few hundred pixels wide; the server downsamples longer histories
+const MAX_POINTS = 365;
+
+export function useCardHistory(cardId?: number, maxPoints: number = MAX_POINTS) {
     const shouldFetch = !!cardId;
-    const { data, error, isLoading } = useSWR<RawHistory[]>(
-    shouldFetch ? `http://localhost:8000/bounty_api/onepiece_cardhistory/?card_id=${cardId}` : null,
+    const { data, error, isLoading } = useSWR<ColumnarHistory>(
+    shouldFetch ? `http://localhost:8000/bounty_api/onepiece_cardhistory/?card_id=${cardId}&layout=columnar&max_points=${maxPoints}` : null,
     fetcher
     );
 
-    const history: HistoryData[] | undefined = data
-        ?.filter((entry) => entry.market_price !== null) // optional filtering
-        ?.map((entry) => ({
-        date: entry.history_date,
-        price: entry.market_price!, // or whichever price you want to plot
+    const history: HistoryData[] | undefined = data?.dates.map((date, i) => ({
+        date,
+        price: data.prices[i],
     }));
 
     return { priceHistory: history, isLoading, error };